@@ -11,6 +11,14 @@ from collections import namedtuple
 
 # enable calmjs compatibility - i.e. the dynamic import feature
 CALMJS_COMPAT = 'calmjs_compat'
+# generate the calmjs loader module such that the exported modules are
+# only evaluated when first accessed, rather than when loaded.
+CALMJS_LAZY_LOADER = 'calmjs_lazy_loader'
+# generate the calmjs loader module such that the exported modules are
+# fetched by webpack as separate chunks when required asynchronously,
+# i.e. through the AMD style require with a callback; implies the
+# splitting of chunks.
+CALMJS_ASYNC_LOADER = 'calmjs_async_loader'
 # the map from a module name to the loader needed; used by the various
 # functions and methods in the loaderplugin module
 # see definition of WebpackModuleLoaderRegistryKey later
@@ -43,12 +51,95 @@ WEBPACK_RESOLVELOADER_ALIAS = 'webpack_resolveloader_alias'
 WEBPACK_OPTIMIZE_MINIMIZE = 'webpack_optimize_minimize'
 # option for enabling the checking of imports; defaults to True.
 VERIFY_IMPORTS = 'verify_imports'
+# the number of worker processes for the transpile and the verification
+# of imports steps; defaults to 1 which keeps everything in the current
+# process.
+BUILD_JOBS = 'build_jobs'
+# enable incremental builds, where the sources unchanged since the
+# previous build into the same build directory are skipped; requires
+# an explicitly specified build directory.
+INCREMENTAL_BUILD = 'incremental_build'
+# the build manifest instance used for the incremental build.
+BUILD_MANIFEST = 'build_manifest'
+# mapping of the paths of the transpiled targets to the names of the
+# modules that they import, as recorded during the transpile step.
+TRANSPILED_IMPORTS = 'transpiled_imports'
+# path to the file for caching the import names extracted from sources
+# for the checking of imports across builds; disabled if unset.
+VERIFY_IMPORTS_CACHE = 'verify_imports_cache'
+# determine the names imported by the simple sources for the checking of
+# imports from a scan of their tokens, without a full parse; the syntax
+# of those sources is left for the transpile to check.
+VERIFY_IMPORTS_PRESCAN = 'verify_imports_prescan'
+# path to the file for caching the version of the webpack binary across
+# processes; the version is always cached in memory for the process.
+WEBPACK_VERSION_CACHE = 'webpack_version_cache'
+# the driver used for invoking webpack in the link step; either 'cli'
+# for the webpack binary or 'node' for the node driver script that
+# invokes webpack through its node API.
+WEBPACK_LINK_DRIVER = 'webpack_link_driver'
+# keep webpack running as a watcher after the initial build, with the
+# changed sources compiled again into the build directory.
+WEBPACK_WATCH = 'webpack_watch'
+# path to the directory of the artifacts cached by the fingerprint of
+# the inputs to webpack, such that the link step may be skipped.
+ARTIFACT_CACHE_DIR = 'artifact_cache_dir'
+# hard-link the files between the artifact cache and the export target
+# rather than copying them.
+ARTIFACT_CACHE_LINK = 'artifact_cache_link'
+# the fingerprint of the inputs to webpack for the artifact cache.
+ARTIFACT_FINGERPRINT = 'artifact_fingerprint'
+# the wall and CPU times recorded for each of the phases of the build.
+BUILD_TIMINGS = 'build_timings'
+# write a JSON report with the timings next to the export target.
+BUILD_REPORT = 'build_report'
+# the structured build result reported by the node driver.
+WEBPACK_BUILD_RESULT = 'webpack_build_result'
+# allow webpack to split the chunks that are loaded on demand into
+# separate files, with a manifest of the files emitted alongside.
+WEBPACK_SPLIT_CHUNKS = 'webpack_split_chunks'
+# the strategy for staging the resources handled by the loader plugins
+# into the build directory; see the available strategies below.
+LOADERPLUGIN_STAGING = 'loaderplugin_staging'
+# stage the sources without any dynamic require verbatim into the build
+# directory, such that only the sources that need the calmjs loader are
+# written out again through the unparser.
+TRANSPILE_PASSTHROUGH = 'transpile_passthrough'
+# path to the file for caching the names of the modules exported by the
+# artifacts that are probed for the karma test runner; disabled if unset.
+ARTIFACT_PROBE_CACHE = 'artifact_probe_cache'
+# the engine used for rewriting the dynamic requires in the sources
+# being transpiled; see the available rewriters below.
+TRANSPILE_REWRITER = 'transpile_rewriter'
 
 # constants
 
 # the default calmjs.webpack loaderplugins registry name
 CALMJS_WEBPACK_LOADERPLUGINS = 'calmjs.webpack.loaderplugins'
 
+# The available webpack link drivers
+LINK_DRIVER_CLI = 'cli'
+LINK_DRIVER_NODE = 'node'
+DEFAULT_LINK_DRIVER = LINK_DRIVER_CLI
+
+# The available staging strategies for the loader plugin resources; the
+# reference strategy has the alias point to the source file in place.
+STAGING_COPY = 'copy'
+STAGING_HARDLINK = 'hardlink'
+STAGING_SYMLINK = 'symlink'
+STAGING_REFERENCE = 'reference'
+STAGING_STRATEGIES = (
+    STAGING_COPY, STAGING_HARDLINK, STAGING_SYMLINK, STAGING_REFERENCE)
+DEFAULT_LOADERPLUGIN_STAGING = STAGING_COPY
+
+# The available rewriters for the dynamic requires; the unparse rewriter
+# writes out the complete tree, while the splice rewriter inserts the
+# calmjs loader into the original source text at the located positions.
+REWRITER_UNPARSE = 'unparse'
+REWRITER_SPLICE = 'splice'
+TRANSPILE_REWRITERS = (REWRITER_UNPARSE, REWRITER_SPLICE)
+DEFAULT_TRANSPILE_REWRITER = REWRITER_UNPARSE
+
 # The calmjs loader name
 DEFAULT_CALMJS_EXPORT_NAME = '__calmjs_loader__'
 
@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent caches for values derived from files on the filesystem.
+"""
+
+from __future__ import unicode_literals
+
+import codecs
+import hashlib
+import json
+import logging
+import shutil
+from os import getpid
+from os import makedirs
+from os import remove
+from os import rename
+from os import stat
+from os.path import dirname
+from os.path import exists
+from os.path import getsize
+from os.path import isdir
+from os.path import isfile
+from os.path import join
+from os.path import realpath
+from tempfile import mkdtemp
+
+from calmjs import cli
+from calmjs.utils import which
+
+try:  # pragma: no cover
+    from os import replace
+except ImportError:  # pragma: no cover
+    # python 2 on POSIX rename will replace the target.
+    from os import rename as replace
+
+try:  # pragma: no cover
+    from os import link
+except ImportError:  # pragma: no cover
+    # python 2 on windows; the fallback to copying will be used.
+    link = None
+
+logger = logging.getLogger(__name__)
+
+# the default maximum number of records to be retained by a cache.
+DEFAULT_MAX_ENTRIES = 8192
+# bump this when the format of the records stored is changed.
+_CACHE_VERSION = 1
+
+
+def file_digest(path, blocksize=65536):
+    """
+    Return the hex digest of the contents of the file at path.
+    """
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as fd:
+        for block in iter(lambda: fd.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_if_changed(path, content):
+    """
+    Write the content, either text that will be encoded as UTF-8 or
+    bytes, to the file at path, unless that file already has identical
+    content as compared by their digests, such that its modification
+    time is preserved for file watchers and caches downstream.  The
+    file is replaced atomically when written; return True if written.
+    """
+
+    if not isinstance(content, bytes):
+        content = content.encode('utf8')
+    if isfile(path) and getsize(path) == len(content) and (
+            file_digest(path) == hashlib.sha256(content).hexdigest()):
+        logger.debug("'%s' is unchanged; not rewritten", path)
+        return False
+    # write to a temporary file in the same directory and replace the
+    # original to avoid partial writes from being read; the permissions
+    # of the temporary file will be the defaults for the process.
+    temp = '%s.%d.tmp' % (path, getpid())
+    try:
+        with open(temp, 'wb') as fd:
+            fd.write(content)
+        replace(temp, path)
+    except (IOError, OSError):
+        if exists(temp):
+            remove(temp)
+        raise
+    return True
+
+
+def dump_json(path, data):
+    """
+    Write the data serialized as JSON to the file at path through
+    write_if_changed; return True if written.
+    """
+
+    return write_if_changed(path, json.dumps(data, sort_keys=True))
+
+
+class FileRecordCache(object):
+    """
+    A size bounded mapping from file paths to JSON serializable values
+    that were derived from the contents of those files, persisted as a
+    single JSON file.
+
+    A record is only returned if the file size is unchanged and either
+    the modification time or the digest of the contents of the file
+    still match the ones recorded, such that a file that have simply
+    been touched will not result in a cache miss.  Failing that, a
+    record for some other path with identical contents will be moved
+    to the requested path, as build directories are typically created
+    anew for every build.  When the number of records exceed
+    max_entries, the least recently used records will be evicted when
+    the cache is dumped.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.records = {}
+        self.digests = {}
+        self.counter = 0
+        self.modified = False
+
+    def load(self):
+        """
+        Load the records from the cache file; an unusable cache file
+        will simply result in an empty cache.
+        """
+
+        self.records = {}
+        self.digests = {}
+        self.counter = 0
+        if not exists(self.path):
+            return self
+        try:
+            with codecs.open(self.path, encoding='utf8') as fd:
+                data = json.load(fd)
+            if data.get('version') != _CACHE_VERSION:
+                logger.info(
+                    "ignoring cache file '%s' with incompatible version",
+                    self.path,
+                )
+                return self
+            self.records = data['records']
+            self.digests = {
+                r['digest']: k for k, r in self.records.items()}
+            self.counter = max(
+                [r['used'] for r in self.records.values()] or [0])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                "ignoring unusable cache file '%s': %s", self.path, e)
+            self.records = {}
+            self.digests = {}
+        return self
+
+    def _touch(self, record):
+        self.counter += 1
+        record['used'] = self.counter
+        self.modified = True
+
+    def get(self, path, default=None):
+        """
+        Return the value recorded for the file at path, or default if
+        there is no valid record for the file in its current state.
+        """
+
+        key = realpath(path)
+        try:
+            st = stat(key)
+        except OSError:
+            return default
+        record = self.records.get(key)
+        if (record is not None and st.st_size == record['size'] and
+                st.st_mtime == record['mtime']):
+            self._touch(record)
+            return record['value']
+
+        digest = file_digest(key)
+        if record is None or record['digest'] != digest:
+            record = self.records.get(self.digests.get(digest))
+            if record is None or record['size'] != st.st_size:
+                return default
+            self._remove(self.digests[digest])
+        record['mtime'] = st.st_mtime
+        self._insert(key, record)
+        return record['value']
+
+    def _remove(self, key):
+        record = self.records.pop(key)
+        if self.digests.get(record['digest']) == key:
+            del self.digests[record['digest']]
+        self.modified = True
+
+    def _insert(self, key, record):
+        if key in self.records:
+            self._remove(key)
+        self.records[key] = record
+        self.digests[record['digest']] = key
+        self._touch(record)
+
+    def set(self, path, value):
+        """
+        Record the value for the file at path in its current state.
+        """
+
+        key = realpath(path)
+        st = stat(key)
+        self._insert(key, {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'digest': file_digest(key),
+            'value': value,
+        })
+
+    def evict(self):
+        """
+        Evict the least recently used records that exceed max_entries.
+        """
+
+        excess = len(self.records) - self.max_entries
+        if excess <= 0:
+            return
+        stale = sorted(self.records, key=lambda k: self.records[k]['used'])
+        for key in stale[:excess]:
+            self._remove(key)
+        logger.debug(
+            "evicted %d record(s) from cache '%s'", excess, self.path)
+
+    def dump(self):
+        """
+        Write out the records, if modified, to the cache file.
+        """
+
+        if not self.modified:
+            return
+        self.evict()
+        if not isdir(dirname(realpath(self.path))):
+            logger.warning(
+                "cannot write cache file '%s' as its parent directory does "
+                "not exist", self.path,
+            )
+            return
+        dump_json(self.path, {
+            'version': _CACHE_VERSION,
+            'records': self.records,
+        })
+        self.modified = False
+
+
+class BuildManifest(object):
+    """
+    A record of the sources that have been processed into a persistent
+    build directory, grouped by the name of the compile process.  Each
+    record tracks the digest of the source, the target and the source
+    map (as paths relative to the build directory) that were produced
+    from it, along with any other values provided.
+
+    Sources that were not looked up or recorded since the manifest was
+    loaded are considered to be removed, and their targets will be
+    deleted through the prune method.
+    """
+
+    def __init__(self, path, build_dir):
+        self.path = path
+        self.build_dir = build_dir
+        self.records = {}
+        self.seen = set()
+
+    def load(self):
+        """
+        Load the records from the manifest file; an unusable manifest
+        will simply result in a full build.
+        """
+
+        self.records = {}
+        self.seen = set()
+        if not exists(self.path):
+            return self
+        try:
+            with codecs.open(self.path, encoding='utf8') as fd:
+                data = json.load(fd)
+            if data.get('version') != _CACHE_VERSION:
+                logger.info(
+                    "ignoring build manifest '%s' with incompatible version",
+                    self.path,
+                )
+                return self
+            self.records = data['records']
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                "ignoring unusable build manifest '%s': %s", self.path, e)
+            self.records = {}
+        return self
+
+    def _path(self, target):
+        return join(self.build_dir, *target.split('/'))
+
+    def lookup(
+            self, process, source, target, sourcemap=False,
+            passthrough=False, rewriter=None):
+        """
+        Return the record for the source if the source and the outputs
+        are unchanged since it was recorded, otherwise None.  A record
+        of a source that was staged verbatim will not need a sourcemap
+        if passthrough is permitted.  If a rewriter is provided, the
+        record must have been produced by that same rewriter.
+        """
+
+        self.seen.add((process, source))
+        record = self.records.get(process, {}).get(source)
+        if record is None or record['target'] != target:
+            return None
+        if not exists(self._path(target)):
+            return None
+        if rewriter is not None and record.get('rewriter') != rewriter:
+            return None
+        if sourcemap and not (
+                record['sourcemap'] and exists(
+                    self._path(record['sourcemap']))) and not (
+                passthrough and record.get('passthrough')):
+            return None
+        try:
+            if file_digest(source) != record['digest']:
+                return None
+        except (IOError, OSError):
+            return None
+        return record
+
+    def set(self, process, source, target, sourcemap=None, **kw):
+        """
+        Record the source for the process as processed into target.
+        """
+
+        self.seen.add((process, source))
+        record = self.records.setdefault(process, {})[source] = {
+            'digest': file_digest(source),
+            'target': target,
+            'sourcemap': sourcemap,
+        }
+        record.update(kw)
+        return record
+
+    def prune(self):
+        """
+        Remove the records of all the sources that were not seen, along
+        with the files that were produced for them.
+        """
+
+        removed = []
+        for process, records in self.records.items():
+            for source in sorted(records):
+                if (process, source) in self.seen:
+                    continue
+                record = records.pop(source)
+                removed.append(source)
+                for key in ('target', 'sourcemap'):
+                    if not record.get(key):
+                        continue
+                    path = self._path(record[key])
+                    if not realpath(path).startswith(
+                            realpath(self.build_dir)):
+                        continue
+                    if isfile(path):
+                        logger.debug(
+                            "removing '%s' as '%s' was removed", path, source)
+                        remove(path)
+        return removed
+
+    def dump(self):
+        """
+        Write out the records to the manifest file.
+        """
+
+        dump_json(self.path, {
+            'version': _CACHE_VERSION,
+            'records': self.records,
+        })
+
+
+class ArtifactCache(object):
+    """
+    A directory of the files emitted by webpack for artifacts, addressed
+    by the fingerprint of the inputs that produced them.  Each entry is
+    a subdirectory named after the fingerprint that holds a copy of the
+    emitted files, along with a manifest that lists their names relative
+    to the output directory.
+
+    The files are copied by default.  As the files emitted by webpack
+    are staged and then atomically replaced into the output directory
+    by both of the link drivers, they may instead be hard-linked if link
+    is enabled, with copying as the fallback where that fails, such as
+    across filesystems.  Note that anything else modifying the files in
+    the output directory in place will then modify the cached entries.
+    """
+
+    manifest_name = '__calmjs_artifact__.json'
+
+    def __init__(self, path, link=False):
+        self.path = path
+        self.link = link
+
+    def _entry(self, fingerprint):
+        return join(self.path, fingerprint)
+
+    def _link(self, source, target):
+        # hard-link source to a temporary name next to target and then
+        # replace target with it, such that target is replaced atomically,
+        # unless target has identical content; return False if linking
+        # is not enabled or failed.
+        if not self.link or link is None:
+            return False
+        if isfile(target) and getsize(target) == getsize(source) and (
+                file_digest(target) == file_digest(source)):
+            logger.debug("'%s' is unchanged; not replaced", target)
+            return True
+        temp = '%s.%d.tmp' % (target, getpid())
+        try:
+            link(source, temp)
+            replace(temp, target)
+        except (IOError, OSError) as e:
+            logger.debug(
+                "failed to hard-link '%s' to '%s', copying instead: %s",
+                source, target, e,
+            )
+            if exists(temp):
+                remove(temp)
+            return False
+        return True
+
+    def lookup(self, fingerprint):
+        """
+        Return the list of names of the files cached for fingerprint, or
+        None if there is no complete entry for it.
+        """
+
+        entry = self._entry(fingerprint)
+        manifest = join(entry, self.manifest_name)
+        if not isfile(manifest):
+            return None
+        try:
+            with codecs.open(manifest, encoding='utf8') as fd:
+                data = json.load(fd)
+            if data.get('version') != _CACHE_VERSION:
+                return None
+            names = list(data['names'])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(
+                "ignoring unusable artifact cache entry '%s': %s", entry, e)
+            return None
+        if not all(isfile(join(entry, *name.split('/'))) for name in names):
+            return None
+        return names
+
+    def restore(self, fingerprint, output_dir):
+        """
+        Copy (or hard-link, if enabled) the files cached for fingerprint
+        into output_dir, with each file atomically replaced only if its
+        content differs; return the list of the paths restored, or None
+        if there is no entry for the fingerprint.
+        """
+
+        names = self.lookup(fingerprint)
+        if names is None:
+            return None
+        entry = self._entry(fingerprint)
+        restored = []
+        for name in names:
+            target = join(output_dir, *name.split('/'))
+            if not isdir(dirname(target)):
+                makedirs(dirname(target))
+            source = join(entry, *name.split('/'))
+            if not self._link(source, target):
+                with open(source, 'rb') as fd:
+                    write_if_changed(target, fd.read())
+            restored.append(target)
+        return restored
+
+    def store(self, fingerprint, output_dir, names):
+        """
+        Copy (or hard-link, if enabled) the files with the provided names
+        from output_dir into the entry for fingerprint.  Names that refer
+        to locations outside of output_dir or to missing files are
+        skipped.
+        """
+
+        base = realpath(output_dir)
+        names = [
+            name for name in names
+            if realpath(join(base, *name.split('/'))).startswith(
+                join(base, '')) and isfile(join(base, *name.split('/')))
+        ]
+        if not isdir(self.path):
+            makedirs(self.path)
+        # populate a staging directory that is then moved into place, so
+        # that incomplete entries will never be looked up.
+        staging = mkdtemp(dir=self.path)
+        try:
+            for name in names:
+                target = join(staging, *name.split('/'))
+                if not isdir(dirname(target)):
+                    makedirs(dirname(target))
+                source = join(base, *name.split('/'))
+                if not self._link(source, target):
+                    shutil.copyfile(source, target)
+            dump_json(join(staging, self.manifest_name), {
+                'version': _CACHE_VERSION,
+                'names': names,
+            })
+            entry = self._entry(fingerprint)
+            if isdir(entry):
+                shutil.rmtree(entry)
+            rename(staging, entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.debug(
+            "stored %d file(s) in artifact cache entry '%s'",
+            len(names), entry,
+        )
+        return names
+
+
+# the versions of binaries found for this process, keyed by the
+# resolved path to the binary.
+_bin_versions = {}
+
+
+def _bin_stamp(st):
+    return {'ino': st.st_ino, 'size': st.st_size, 'mtime': st.st_mtime}
+
+
+def get_cached_bin_version(bin_path, kw={}, cache_path=None):
+    """
+    Get the version of the binary through calmjs.cli.get_bin_version,
+    but cached for the process using the resolved path of the binary,
+    validated against its inode, size and modification time.  If a
+    cache_path is provided, the versions are also persisted to that
+    file such that subsequent processes may skip the execution of the
+    binary.
+    """
+
+    resolved = which(bin_path, path=kw.get('env', {}).get('PATH'))
+    if resolved is None:
+        # let the underlying function report the failure.
+        return cli.get_bin_version(bin_path, kw=kw)
+    key = realpath(resolved)
+    stamp = _bin_stamp(stat(key))
+
+    record = _bin_versions.get(key)
+    if record is None and cache_path:
+        record = _load_bin_versions(cache_path).get(key)
+    if record is not None and record['stamp'] == stamp:
+        logger.debug(
+            "using cached version '%s' for '%s'",
+            '.'.join(str(i) for i in record['version']), bin_path,
+        )
+        _bin_versions[key] = record
+        return tuple(record['version'])
+
+    version = cli.get_bin_version(bin_path, kw=kw)
+    if version is None:
+        return version
+    _bin_versions[key] = record = {'stamp': stamp, 'version': list(version)}
+    if cache_path:
+        records = _load_bin_versions(cache_path)
+        records[key] = record
+        _dump_bin_versions(cache_path, records)
+    return version
+
+
+def _load_bin_versions(path):
+    if not exists(path):
+        return {}
+    try:
+        with codecs.open(path, encoding='utf8') as fd:
+            data = json.load(fd)
+        if data.get('version') != _CACHE_VERSION:
+            return {}
+        return dict(data['records'])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(
+            "ignoring unusable version cache file '%s': %s", path, e)
+        return {}
+
+
+def _dump_bin_versions(path, records):
+    if not isdir(dirname(realpath(path))):
+        logger.warning(
+            "cannot write version cache file '%s' as its parent directory "
+            "does not exist", path,
+        )
+        return
+    dump_json(path, {
+        'version': _CACHE_VERSION,
+        'records': records,
+    })
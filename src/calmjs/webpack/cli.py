@@ -26,7 +26,27 @@ from calmjs.webpack.base import WEBPACK_OUTPUT_LIBRARY
 from calmjs.webpack.base import WEBPACK_OPTIMIZE_MINIMIZE
 from calmjs.webpack.base import WEBPACK_DEVTOOL
 from calmjs.webpack.base import WEBPACK_MODE
+from calmjs.webpack.base import ARTIFACT_CACHE_DIR
+from calmjs.webpack.base import ARTIFACT_CACHE_LINK
+from calmjs.webpack.base import ARTIFACT_PROBE_CACHE
+from calmjs.webpack.base import CALMJS_ASYNC_LOADER
+from calmjs.webpack.base import CALMJS_LAZY_LOADER
+from calmjs.webpack.base import WEBPACK_SPLIT_CHUNKS
+from calmjs.webpack.base import LOADERPLUGIN_STAGING
+from calmjs.webpack.base import TRANSPILE_PASSTHROUGH
+from calmjs.webpack.base import TRANSPILE_REWRITER
+from calmjs.webpack.base import BUILD_JOBS
+from calmjs.webpack.base import BUILD_REPORT
+from calmjs.webpack.base import INCREMENTAL_BUILD
 from calmjs.webpack.base import VERIFY_IMPORTS
+from calmjs.webpack.base import VERIFY_IMPORTS_CACHE
+from calmjs.webpack.base import VERIFY_IMPORTS_PRESCAN
+from calmjs.webpack.base import WEBPACK_VERSION_CACHE
+from calmjs.webpack.base import WEBPACK_LINK_DRIVER
+from calmjs.webpack.base import WEBPACK_WATCH
+from calmjs.webpack.base import DEFAULT_LINK_DRIVER
+from calmjs.webpack.base import DEFAULT_LOADERPLUGIN_STAGING
+from calmjs.webpack.base import DEFAULT_TRANSPILE_REWRITER
 
 from calmjs.webpack.base import CALMJS_WEBPACK_LOADERPLUGINS
 
@@ -60,6 +80,23 @@ def create_spec(
         webpack_mode=DEFAULT_WEBPACK_MODE,
         webpack_devtool=DEFAULT_WEBPACK_DEVTOOL,
         verify_imports=True,
+        verify_imports_cache=None,
+        verify_imports_prescan=False,
+        build_jobs=1,
+        incremental_build=False,
+        webpack_version_cache=None,
+        webpack_link_driver=DEFAULT_LINK_DRIVER,
+        webpack_watch=False,
+        build_report=False,
+        artifact_cache_dir=None,
+        artifact_cache_link=False,
+        loaderplugin_staging=DEFAULT_LOADERPLUGIN_STAGING,
+        calmjs_lazy_loader=False,
+        webpack_split_chunks=False,
+        calmjs_async_loader=False,
+        transpile_passthrough=False,
+        transpile_rewriter=DEFAULT_TRANSPILE_REWRITER,
+        artifact_probe_cache=None,
         ):
     """
     Produce a spec for the compilation through the WebpackToolchain.
@@ -190,6 +227,164 @@ def create_spec(
         Requires calmjs_compat to be False in order for this argument to
         take effect.
 
+    verify_imports
+        Verify that the imports made by all the source files are
+        satisfied by the modules that are included in the artifact or
+        declared as externals.
+
+        Defaults to True.
+
+    verify_imports_cache
+        The path to a file for caching the names of the imports that
+        are extracted from the source files, such that unchanged files
+        will not need to be parsed again in subsequent builds.
+
+        Defaults to None, which disables the cache.
+
+    verify_imports_prescan
+        Determine the names of the imports of the source files with
+        only simple requires of string literals from a scan of their
+        tokens for the verification of imports, such that they are not
+        parsed again.  Their syntax is only checked by the transpile.
+
+        Defaults to False.
+
+    build_jobs
+        The number of worker processes to use for the transpiling of
+        the source files and the reading of the imports of the source
+        files for their verification.  The transpile is done in the
+        current process if the toolchain has overridden its transpiler.
+
+        Defaults to 1, which does everything in the current process.
+
+    incremental_build
+        Keep a manifest of the processed sources in the build directory,
+        such that the sources that are unchanged since the previous
+        build into the same build directory will not be transpiled or
+        copied again, and that the files produced from sources that are
+        no longer part of the build will be removed.  Requires an
+        explicitly specified build_dir.
+
+        Defaults to False.
+
+    webpack_version_cache
+        The path to a file for caching the version of the webpack binary
+        that was found, such that subsequent builds will not need to run
+        the binary again to find its version.
+
+        Defaults to None, which keeps the version cached only for the
+        current process.
+
+    webpack_link_driver
+        The driver used for invoking webpack to link the artifact;
+        'cli' runs the webpack binary, while 'node' runs a generated
+        driver script that invokes webpack through its node API, which
+        skips the separate execution of webpack for its version and
+        records a structured build result to the spec.
+
+        Defaults to 'cli'.
+
+    webpack_watch
+        Keep webpack running as a watcher after the initial build, with
+        the sources that have changed compiled again into the build
+        directory such that the artifact will be rebuilt by webpack
+        using its existing module graph, until interrupted.
+
+        Defaults to False.
+
+    build_report
+        Write a JSON report with the wall and CPU times spent by each of
+        the phases of the build next to the export target, with the
+        '.report.json' suffix.  The timings are always recorded to the
+        spec.
+
+        Defaults to False.
+
+    artifact_cache_dir
+        The path to a directory for caching the artifacts produced by
+        webpack, addressed by the fingerprint of its inputs, such that
+        subsequent builds with identical inputs will have the artifact
+        copied from the cache without invoking webpack.
+
+        Defaults to None, which disables the cache.
+
+    artifact_cache_link
+        Hard-link the files between the artifact cache and the export
+        target rather than copying them, where possible.  The files at
+        the export target must then not be modified in place, as that
+        will also modify the cached files.
+
+        Defaults to False.
+
+    loaderplugin_staging
+        The strategy for staging the resources handled by the loader
+        plugins, such as templates or data files, into the build
+        directory; one of 'copy', 'hardlink', 'symlink' or 'reference',
+        where the last one has webpack reference the source files in
+        place.  The linking strategies will fall back to copying if the
+        link cannot be created.
+
+        Defaults to 'copy'.
+
+    calmjs_lazy_loader
+        Generate the calmjs loader module such that each exported module
+        is only evaluated when it is first accessed through the calmjs
+        bootstrap module, rather than all of them when the artifact is
+        loaded.  Only has effect if calmjs_compat is enabled.
+
+        Defaults to False.
+
+    webpack_split_chunks
+        Allow webpack to emit the chunks that are loaded on demand as
+        separate files next to the export target, rather than limiting
+        the artifact to a single file.  A manifest of the files for each
+        chunk is emitted alongside the export target, with the suffix
+        '.chunks.json' appended to its name.  With calmjs_compat, the
+        chunks are loaded relative to the location of the artifact.
+
+        Defaults to False.
+
+    calmjs_async_loader
+        Generate the calmjs loader module such that each exported module
+        is placed behind a split point, so that webpack will fetch the
+        chunk for it when it is first required asynchronously, i.e.
+        through the AMD style require with a callback, which is what the
+        dynamic requires with an array are converted to.  The modules
+        will not be available for synchronous requires until they are
+        loaded this way.  Implies webpack_split_chunks, and only has an
+        effect if calmjs_compat is enabled.
+
+        Defaults to False.
+
+    transpile_passthrough
+        Check the source files for dynamic requires before transpiling,
+        such that the ones without any are staged into the build
+        directory verbatim rather than written out again through the
+        unparser, with no source map generated for them.  Only the
+        source files that need their dynamic requires rewritten to use
+        the calmjs loader module will be transpiled.  Every source file
+        is still parsed, such that the invalid ones are never staged.
+
+        Defaults to False.
+
+    transpile_rewriter
+        The rewriter for the dynamic requires in the source files being
+        transpiled; 'unparse' writes out the complete parsed source
+        through the unparser, while 'splice' inserts the calmjs loader
+        into the original source text at the positions of the dynamic
+        requires, with the rest of the text kept as is and a source map
+        that only offsets the columns of the lines affected.
+
+        Defaults to 'unparse'.
+
+    artifact_probe_cache
+        The path to a file for caching the names of the modules exported
+        by the prebuilt artifacts that are probed for the karma test
+        runner, such that unchanged artifacts are not read again for
+        subsequent test runs.
+
+        Defaults to None, which disables the cache.
+
     """
 
     if calmjs_compat and (
@@ -253,6 +448,34 @@ def create_spec(
     spec[WEBPACK_MODE] = webpack_mode
     spec[WEBPACK_DEVTOOL] = webpack_devtool
     spec[VERIFY_IMPORTS] = verify_imports
+    spec[BUILD_JOBS] = build_jobs
+    if incremental_build and not build_dir:
+        logger.warning(
+            "incremental build disabled as no build_dir is specified",
+        )
+    else:
+        spec[INCREMENTAL_BUILD] = incremental_build
+    if verify_imports_cache:
+        spec[VERIFY_IMPORTS_CACHE] = realpath(
+            join(working_dir, verify_imports_cache))
+    spec[VERIFY_IMPORTS_PRESCAN] = verify_imports_prescan
+    spec[WEBPACK_LINK_DRIVER] = webpack_link_driver
+    spec[WEBPACK_WATCH] = webpack_watch
+    spec[BUILD_REPORT] = build_report
+    if artifact_cache_dir:
+        spec[ARTIFACT_CACHE_DIR] = realpath(
+            join(working_dir, artifact_cache_dir))
+    spec[ARTIFACT_CACHE_LINK] = artifact_cache_link
+    spec[LOADERPLUGIN_STAGING] = loaderplugin_staging
+    spec[WEBPACK_SPLIT_CHUNKS] = webpack_split_chunks
+    spec[TRANSPILE_PASSTHROUGH] = transpile_passthrough
+    spec[TRANSPILE_REWRITER] = transpile_rewriter
+    if webpack_version_cache:
+        spec[WEBPACK_VERSION_CACHE] = realpath(
+            join(working_dir, webpack_version_cache))
+    if artifact_probe_cache:
+        spec[ARTIFACT_PROBE_CACHE] = realpath(
+            join(working_dir, artifact_probe_cache))
     spec[CALMJS_LOADERPLUGIN_REGISTRY_NAME] = calmjs_loaderplugin_registry_name
 
     raw_transpile_sourcepaths = generate_transpile_sourcepaths(
@@ -286,6 +509,8 @@ def create_spec(
         # the output library and entry point is forced.
         spec[WEBPACK_OUTPUT_LIBRARY] = DEFAULT_BOOTSTRAP_EXPORT
         spec[WEBPACK_ENTRY_POINT] = DEFAULT_BOOTSTRAP_EXPORT
+        spec[CALMJS_LAZY_LOADER] = calmjs_lazy_loader
+        spec[CALMJS_ASYNC_LOADER] = calmjs_async_loader
         # also specify this as the external to notify the toolchain that
         # the complete passthrough bootstrap module will be required.
         spec[WEBPACK_EXTERNALS] = {
@@ -362,6 +587,23 @@ def compile_all(
         webpack_mode=DEFAULT_WEBPACK_MODE,
         webpack_devtool=DEFAULT_WEBPACK_DEVTOOL,
         verify_imports=True,
+        verify_imports_cache=None,
+        verify_imports_prescan=False,
+        build_jobs=1,
+        incremental_build=False,
+        webpack_version_cache=None,
+        webpack_link_driver=DEFAULT_LINK_DRIVER,
+        webpack_watch=False,
+        build_report=False,
+        artifact_cache_dir=None,
+        artifact_cache_link=False,
+        loaderplugin_staging=DEFAULT_LOADERPLUGIN_STAGING,
+        calmjs_lazy_loader=False,
+        webpack_split_chunks=False,
+        calmjs_async_loader=False,
+        transpile_passthrough=False,
+        transpile_rewriter=DEFAULT_TRANSPILE_REWRITER,
+        artifact_probe_cache=None,
         ):
     """
     Invoke the webpack compiler to generate a JavaScript bundle file for
@@ -399,6 +641,46 @@ def compile_all(
         webpack_mode=webpack_mode,
         webpack_devtool=webpack_devtool,
         verify_imports=verify_imports,
+        verify_imports_cache=verify_imports_cache,
+        verify_imports_prescan=verify_imports_prescan,
+        build_jobs=build_jobs,
+        incremental_build=incremental_build,
+        webpack_version_cache=webpack_version_cache,
+        webpack_link_driver=webpack_link_driver,
+        webpack_watch=webpack_watch,
+        build_report=build_report,
+        artifact_cache_dir=artifact_cache_dir,
+        artifact_cache_link=artifact_cache_link,
+        loaderplugin_staging=loaderplugin_staging,
+        calmjs_lazy_loader=calmjs_lazy_loader,
+        webpack_split_chunks=webpack_split_chunks,
+        calmjs_async_loader=calmjs_async_loader,
+        transpile_passthrough=transpile_passthrough,
+        transpile_rewriter=transpile_rewriter,
+        artifact_probe_cache=artifact_probe_cache,
     )
     toolchain(spec)
     return spec
+
+
+def compile_batch(specs, toolchain=default_toolchain):
+    """
+    Build the artifacts for all the provided specs, such as the ones
+    produced by create_spec, with webpack invoked only once through the
+    node driver for the linking of all of them.
+
+    Arguments:
+
+    specs
+        The list of specs to build.
+
+    toolchain
+        The toolchain instance to use.  Default is the instance in this
+        module.
+
+    Returns the list of the specs that were successfully built; the
+    build result for every spec, including the failed ones, is recorded
+    under the webpack_build_result key of the spec.
+    """
+
+    return toolchain.batch(specs)
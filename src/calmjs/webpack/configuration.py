@@ -20,7 +20,6 @@ from calmjs.parse.asttypes import (
     String,
 )
 from calmjs.parse.factory import AstTypesFactory
-from calmjs.parse.parsers.es5 import Parser
 from calmjs.parse.rules import indent
 from calmjs.parse.ruletypes import (
     Text,
@@ -39,6 +38,7 @@ from calmjs.webpack.interrogation import walker
 from calmjs.webpack.manipulation import (
     inject_array_items_to_object_property_value,
 )
+from calmjs.webpack.parsers import parse
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +68,7 @@ asttypes = AstTypesFactory(
 
 # from calmjs.parse import es5
 def es5(source):
-    return Parser(asttypes=asttypes).parse(source)
+    return parse(source, asttypes=asttypes)
 
 
 def es5_single(text):
@@ -115,11 +115,52 @@ _WEBPACK_4_DISABLE_JSON__MODULE_RULES_ = r"""
 """
 
 # default list of webpack config plugins
-# TODO figure out how to best customize chunking configuration
 _WEBPACK_CONFIG_PLUGINS = """[
     new webpack.optimize.LimitChunkCountPlugin({maxChunks: 1}),
 ]"""
 
+# the suffix added to the output filename for the chunk manifest.
+CHUNK_MANIFEST_SUFFIX = '.chunks.json'
+
+# list of webpack config plugins for when the chunks are split, which
+# emits the manifest of the files for each of the chunks, along with the
+# files for the entry chunk, alongside the artifact.
+_WEBPACK_CONFIG_SPLIT_CHUNKS_PLUGINS = """[
+    {
+        apply: function(compiler) {
+            var emit = function(compilation, callback) {
+                var manifest = {
+                    "entry": [],
+                    "chunks": {}
+                };
+                compilation.chunks.forEach(function(chunk) {
+                    manifest.chunks[chunk.id] = chunk.files.slice();
+                    if (chunk.hasRuntime()) {
+                        manifest.entry = chunk.files.slice();
+                    }
+                });
+                var source = JSON.stringify(manifest, null, 4);
+                compilation.assets[
+                    compilation.outputOptions.filename + %s] = {
+                    source: function() {
+                        return source;
+                    },
+                    size: function() {
+                        return source.length;
+                    }
+                };
+                callback();
+            };
+            if (compiler.hooks) {
+                compiler.hooks.emit.tapAsync('CalmjsChunkManifest', emit);
+            }
+            else {
+                compiler.plugin('emit', emit);
+            }
+        }
+    },
+]""" % dumps(CHUNK_MANIFEST_SUFFIX)
+
 # default list of additional karma plugins
 _WEBPACK_KARMA_CONFIG_PLUGINS = """[
     new KillPlugin(),
@@ -280,6 +321,8 @@ class WebpackConfig(ConfigMapping):
             'plugins': _WebpackConfigPlugins,
             # define specific reserved keys (which will be filtered)
             '__webpack_target__': identity,
+            # enables the splitting of chunks, see finalize_webpack_object
+            '__webpack_split_chunks__': identity,
         }
 
     # TODO spew out warnings for unsupported flags.
@@ -292,6 +335,7 @@ class WebpackConfig(ConfigMapping):
         return finalize_webpack_object(
             webpack_object=super(WebpackConfig, self).es5(),
             version=self.get('__webpack_target__', self.__webpack_target__),
+            split_chunks=self.get('__webpack_split_chunks__', False),
         )
 
     def __str__(self):
@@ -348,7 +392,7 @@ def generate_ast_and_config_node(template, skip=0):
     return ast, config_object_node
 
 
-def finalize_webpack_object(webpack_object, version):
+def finalize_webpack_object(webpack_object, version, split_chunks=False):
     exported_properties = []
     deferred = []
     for property_ in webpack_object.properties:
@@ -363,9 +407,14 @@ def finalize_webpack_object(webpack_object, version):
     for finalize in deferred:
         finalize(webpack_object)
 
+    # unless the chunks are to be split, limit the chunks such that the
+    # artifact is a single file.
     inject_array_items_to_object_property_value(
         webpack_object, asttypes.String('"plugins"'),
-        es5_single(_WEBPACK_CONFIG_PLUGINS),
+        es5_single(
+            _WEBPACK_CONFIG_SPLIT_CHUNKS_PLUGINS if split_chunks else
+            _WEBPACK_CONFIG_PLUGINS
+        ),
     )
 
     return webpack_object
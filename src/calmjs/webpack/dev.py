@@ -18,7 +18,6 @@ from os.path import normpath
 from os.path import pathsep
 
 from calmjs.exc import ToolchainAbort
-from calmjs.cli import get_bin_version
 from calmjs.toolchain import ARTIFACT_PATHS
 from calmjs.toolchain import BUILD_DIR
 from calmjs.toolchain import TEST_MODULE_PATHS_MAP
@@ -41,27 +40,34 @@ except ImportError:  # pragma: no cover
     BEFORE_KARMA = None
     karma = None
 
-from calmjs.parse.parsers.es5 import parse
 from calmjs.parse import asttypes
 from calmjs.parse import io
 from calmjs.interrogate import yield_module_imports_nodes
 
+from calmjs.webpack.base import ARTIFACT_PROBE_CACHE
+from calmjs.webpack.base import BUILD_JOBS
 from calmjs.webpack.base import WEBPACK_MODE
 from calmjs.webpack.base import WEBPACK_DEVTOOL
 from calmjs.webpack.base import WEBPACK_CONFIG
 from calmjs.webpack.base import WEBPACK_MODULE_RULES
 from calmjs.webpack.base import WEBPACK_RESOLVELOADER_ALIAS
 from calmjs.webpack.base import WEBPACK_SINGLE_TEST_BUNDLE
+from calmjs.webpack.base import WEBPACK_VERSION_CACHE
 from calmjs.webpack.base import DEFAULT_WEBPACK_MODE
 from calmjs.webpack.base import DEFAULT_WEBPACK_DEVTOOL
 from calmjs.webpack.base import DEFAULT_CALMJS_EXPORT_NAME
 from calmjs.webpack.base import DEFAULT_BOOTSTRAP_EXPORT_CONFIG
 from calmjs.webpack.base import WebpackModuleLoaderRegistryKey
+from calmjs.webpack.cache import FileRecordCache
+from calmjs.webpack.cache import get_cached_bin_version
 from calmjs.webpack.env import webpack_env
-from calmjs.webpack.interrogation import probe_calmjs_webpack_module_names
+from calmjs.webpack.interrogation import prescan_module_imports
+from calmjs.webpack.interrogation import (
+    probe_all_calmjs_webpack_artifact_module_names)
 from calmjs.webpack.loaderplugin import normalize_and_register_webpackloaders
 from calmjs.webpack.loaderplugin import update_spec_webpack_loaders_modules
 from calmjs.webpack.manipulation import convert_dynamic_require_unparser
+from calmjs.webpack.parsers import parse
 from calmjs.webpack.configuration import KarmaWebpackConfig
 
 logger = logging.getLogger(__name__)
@@ -125,7 +131,13 @@ def _finalize_test_path(toolchain, spec, modname, path):
 
     with codecs.open(path, encoding='utf8') as fd:
         try:
-            tree = io.read(parse, fd)
+            text = fd.read()
+            # only the sources with imports that are not string literals
+            # will need the full parse to find them.
+            if prescan_module_imports(text) is not None:
+                return path
+            tree = parse(text)
+            tree.sourcepath = path
             imports = yield_module_imports_nodes(tree)
         except Exception:
             # can't do anything.
@@ -367,8 +379,9 @@ def karma_webpack(spec, toolchain=None):
     if WEBPACK_CONFIG in spec:
         webpack_config = {
             # filter out the entry as karma-webpack should be taking
-            # caring of that.
-            k: v for k, v in spec.get(WEBPACK_CONFIG).items() if k != 'entry'
+            # caring of that; also keep the tests within a single chunk.
+            k: v for k, v in spec.get(WEBPACK_CONFIG).items()
+            if k not in ('entry', '__webpack_split_chunks__')
         }
         config['webpack'] = webpack_config
     else:
@@ -382,29 +395,39 @@ def karma_webpack(spec, toolchain=None):
         externals.update({
             "__calmjs_loader__": DEFAULT_BOOTSTRAP_EXPORT_CONFIG,
         })
-        for p in spec.get(ARTIFACT_PATHS, ()):
+        cache = None
+        if spec.get(ARTIFACT_PROBE_CACHE):
+            logger.debug(
+                "using '%s' as the artifact probe cache",
+                spec[ARTIFACT_PROBE_CACHE],
+            )
+            cache = FileRecordCache(spec[ARTIFACT_PROBE_CACHE]).load()
+        artifact_paths = list(spec.get(ARTIFACT_PATHS, ()))
+        results = probe_all_calmjs_webpack_artifact_module_names(
+            artifact_paths, jobs=spec.get(BUILD_JOBS) or 1, cache=cache)
+        if cache is not None:
+            cache.dump()
+        for p, module_names in zip(artifact_paths, results):
             logger.debug('processing artifact file %r', p)
-            with codecs.open(p, encoding='utf8') as fd:
-                try:
-                    for module_name in probe_calmjs_webpack_module_names(
-                            parse(fd.read())):
-                        externals[module_name] = {
-                            "root": ["__calmjs__", "modules", module_name],
-                            "amd": ["__calmjs__", "modules", module_name],
-                            "commonjs": [
-                                "global", "__calmjs__", "modules", module_name
-                            ],
-                            "commonjs2": [
-                                "global", "__calmjs__", "modules", module_name
-                            ],
-                        }
-                except TypeError:
-                    logger.warning(
-                        "unable to extract calmjs related exports from "
-                        "provided artifact file '%s'; it does not appear to "
-                        "be generated using calmjs.webpack with the "
-                        "compatible export features enabled", p
-                    )
+            if module_names is None:
+                logger.warning(
+                    "unable to extract calmjs related exports from "
+                    "provided artifact file '%s'; it does not appear to "
+                    "be generated using calmjs.webpack with the "
+                    "compatible export features enabled", p
+                )
+                continue
+            for module_name in module_names:
+                externals[module_name] = {
+                    "root": ["__calmjs__", "modules", module_name],
+                    "amd": ["__calmjs__", "modules", module_name],
+                    "commonjs": [
+                        "global", "__calmjs__", "modules", module_name
+                    ],
+                    "commonjs2": [
+                        "global", "__calmjs__", "modules", module_name
+                    ],
+                }
 
         # generate a barebone webpack config that only contain the tests
         # along with the extracted externals.
@@ -426,12 +449,12 @@ def karma_webpack(spec, toolchain=None):
         if toolchain.webpack_bin_key in spec:
             fake_spec[toolchain.webpack_bin_key] = spec[
                 toolchain.webpack_bin_key]
-        config['webpack']['__webpack_target__'] = get_bin_version(
+        config['webpack']['__webpack_target__'] = get_cached_bin_version(
             toolchain.prepare_binary(fake_spec), kw={
                 'env': webpack_env(pathsep.join(
                     toolchain.find_node_modules_basedir())
                 ),
-            }
+            }, cache_path=spec.get(WEBPACK_VERSION_CACHE),
         )
 
     test_files = _generate_test_files(toolchain, spec)
@@ -5,13 +5,17 @@ that useful information can be extracted from webpack artifacts or input
 source files.
 """
 
+import codecs
+import json
 import logging
+from multiprocessing import Pool
 
 from calmjs.parse.asttypes import Assign
 from calmjs.parse.asttypes import Array
 from calmjs.parse.asttypes import BracketAccessor
 from calmjs.parse.asttypes import Comma
 from calmjs.parse.asttypes import DotAccessor
+from calmjs.parse.asttypes import Elision
 from calmjs.parse.asttypes import FuncExpr
 from calmjs.parse.asttypes import FunctionCall
 from calmjs.parse.asttypes import Number
@@ -19,40 +23,54 @@ from calmjs.parse.asttypes import Object
 from calmjs.parse.asttypes import Return
 from calmjs.parse.asttypes import String
 
+from calmjs.parse.exceptions import ECMASyntaxError
 from calmjs.parse.walkers import Walker
+from calmjs.interrogate import to_str
+
+from calmjs.webpack.cache import file_digest
+from calmjs.webpack.cache import write_if_changed
+from calmjs.webpack.parsers import get_lexer
+from calmjs.webpack.parsers import parse
+from calmjs.webpack.parsers import warm_up
 
 walker = Walker()
 logger = logging.getLogger(__name__)
 
+# the suffix added to the path of an artifact for the manifest of the
+# names of the modules exported by it.
+EXPORT_MANIFEST_SUFFIX = '.modules.json'
+
 
 def probe_calmjs_webpack_module_names(node):
+    return probe_artifact_index_module_names(ArtifactIndex(node))
+
+
+def probe_artifact_index_module_names(index):
     # first, find the initial function expression
-    webpack_wrapper = walker.extract(node, lambda n: isinstance(n, FuncExpr))
+    webpack_wrapper = index.find('wrapper')
+    if webpack_wrapper is None:
+        raise TypeError('no match found')
     # this is the factory argument
     factory_name = webpack_wrapper.parameters[1].value
 
     # first, locate the index number of the entry point (calmjs export
     # module), depending on whether or not the webpack is minified.
-    try:
-        # attempt to verify that this is a factory node
-        verify_factory(webpack_wrapper, factory_name)
-    except TypeError:
+    if index.find('factory') is None:
         # provide a fallback to check for minified/uglified version
-        if factory_name != 'factory':
-            verify_factory_min(webpack_wrapper, factory_name)
-            entry_index = extract_entry_index_min(node)
-        else:
-            raise
+        if factory_name == 'factory' or index.find('factory_min') is None:
+            raise TypeError('no match found')
+        logger.debug('probing module names from uglified artifact')
+        entry_index = index.entry_index('entry_min')
+    elif factory_name != 'factory':
+        logger.debug('probing module names from mangled artifact')
+        entry_index = index.entry_index('entry_mangled')
     else:
-        verify_factory(webpack_wrapper, factory_name)
-        if factory_name != 'factory':
-            entry_index = extract_entry_index_mangled(node)
-        else:
-            entry_index = extract_entry_index(node)
+        logger.debug('probing module names from original artifact')
+        entry_index = index.entry_index('entry')
 
     # now that we have the entry point, extract the index of the module
     # loader module from that
-    entry_module = extract_module(node, entry_index)
+    entry_module = index.module(entry_index)
     try:
         loader_index = extract_loader_index(entry_module)
     except TypeError:
@@ -61,61 +79,530 @@ def probe_calmjs_webpack_module_names(node):
         return []
 
     # this should be the loader module
-    loader_module = extract_module(node, loader_index)
+    loader_module = index.module(loader_index)
     names = extract_exported_calmjs_names(loader_module)
     return names
 
 
-def verify_factory(node, factory_name):
-    return walker.extract(node, lambda n: (
+def write_export_manifest(artifact_path, module_names):
+    """
+    Write the manifest of the names of the modules exported by the
+    artifact at the path, keyed by the digest of that artifact, next to
+    it; return the path written to.
+    """
+
+    path = artifact_path + EXPORT_MANIFEST_SUFFIX
+    write_if_changed(path, json.dumps({
+        'sha256': file_digest(artifact_path),
+        'modules': sorted(module_names),
+    }, indent=4, sort_keys=True))
+    logger.debug("wrote export manifest to '%s'", path)
+    return path
+
+
+def read_export_manifest(artifact_path):
+    """
+    Return the names of the modules exported by the artifact at the path
+    as recorded by its manifest, or None if there is no manifest or it
+    was written for a different version of the artifact.
+    """
+
+    path = artifact_path + EXPORT_MANIFEST_SUFFIX
+    try:
+        with codecs.open(path, encoding='utf8') as fd:
+            manifest = json.load(fd)
+        digest, names = manifest['sha256'], manifest['modules']
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+    if digest != file_digest(artifact_path):
+        logger.debug(
+            "ignoring export manifest '%s' for modified artifact", path)
+        return None
+    return names
+
+
+def probe_calmjs_webpack_artifact_module_names(artifact_path):
+    """
+    Return the names of the modules exported by the artifact at the path
+    from its export manifest if one is valid for it, otherwise through
+    the scanning of the artifact, or otherwise through the probing of
+    the parsed artifact.
+    """
+
+    names = read_export_manifest(artifact_path)
+    if names is not None:
+        logger.debug(
+            "using export manifest for artifact '%s'", artifact_path)
+        return names
+    with codecs.open(artifact_path, encoding='utf8') as fd:
+        text = fd.read()
+    names = scan_calmjs_webpack_module_names(text)
+    if names is not None:
+        return names
+    logger.debug(
+        "layout of artifact '%s' not recognized by the scan; parsing the "
+        "complete artifact", artifact_path)
+    return probe_calmjs_webpack_module_names(parse(text))
+
+
+def _probe_artifact_module_names(artifact_path):
+    # an artifact without compatible exports results in None, as the
+    # result is also recorded into the cache.
+    try:
+        return probe_calmjs_webpack_artifact_module_names(artifact_path)
+    except TypeError:
+        return None
+
+
+def probe_all_calmjs_webpack_artifact_module_names(
+        paths, jobs=1, cache=None):
+    """
+    Return a list with the names of the modules exported by each of the
+    artifacts at the provided paths, in the same order, with None for
+    the artifacts that do not have compatible exports.  If jobs is
+    greater than 1, the artifacts will be probed by a pool of worker
+    processes.  If a FileRecordCache is provided, the artifacts with a
+    valid record will not be probed again, and the results for the
+    others will be recorded to it.
+    """
+
+    missing = object()
+    results = [
+        missing if cache is None else cache.get(path, missing)
+        for path in paths
+    ]
+    pending = [path for path, r in zip(paths, results) if r is missing]
+    jobs = min(jobs, len(pending))
+    if jobs < 2:
+        probed = [_probe_artifact_module_names(path) for path in pending]
+    else:
+        logger.debug(
+            "probing %d artifacts using %d worker processes",
+            len(pending), jobs,
+        )
+        pool = Pool(jobs, initializer=warm_up)
+        try:
+            probed = pool.map(_probe_artifact_module_names, pending)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    if cache is not None:
+        for path, names in zip(pending, probed):
+            cache.set(path, names)
+    probed = iter(probed)
+    return [next(probed) if r is missing else r for r in results]
+
+
+def is_factory_assign(n, factory_name):
+    return (
         isinstance(n, Assign) and
         isinstance(n.left, BracketAccessor) and
-        n.left.expr.value == '"__calmjs__"' and
-        n.right.identifier.value == factory_name
-    ))
+        getattr(n.left.expr, 'value', None) == '"__calmjs__"' and
+        getattr(getattr(n.right, 'identifier', None), 'value', None) ==
+        factory_name
+    )
 
 
-def extract_entry_index(node):
-    logger.debug('probing module names from original artifact')
-    return int(walker.extract(node, lambda n: (
-        isinstance(n, Return) and
-        isinstance(n.expr, FunctionCall) and
-        n.expr.args.items and
-        isinstance(n.expr.args.items[0], Assign) and
-        isinstance(n.expr.args.items[0].right, Number) and
-        n.expr.identifier.value == '__webpack_require__'
-    )).expr.args.items[0].right.value)
+def is_factory_assign_min(n, factory_name):
+    return (
+        isinstance(n, Assign) and
+        isinstance(n.left, DotAccessor) and
+        n.left.identifier.value == '__calmjs__' and
+        getattr(getattr(n.right, 'identifier', None), 'value', None) ==
+        factory_name
+    )
 
 
-def extract_entry_index_mangled(node):
-    logger.debug('probing module names from mangled artifact')
-    return int(walker.extract(node, lambda n: (
+def is_entry_return_mangled(n):
+    return (
         isinstance(n, Return) and
         isinstance(n.expr, FunctionCall) and
-        n.expr.args.items and
+        bool(n.expr.args.items) and
         isinstance(n.expr.args.items[0], Assign) and
         isinstance(n.expr.args.items[0].right, Number)
-    )).expr.args.items[0].right.value)
+    )
 
 
-def verify_factory_min(node, factory_name):
-    return walker.extract(node, lambda n: (
-        isinstance(n, Assign) and
-        isinstance(n.left, DotAccessor) and
-        n.left.identifier.value == '__calmjs__' and
-        n.right.identifier.value == factory_name
-    ))
+def is_entry_return(n):
+    return is_entry_return_mangled(n) and (
+        getattr(n.expr.identifier, 'value', None) == '__webpack_require__')
 
 
-def extract_entry_index_min(node):
-    logger.debug('probing module names from uglified artifact')
-    return int(walker.extract(node, lambda n: (
+def is_entry_return_min(n):
+    return (
         isinstance(n, Return) and
         isinstance(n.expr, Comma) and
         isinstance(n.expr.right, FunctionCall) and
-        n.expr.right.args.items and
-        isinstance(n.expr.right.args.items[0].right, Number)
-    )).expr.right.args.items[0].right.value)
+        bool(n.expr.right.args.items) and
+        isinstance(getattr(n.expr.right.args.items[0], 'right', None), Number)
+    )
+
+
+def is_modules_return(n):
+    return (
+        isinstance(n, Return) and
+        isinstance(n.expr, FunctionCall) and
+        bool(n.expr.args.items) and
+        is_modules_container(n.expr.args.items[0])
+    )
+
+
+class ArtifactIndex(object):
+    """
+    Locate the nodes of a webpack artifact needed for the probing of
+    the names of the modules exported through calmjs, with every one of
+    them being the first match in the order of the walker.  The tree is
+    traversed once, and only as far as needed for the nodes requested
+    so far, with every node visited checked for all the kinds of nodes.
+    The modules are indexed by their module index on first access.
+
+    The kinds of nodes are:
+
+    wrapper
+        The initial function expression, i.e. the umd wrapper.
+    factory, factory_min
+        The assignment of the factory to __calmjs__ within the wrapper,
+        for the original and the uglified artifacts; these are decided
+        once the traversal leaves the wrapper.
+    entry, entry_mangled, entry_min
+        The return statement with the index of the entry module, for
+        the original, mangled and the uglified artifacts.
+    modules_return
+        The return statement with the modules for the bootstrap.
+    """
+
+    def __init__(self, node):
+        self._found = {}
+        self._modules = None
+        self._walker = self._walk(node)
+
+    def _walk(self, node):
+        # the stack of the iterators of the children, along with the
+        # name of the factory within the wrapper.
+        found = self._found
+        stack = [(iter(node), None)]
+        while stack:
+            children, factory_name = stack[-1]
+            for child in children:
+                break
+            else:
+                stack.pop()
+                if factory_name is not None and (
+                        not stack or stack[-1][1] is None):
+                    # the factory is only assigned within the wrapper,
+                    # so whatever is not found by now is absent.
+                    for kind, check in self._assign_checks:
+                        found.setdefault(kind, None)
+                    yield
+                continue
+            if isinstance(child, Return):
+                for kind, check in self._return_checks:
+                    if kind not in found and check(child):
+                        found[kind] = child
+                        yield
+            elif isinstance(child, Assign):
+                if factory_name is not None:
+                    for kind, check in self._assign_checks:
+                        if kind not in found and check(child, factory_name):
+                            found[kind] = child
+                            yield
+            elif isinstance(child, FuncExpr) and 'wrapper' not in found:
+                found['wrapper'] = child
+                parameters = child.parameters
+                factory_name = (
+                    parameters[1].value if len(parameters) > 1 else None)
+                yield
+            stack.append((iter(child), factory_name))
+
+    _assign_checks = (
+        ('factory', is_factory_assign),
+        ('factory_min', is_factory_assign_min),
+    )
+
+    _return_checks = (
+        ('entry', is_entry_return),
+        ('entry_mangled', is_entry_return_mangled),
+        ('entry_min', is_entry_return_min),
+        ('modules_return', is_modules_return),
+    )
+
+    def find(self, kind):
+        """
+        Return the node of the kind, or None if the tree has none.
+        """
+
+        while kind not in self._found:
+            if next(self._walker, False) is False:
+                return None
+        return self._found[kind]
+
+    def entry_index(self, kind):
+        """
+        Return the index of the entry module from the return statement
+        of the kind, being one of entry, entry_mangled or entry_min.
+        """
+
+        node = self.find(kind)
+        if node is None:
+            raise TypeError('no match found')
+        call = node.expr.right if kind == 'entry_min' else node.expr
+        return int(call.args.items[0].right.value)
+
+    @property
+    def modules(self):
+        """
+        The mapping of the module index, as a str, to the module node.
+        """
+
+        if self._modules is None:
+            node = self.find('modules_return')
+            if node is None:
+                raise TypeError('no match found')
+            self._modules = index_modules(node.expr.args.items[0])
+        return self._modules
+
+    def module(self, index):
+        """
+        Return the node of the module at the index.
+        """
+
+        try:
+            return self.modules[str(index)]
+        except KeyError:
+            raise TypeError('could not locate module with index %d' % index)
+
+
+class LayoutNotRecognized(Exception):
+    """
+    The layout of the artifact is not one that may be scanned.
+    """
+
+
+class ScannedArtifactIndex(ArtifactIndex):
+    """
+    An ArtifactIndex for the tree of the artifact with the modules
+    elided from the modules container, with the modules parsed from
+    their spans in the text of the artifact as they are needed.
+    """
+
+    def __init__(self, node, text, spans):
+        super(ScannedArtifactIndex, self).__init__(node)
+        self._text = text
+        self._spans = spans
+
+    def entry_index(self, kind):
+        # as the return statement may still be found within one of the
+        # elided modules.
+        if self.find(kind) is None:
+            raise LayoutNotRecognized('entry return statement not found')
+        return super(ScannedArtifactIndex, self).entry_index(kind)
+
+    @property
+    def modules(self):
+        return {
+            key: self.module(key) for key in self._spans
+        }
+
+    def module(self, index):
+        try:
+            start, end = self._spans[str(index)]
+        except KeyError:
+            raise TypeError('could not locate module with index %d' % index)
+        # the module is the expression within the grouping.
+        return parse('(%s\n)' % self._text[start:end]).children()[0].expr.expr
+
+
+_OPENERS = ('LPAREN', 'LBRACKET', 'LBRACE')
+_CLOSERS = ('RPAREN', 'RBRACKET', 'RBRACE')
+
+
+def _skip_balanced(tokens):
+    # consume the tokens up to and including the one that closes the
+    # opener that was just consumed.
+    depth = 1
+    for token in tokens:
+        if token.type in _OPENERS:
+            depth += 1
+        elif token.type in _CLOSERS:
+            depth -= 1
+            if not depth:
+                return token
+    raise LayoutNotRecognized('unbalanced tokens')
+
+
+def _expect(tokens, type_, value=None):
+    token = next(tokens, None)
+    if token is None or token.type != type_ or (
+            value is not None and token.value != value):
+        raise LayoutNotRecognized('unexpected token %r' % (token,))
+    return token
+
+
+def _scan_modules_return(tokens):
+    # consume the tokens of the return statement with the modules for
+    # the bootstrap, i.e. return (function(modules) {...})(container),
+    # up to and including the opener of the container; return the opener
+    # along with the index of the first module for an array container.
+    for token in tokens:
+        if token.type == 'RETURN':
+            break
+    else:
+        raise LayoutNotRecognized('no return statement after the wrapper')
+    token = next(tokens, None)
+    groupings = 0
+    while token is not None and token.type == 'LPAREN':
+        groupings += 1
+        token = next(tokens, None)
+    if token is None or token.type != 'FUNCTION':
+        raise LayoutNotRecognized('return statement without the bootstrap')
+    for token in tokens:
+        if token.type == 'LBRACE':
+            break
+    _skip_balanced(tokens)
+    for _ in range(groupings):
+        _expect(tokens, 'RPAREN')
+    _expect(tokens, 'LPAREN')
+    token = next(tokens, None)
+    if token is not None and token.type in ('LBRACKET', 'LBRACE'):
+        return token, 0
+    if token is None or token.value != 'Array':
+        raise LayoutNotRecognized('unsupported modules container')
+    _expect(tokens, 'LPAREN')
+    position = int(_expect(tokens, 'NUMBER').value)
+    _expect(tokens, 'RPAREN')
+    _expect(tokens, 'PERIOD')
+    _expect(tokens, 'ID', 'concat')
+    _expect(tokens, 'LPAREN')
+    return _expect(tokens, 'LBRACKET'), position
+
+
+def _scan_modules_container(tokens, opener, position):
+    # consume the tokens of the modules container after the opener,
+    # including its closer; return the closer along with the mapping of
+    # the module index, as a str, to the span of the module in the text
+    # in the same manner as index_modules.
+    keyed = opener.type == 'LBRACE'
+    closer = 'RBRACE' if keyed else 'RBRACKET'
+    spans = {}
+    key = start = None
+    depth = 0
+    for token in tokens:
+        if not depth and token.type in ('COMMA', closer):
+            if start is not None:
+                spans.setdefault(key, (start, token.lexpos))
+            elif key is not None:
+                raise LayoutNotRecognized('property without a value')
+            elif not keyed and token.type == 'COMMA':
+                # a hole for a module that is in another chunk.
+                position += 1
+            key = start = None
+            if token.type == closer:
+                return token, spans
+            continue
+        if not depth and key is None:
+            if not keyed:
+                key = str(position)
+                position += 1
+            elif token.type == 'STRING':
+                key = to_identifier(String(token.value))
+            elif token.type in ('ID', 'NUMBER'):
+                key = token.value
+            else:
+                raise LayoutNotRecognized('unsupported property key')
+            if keyed:
+                _expect(tokens, 'COLON')
+                continue
+        if start is None:
+            start = token.lexpos
+        if token.type in _OPENERS:
+            depth += 1
+        elif token.type in _CLOSERS:
+            depth -= 1
+    raise LayoutNotRecognized('unterminated modules container')
+
+
+def scan_artifact_index(text):
+    """
+    Return a ScannedArtifactIndex for the text of a webpack artifact,
+    through a scan of its tokens for the spans of the modules in the
+    container passed to the webpack bootstrap.  Only the text with the
+    modules elided is parsed, as the modules are only parsed as needed.
+
+    Raise LayoutNotRecognized if the artifact does not have the layout
+    of a webpack artifact with the umd wrapper as generated by webpack
+    and uglified by its optimizations.
+    """
+
+    lexer = get_lexer()
+    lexer.input(text)
+    tokens = iter(lexer.token, None)
+    # the wrapper is the initial function expression.
+    previous = None
+    for token in tokens:
+        if token.type == 'FUNCTION':
+            break
+        previous = token
+    if previous is None or previous.type not in ('LPAREN', 'NOT'):
+        raise LayoutNotRecognized('umd wrapper not found')
+    for token in tokens:
+        if token.type == 'LBRACE':
+            break
+    _skip_balanced(tokens)
+
+    opener, position = _scan_modules_return(tokens)
+    closer, spans = _scan_modules_container(tokens, opener, position)
+    elided = text[:opener.lexpos + 1] + text[closer.lexpos:]
+    index = ScannedArtifactIndex(parse(elided), text, spans)
+    # the tree before the modules container is unchanged, so the same
+    # modules container must be found in the elided tree.
+    node = index.find('modules_return')
+    container = node and node.expr.args.items[0]
+    if isinstance(container, FunctionCall):
+        container = container.args.items[0]
+    if getattr(container, 'lexpos', None) != opener.lexpos:
+        raise LayoutNotRecognized('modules container mismatched')
+    return index
+
+
+def scan_calmjs_webpack_module_names(text):
+    """
+    Return the names of the modules exported by the webpack artifact
+    like probe_calmjs_webpack_module_names, but from its text through
+    scan_artifact_index such that only the needed parts are parsed.
+
+    Return None if the layout of the artifact is not recognized, or if
+    the text could not be parsed, such that the full parse of the text
+    should be done instead for the result or the error.
+    """
+
+    try:
+        return probe_artifact_index_module_names(scan_artifact_index(text))
+    except (LayoutNotRecognized, ECMASyntaxError) as e:
+        logger.debug('unable to scan the artifact: %s', e)
+        return None
+
+
+def verify_factory(node, factory_name):
+    return walker.extract(
+        node, lambda n: is_factory_assign(n, factory_name))
+
+
+def extract_entry_index(node):
+    return ArtifactIndex(node).entry_index('entry')
+
+
+def extract_entry_index_mangled(node):
+    return ArtifactIndex(node).entry_index('entry_mangled')
+
+
+def verify_factory_min(node, factory_name):
+    return walker.extract(
+        node, lambda n: is_factory_assign_min(n, factory_name))
+
+
+def extract_entry_index_min(node):
+    return ArtifactIndex(node).entry_index('entry_min')
 
 
 def extract_loader_index(node):
@@ -128,24 +615,68 @@ def extract_loader_index(node):
         raise TypeError('could not extract a compatible loader index')
 
 
+def is_modules_container(node):
+    # the modules are passed to the webpack bootstrap as an array, which
+    # may be offset through concat for artifacts with multiple chunks,
+    # or as an object keyed by the module index.
+    return isinstance(node, (Array, Object)) or (
+        isinstance(node, FunctionCall) and
+        isinstance(node.identifier, DotAccessor) and
+        isinstance(node.identifier.node, FunctionCall) and
+        node.identifier.node.identifier.value == 'Array' and
+        node.identifier.identifier.value == 'concat' and
+        node.args.items and
+        isinstance(node.args.items[0], Array)
+    )
+
+
+def index_modules(modules):
+    """
+    Return the mapping of the module index, as a str, to the module node
+    for the provided modules container.
+    """
+
+    result = {}
+    if isinstance(modules, Object):
+        for property_ in modules.properties:
+            result.setdefault(to_identifier(property_.left), property_.right)
+        return result
+
+    position = 0
+    if isinstance(modules, FunctionCall):
+        position = int(modules.identifier.node.args.items[0].value)
+        modules = modules.args.items[0]
+    for item in modules.items:
+        if isinstance(item, Elision):
+            # the holes for the modules that are in other chunks.
+            position += int(item.value)
+            continue
+        result[str(position)] = item
+        position += 1
+    return result
+
+
 def extract_module(node, index):
-    return walker.extract(node, lambda n: (
-        isinstance(n, Return) and
-        isinstance(n.expr, FunctionCall) and
-        n.expr.args.items and
-        isinstance(n.expr.args.items[0], Array)
-    )).expr.args.items[0].items[index]
+    return ArtifactIndex(node).module(index)
 
 
 def extract_exported_calmjs_names(module_node):
-    return [to_identifier(p.left) for p in walker.extract(
-        module_node, lambda n: (
-            isinstance(n, Assign) and
-            isinstance(n.left, DotAccessor) and
-            isinstance(n.right, Object) and
-            n.left.identifier.value == 'modules'
-        )
-    ).right.properties]
+    # the names are assigned as the modules, or as the loaders for the
+    # lazy version of the loader module.
+    nodes = list(walker.filter(module_node, lambda n: (
+        isinstance(n, Assign) and
+        isinstance(n.left, DotAccessor) and
+        isinstance(n.right, Object) and
+        n.left.identifier.value in ('modules', 'loaders')
+    )))
+    if not nodes:
+        raise TypeError('could not locate the exported calmjs modules')
+    names = []
+    for node in nodes:
+        for name in (to_identifier(p.left) for p in node.right.properties):
+            if name not in names:
+                names.append(name)
+    return names
 
 
 def to_identifier(node):
@@ -168,3 +699,41 @@ def to_identifier(node):
     else:
         # assume to be an Identifier
         return node.value
+
+
+def prescan_module_imports(text):
+    """
+    Return the list of the names of the modules imported by the ES5
+    source text through a scan of its tokens, for the simple sources
+    where every require is a call with a single string argument and
+    there are no defines, thus also no dynamic requires; the list will
+    be identical to what calmjs.interrogate.yield_module_imports yields
+    for the parsed text.  Return None for every other source, which
+    will need the full parse.
+
+    Note that only the lexical validity of the text is checked here, so
+    the text must still be parsed before it may be treated as valid.
+    """
+
+    lexer = get_lexer()
+    try:
+        lexer.input(text)
+        tokens = list(iter(lexer.token, None))
+    except ECMASyntaxError:
+        return None
+
+    names = []
+    for idx, token in enumerate(tokens):
+        if token.type != 'ID' or token.value not in ('require', 'define'):
+            continue
+        if token.value == 'define':
+            return None
+        # neither an attribute nor a constructor, which will not be
+        # treated as imports.
+        if idx and tokens[idx - 1].type in ('PERIOD', 'NEW'):
+            return None
+        if [t.type for t in tokens[idx + 1:idx + 4]] != [
+                'LPAREN', 'STRING', 'RPAREN']:
+            return None
+        names.append(to_str(tokens[idx + 2]))
+    return names
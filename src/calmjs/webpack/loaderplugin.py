@@ -9,9 +9,13 @@ mapping of named loader plugins to the intended locations.
 import shutil
 import logging
 from os import makedirs
+from os import remove
+from os.path import abspath
 from os.path import dirname
 from os.path import exists
+from os.path import islink
 from os.path import join
+from os.path import realpath
 
 from calmjs.loaderplugin import ModuleLoaderRegistry
 from calmjs.npm import locate_package_entry_file
@@ -21,6 +25,13 @@ from calmjs.webpack.base import WEBPACK_MODULE_RULES
 from calmjs.webpack.base import CALMJS_WEBPACK_MODULE_LOADER_SUFFIX
 from calmjs.webpack.base import CALMJS_WEBPACK_MODNAME_LOADER_MAP
 from calmjs.webpack.base import WebpackModuleLoaderRegistryKey
+from calmjs.webpack.base import LOADERPLUGIN_STAGING
+from calmjs.webpack.base import DEFAULT_LOADERPLUGIN_STAGING
+from calmjs.webpack.base import STAGING_HARDLINK
+from calmjs.webpack.base import STAGING_SYMLINK
+from calmjs.webpack.base import STAGING_REFERENCE
+from calmjs.webpack.base import STAGING_STRATEGIES
+from calmjs.webpack.exc import WebpackRuntimeError
 
 from calmjs.loaderplugin import LoaderPluginRegistry
 from calmjs.loaderplugin import LoaderPluginHandler
@@ -28,6 +39,13 @@ from calmjs.loaderplugin import NPMLoaderPluginHandler
 
 logger = logging.getLogger(__name__)
 
+try:  # pragma: no cover
+    from os import link
+    from os import symlink
+except ImportError:  # pragma: no cover
+    # python 2 on windows; the fallback to copying will be used.
+    link = symlink = None
+
 
 class BaseWebpackLoaderHandler(LoaderPluginHandler):
     """
@@ -38,18 +56,54 @@ class BaseWebpackLoaderHandler(LoaderPluginHandler):
     Subclasses may override the run method for specific purposes.  One
     possible way is to supply the original source file as the target,
     if it is infeasible to be copied (due to size and/or the processing
-    is meant to be done through the specific webpack loader).
+    is meant to be done through the specific webpack loader), which is
+    also what the reference staging strategy does.
     """
 
-    def run(self, toolchain, spec, modname, source, target, modpath):
-        stripped_modname = self.unwrap(modname)
+    def stage(self, toolchain, spec, source, target):
+        """
+        Stage the source file as the target within the build directory
+        using the strategy specified by the spec, and return the target
+        to be used for the aliases.  This is the absolute path to the
+        source file for the reference strategy, and for the hardlink
+        and symlink strategies, copying is the fallback if the link
+        cannot be created.
+        """
+
+        strategy = spec.get(LOADERPLUGIN_STAGING, DEFAULT_LOADERPLUGIN_STAGING)
+        if strategy not in STAGING_STRATEGIES:
+            raise WebpackRuntimeError(
+                "unsupported loaderplugin staging strategy '%s'" % strategy)
+        if strategy == STAGING_REFERENCE:
+            return abspath(source)
+
         copy_target = join(spec[BUILD_DIR], target)
         if not exists(dirname(copy_target)):
             makedirs(dirname(copy_target))
-        # TODO make use of spec/toolchain copy manifest/function,
-        # if/when that is implemented for source/dest tracking?
-        # this may be useful to reduce the amount of data moved around.
+        # a link left by a previous build must be removed, as copying
+        # onto it would have modified the source file.
+        if exists(copy_target) or islink(copy_target):
+            remove(copy_target)
+
+        linker = {
+            STAGING_HARDLINK: link,
+            STAGING_SYMLINK: symlink,
+        }.get(strategy)
+        if linker:
+            try:
+                linker(abspath(source), copy_target)
+                return target
+            except OSError as e:
+                logger.debug(
+                    "cannot %s '%s' to '%s', copying instead: %s",
+                    strategy, source, copy_target, e,
+                )
         shutil.copy(source, copy_target)
+        return target
+
+    def run(self, toolchain, spec, modname, source, target, modpath):
+        stripped_modname = self.unwrap(modname)
+        target = self.stage(toolchain, spec, source, target)
 
         modpaths = {modname: modpath}
         targets = {
@@ -253,6 +307,8 @@ def update_spec_webpack_loaders_modules(spec, alias):
             )
             continue
         spec[WEBPACK_MODULE_RULES].append({
-            'test': targetpath,
+            # webpack matches the rules against the resolved path of the
+            # resource, which is the source file for a symlinked target.
+            'test': realpath(targetpath),
             'loaders': loaders,
         })
@@ -5,6 +5,8 @@ A collection of helpers for manipulating ES5 sources.
 
 from __future__ import unicode_literals
 
+from bisect import bisect_right
+
 from calmjs.parse.asttypes import Array
 from calmjs.parse.asttypes import Assign
 from calmjs.parse.asttypes import DotAccessor
@@ -17,12 +19,14 @@ from calmjs.parse.unparsers.es5 import definitions
 from calmjs.parse.unparsers.base import BaseUnparser
 from calmjs.parse.walkers import ReprWalker
 from calmjs.parse import rules
+from calmjs.parse import sourcemap
+from calmjs.interrogate import yield_module_imports
 
 from calmjs.webpack.base import DEFAULT_CALMJS_EXPORT_NAME
 from calmjs.webpack.interrogation import walker
-from calmjs.webpack.walkers import ReplacementWalker
+from calmjs.webpack.walkers import filter_slots
+from calmjs.webpack.walkers import replace_slots
 
-replacer = ReplacementWalker()
 repr_ = ReprWalker().walk
 
 
@@ -37,18 +41,32 @@ def _non_asttypes_string(arg):
     return True
 
 
+def _is_dynamic_require(n):
+    return bool(
+        isinstance(n, FunctionCall) and
+        isinstance(n.identifier, Identifier) and
+        n.identifier.value == 'require' and
+        n.args.items and _non_asttypes_string(n.args.items[0])
+    )
+
+
 def extract_dynamic_require(node):
     """
     Return require() function calls that have one or more non-static
     arguments (i.e. first argument not String).
     """
 
-    return walker.filter(node, lambda n: (
-        isinstance(n, FunctionCall) and
-        isinstance(n.identifier, Identifier) and
-        n.identifier.value == 'require' and
-        n.args.items and _non_asttypes_string(n.args.items[0])
-    ))
+    return walker.filter(node, _is_dynamic_require)
+
+
+def extract_dynamic_require_slots(node):
+    """
+    Return the slots of the dynamic require() function calls as per
+    extract_dynamic_require, as tuples of the container and key within
+    it that holds the function call, along with the function call.
+    """
+
+    return filter_slots(node, _is_dynamic_require)
 
 
 def create_calmjs_require(node):
@@ -78,11 +96,10 @@ def convert_dynamic_require(tree):
     transformation in-place in the tree.  Also return the tree.
     """
 
-    nodemap = {
-        node: create_calmjs_require(node)
-        for node in extract_dynamic_require(tree)
-    }
-    replacer.replace(tree, nodemap)
+    replace_slots([
+        (container, key, create_calmjs_require(node))
+        for container, key, node in extract_dynamic_require_slots(tree)
+    ])
     return tree
 
 
@@ -95,18 +112,136 @@ def convert_dynamic_require_hook(dispatcher, tree):
     return convert_dynamic_require(tree)
 
 
-def convert_dynamic_require_unparser(indent_str='    '):
+def record_module_imports_hook(mapping):
+    """
+    Return an unparser compatible prewalk hook that will record the
+    names of the modules imported by the tree into the provided mapping,
+    keyed by the sourcepath of the tree.
+    """
+
+    def record_module_imports(dispatcher, tree):
+        mapping[getattr(tree, 'sourcepath', None)] = list(
+            yield_module_imports(tree))
+        return tree
+
+    return record_module_imports
+
+
+def convert_dynamic_require_unparser(indent_str='    ', prewalk_hooks=()):
     """
-    The dynamic require unparser.
+    The dynamic require unparser.  Additional prewalk hooks will be
+    applied after the conversion of the dynamic requires.
     """
 
     return BaseUnparser(
         definitions=definitions,
         rules=(rules.indent(indent_str=indent_str),),
-        prewalk_hooks=(convert_dynamic_require_hook,),
+        prewalk_hooks=(convert_dynamic_require_hook,) + tuple(prewalk_hooks),
     )
 
 
+def splice_dynamic_require(text, tree):
+    """
+    Return the text with the calmjs loader inserted before the dynamic
+    requires found in the tree, which must be the tree parsed from the
+    text, such that the original text is preserved everywhere else,
+    along with the raw mappings for the source map of the result, which
+    map each line to itself with the columns offset by the insertions.
+
+    Raise ValueError if a dynamic require cannot be located in the
+    text at the position recorded for it in the tree.
+    """
+
+    prefix = "require('%s')." % DEFAULT_CALMJS_EXPORT_NAME
+    line_starts = [0]
+    line_starts.extend(
+        idx + 1 for idx, c in enumerate(text) if c == '\n')
+    positions = sorted(
+        node.identifier.lexpos for node in extract_dynamic_require(tree))
+    insertions = {}
+    for pos in positions:
+        if text[pos:pos + 7] != 'require':
+            raise ValueError(
+                "dynamic require not found at position %d" % pos)
+        line = bisect_right(line_starts, pos) - 1
+        insertions.setdefault(line, []).append(pos - line_starts[line])
+
+    chunks = []
+    last = 0
+    for pos in positions:
+        chunks.append(text[last:pos])
+        chunks.append(prefix)
+        last = pos
+    chunks.append(text[last:])
+
+    mappings = []
+    # the source line and column of the previous segment, as they are
+    # relative across lines unlike the generated column.
+    previous = [0, 0]
+    for line, start in enumerate(line_starts):
+        end = (
+            line_starts[line + 1] - 1 if line + 1 < len(line_starts) else
+            len(text)
+        )
+        segments = [(0, 0)] if end > start else []
+        offset = 0
+        for column in insertions.get(line, ()):
+            # the inserted prefix maps to the original require, and the
+            # original text resumes right after it.
+            segments.append((column + offset, column))
+            offset += len(prefix)
+            segments.append((column + offset, column))
+        mapping_line = []
+        generated = 0
+        for gen_column, src_column in segments:
+            if mapping_line and gen_column == generated:
+                continue
+            mapping_line.append([
+                gen_column - generated, 0,
+                line - previous[0], src_column - previous[1],
+            ])
+            generated = gen_column
+            previous = [line, src_column]
+        mappings.append(mapping_line)
+
+    return ''.join(chunks), mappings
+
+
+def write_dynamic_require_spliced(
+        text, tree, output_stream, sourcemap_stream=None):
+    """
+    Write the text with the dynamic requires spliced as per the above
+    function to the output stream, and the source map to the sourcemap
+    stream if provided, with the sourceMappingURL written to the output
+    stream, as done by calmjs.parse.io.write.  The streams may also be
+    callables that produce them, which will be closed after use and
+    only invoked once the splicing succeeded.  The sourcepath of the
+    tree will be the source referenced by the source map.
+    """
+
+    result, mappings = splice_dynamic_require(text, tree)
+    closer = []
+
+    def get_stream(stream):
+        if callable(stream):
+            stream = stream()
+            closer.append(stream.close)
+        return stream
+
+    try:
+        output_stream = get_stream(output_stream)
+        output_stream.write(result)
+        if sourcemap_stream is not None:
+            sourcemap.write_sourcemap(
+                mappings, [getattr(tree, 'sourcepath', None) or
+                           sourcemap.INVALID_SOURCE],
+                [], output_stream, get_stream(sourcemap_stream),
+            )
+    finally:
+        for close in reversed(closer):
+            close()
+
+
 def inject_array_items_to_object_property_value(object_, key, array):
     """
     Inject values specified in the array to the property in the object
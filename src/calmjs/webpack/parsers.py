@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Shared ES5 parsers.
+
+The construction of a calmjs.parse parser builds its lexer and loads the
+parser tables, which costs more than the parsing of a typical source
+file, so a parser is constructed once for each thread and reused, with
+the state of its lexer restored before each use.  The pools of worker
+processes construct theirs through warm_up as each of them starts.
+"""
+
+from __future__ import unicode_literals
+
+import copy
+import threading
+
+from calmjs.parse import asttypes as es5_asttypes
+from calmjs.parse.parsers.es5 import Parser
+
+_local = threading.local()
+# the attributes of the lexer that are not part of the state to restore.
+_LEXER_NON_STATE = ('lexer', 'token', 'error_token_handlers')
+
+
+def _get_entry(asttypes, with_comments):
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    entry = parsers.get((asttypes, with_comments))
+    if entry is None:
+        parser = Parser(asttypes=asttypes, with_comments=with_comments)
+        state = copy.deepcopy({
+            key: value for key, value in vars(parser.lexer).items()
+            if key not in _LEXER_NON_STATE
+        })
+        entry = parsers[(asttypes, with_comments)] = (parser, state)
+    return entry
+
+
+def warm_up(asttypes=es5_asttypes, with_comments=False):
+    """
+    Construct the parser for the current thread ahead of its first use,
+    such as in the initializer of a pool of worker processes.
+    """
+
+    _get_entry(asttypes, with_comments)
+
+
+def get_parser(asttypes=es5_asttypes, with_comments=False):
+    """
+    Return the parser that produces the provided asttypes for the
+    current thread, with the state of its lexer restored such that it
+    may be used for a new source.  The parser must not be used again
+    after another call to this or the other functions in this module.
+    """
+
+    parser, state = _get_entry(asttypes, with_comments)
+    lexer = parser.lexer
+    for key, value in state.items():
+        setattr(lexer, key, copy.deepcopy(value))
+    # the ply lexer does not reset these on input.
+    lexer.lexer.lineno = 1
+    lexer.lexer.lexstatestack = []
+    lexer.lexer.begin('INITIAL')
+    return parser
+
+
+def get_lexer(asttypes=es5_asttypes, with_comments=False):
+    """
+    Return the lexer of the parser provided by get_parser, for the
+    scanning of the tokens of a source without parsing it.
+    """
+
+    return get_parser(asttypes, with_comments).lexer
+
+
+def parse(source, with_comments=False, asttypes=es5_asttypes):
+    """
+    Return an AST from the input ES5 source using the parser for the
+    current thread, as a drop-in replacement for the parse function
+    from calmjs.parse.parsers.es5.
+    """
+
+    return get_parser(asttypes, with_comments).parse(source)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Timing instrumentation and reporting for the builds.
+"""
+
+from __future__ import unicode_literals
+
+import codecs
+import json
+import logging
+from contextlib import contextmanager
+from functools import wraps
+from os import times
+from time import time
+
+from calmjs.toolchain import EXPORT_TARGET
+from calmjs.toolchain import dict_setget_dict
+
+from calmjs.webpack.base import BUILD_TIMINGS
+from calmjs.webpack.base import WEBPACK_BUILD_RESULT
+
+logger = logging.getLogger(__name__)
+
+# the suffix added to the export target for the build report.
+BUILD_REPORT_SUFFIX = '.report.json'
+
+
+def cpu_time():
+    """
+    Return the CPU time used by the current process along with its
+    terminated child processes, such as the webpack process or the
+    workers for the parallel transpile.
+    """
+
+    user, system, children_user, children_system = times()[:4]
+    return user + system + children_user + children_system
+
+
+def add_timing(spec, name, wall, cpu=0.0):
+    """
+    Add the wall and CPU time to the timings recorded under name in the
+    spec, along with the number of times that it was recorded.
+    """
+
+    record = dict_setget_dict(spec, BUILD_TIMINGS).setdefault(
+        name, {'wall': 0.0, 'cpu': 0.0, 'count': 0})
+    record['wall'] += wall
+    record['cpu'] += cpu
+    record['count'] += 1
+
+
+def add_reported_timing(spec, result):
+    """
+    Add the compile time reported by webpack within the build result
+    produced by the node driver, if available.
+    """
+
+    if result and result.get('time') is not None:
+        add_timing(spec, 'link.webpack_compile', result['time'] / 1000.0)
+
+
+@contextmanager
+def record_timing(spec, name):
+    """
+    Add the wall and CPU time spent within the context to the timings
+    recorded under name in the spec.
+    """
+
+    wall, cpu = time(), cpu_time()
+    try:
+        yield
+    finally:
+        add_timing(spec, name, time() - wall, cpu_time() - cpu)
+
+
+def timed(name):
+    """
+    Decorator for toolchain methods that accept the spec as the first
+    argument, such that the timings are recorded under name.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, spec, *a, **kw):
+            with record_timing(spec, name):
+                return method(self, spec, *a, **kw)
+        return wrapper
+    return decorator
+
+
+def write_build_report(spec, path=None):
+    """
+    Write the build report for the spec as JSON, which includes the
+    timings and the webpack build result if available.  Defaults to a
+    file next to the export target; return the path written to.
+    """
+
+    path = path or spec[EXPORT_TARGET] + BUILD_REPORT_SUFFIX
+    with codecs.open(path, 'w', encoding='utf8') as fd:
+        json.dump({
+            'export_target': spec.get(EXPORT_TARGET),
+            'timings': spec.get(BUILD_TIMINGS, {}),
+            'webpack_build_result': spec.get(WEBPACK_BUILD_RESULT),
+        }, fd, indent=4, sort_keys=True)
+    logger.info("wrote build report to '%s'", path)
+    return path
@@ -8,10 +8,34 @@ from calmjs.argparse import metavar
 from calmjs.runtime import SourcePackageToolchainRuntime
 
 from calmjs.webpack.base import CALMJS_COMPAT
+from calmjs.webpack.base import CALMJS_ASYNC_LOADER
+from calmjs.webpack.base import CALMJS_LAZY_LOADER
 from calmjs.webpack.base import DEFAULT_BOOTSTRAP_EXPORT
 from calmjs.webpack.base import WEBPACK_ENTRY_POINT
 from calmjs.webpack.base import WEBPACK_OPTIMIZE_MINIMIZE
+from calmjs.webpack.base import ARTIFACT_CACHE_DIR
+from calmjs.webpack.base import ARTIFACT_CACHE_LINK
+from calmjs.webpack.base import ARTIFACT_PROBE_CACHE
+from calmjs.webpack.base import BUILD_JOBS
+from calmjs.webpack.base import BUILD_REPORT
+from calmjs.webpack.base import INCREMENTAL_BUILD
+from calmjs.webpack.base import LOADERPLUGIN_STAGING
+from calmjs.webpack.base import TRANSPILE_PASSTHROUGH
+from calmjs.webpack.base import TRANSPILE_REWRITER
 from calmjs.webpack.base import VERIFY_IMPORTS
+from calmjs.webpack.base import VERIFY_IMPORTS_CACHE
+from calmjs.webpack.base import VERIFY_IMPORTS_PRESCAN
+from calmjs.webpack.base import WEBPACK_VERSION_CACHE
+from calmjs.webpack.base import WEBPACK_LINK_DRIVER
+from calmjs.webpack.base import WEBPACK_WATCH
+from calmjs.webpack.base import WEBPACK_SPLIT_CHUNKS
+from calmjs.webpack.base import DEFAULT_LINK_DRIVER
+from calmjs.webpack.base import LINK_DRIVER_CLI
+from calmjs.webpack.base import LINK_DRIVER_NODE
+from calmjs.webpack.base import DEFAULT_LOADERPLUGIN_STAGING
+from calmjs.webpack.base import STAGING_STRATEGIES
+from calmjs.webpack.base import DEFAULT_TRANSPILE_REWRITER
+from calmjs.webpack.base import TRANSPILE_REWRITERS
 from calmjs.webpack.dist import extras_calmjs_methods
 from calmjs.webpack.dist import sourcepath_methods_map
 from calmjs.webpack.dist import calmjs_module_registry_methods
@@ -120,6 +144,91 @@ class WebpackRuntime(SourcePackageToolchainRuntime):
             dest=VERIFY_IMPORTS, help=SUPPRESS,
         )
 
+        argparser.add_argument(
+            '--validate-imports-cache', action='store',
+            dest=VERIFY_IMPORTS_CACHE, default=None,
+            metavar=metavar('file'),
+            help="path to a file for caching the names of the imports "
+                 "extracted from the source files during import validation, "
+                 "such that unchanged files are not parsed again for "
+                 "subsequent builds; relative paths are resolved from the "
+                 "working directory",
+        )
+
+        argparser.add_argument(
+            '--validate-imports-prescan', action='store_true',
+            dest=VERIFY_IMPORTS_PRESCAN, default=False,
+            help="determine the imports of the source files that only "
+                 "require string literals from a scan of their tokens for "
+                 "the import validation, rather than parsing them again",
+        )
+
+        argparser.add_argument(
+            '--jobs', action='store', type=int,
+            dest=BUILD_JOBS, default=1, metavar='N',
+            help="the number of worker processes for transpiling the "
+                 "source files and for reading their imports for validation; "
+                 "default: 1",
+        )
+
+        argparser.add_argument(
+            '--incremental', action='store_true',
+            dest=INCREMENTAL_BUILD, default=False,
+            help="skip the source files that are unchanged since the "
+                 "previous build into the same build directory, and remove "
+                 "the outputs of those no longer included; requires "
+                 "--build-dir",
+        )
+
+        argparser.add_argument(
+            '--watch', action='store_true',
+            dest=WEBPACK_WATCH, default=False,
+            help="keep webpack running after the build and compile the "
+                 "changed source files again into the build directory, such "
+                 "that the artifact is rebuilt until interrupted",
+        )
+
+        argparser.add_argument(
+            '--split-chunks', action='store_true',
+            dest=WEBPACK_SPLIT_CHUNKS, default=False,
+            help="emit the chunks that are loaded on demand as separate "
+                 "files next to the export target, along with a manifest "
+                 "of the files for each chunk",
+        )
+
+        argparser.add_argument(
+            '--transpile-passthrough', action='store_true',
+            dest=TRANSPILE_PASSTHROUGH, default=False,
+            help="copy the source files without any dynamic require into "
+                 "the build directory verbatim, such that only the ones that "
+                 "need to be rewritten to use the calmjs loader module are "
+                 "transpiled; no source maps are generated for the copies",
+        )
+
+        argparser.add_argument(
+            '--build-report', action='store_true',
+            dest=BUILD_REPORT, default=False,
+            help="write a JSON report with the time spent by each phase of "
+                 "the build next to the export target",
+        )
+
+        argparser.add_argument(
+            '--artifact-cache-dir', action='store',
+            dest=ARTIFACT_CACHE_DIR, default=None,
+            metavar=metavar('dir'),
+            help="path to a directory for caching the artifacts by the "
+                 "fingerprint of the inputs to webpack, such that webpack is "
+                 "skipped for unchanged inputs; relative paths are resolved "
+                 "from the working directory",
+        )
+
+        argparser.add_argument(
+            '--artifact-cache-link', action='store_true',
+            dest=ARTIFACT_CACHE_LINK, default=False,
+            help="hard-link the files between the artifact cache and the "
+                 "export target rather than copying them, where possible",
+        )
+
     def init_argparser_advanced_options(self, argparser):
         """
         Advanced calmjs webpack specific options.
@@ -136,6 +245,23 @@ class WebpackRuntime(SourcePackageToolchainRuntime):
                  "dynamic imports",
         )
 
+        advanced_options.add_argument(
+            '--calmjs-lazy-loader', action='store_true',
+            dest=CALMJS_LAZY_LOADER, default=False,
+            help="only evaluate the modules exported through the calmjs "
+                 "bootstrap module when they are first required, rather than "
+                 "all of them when the artifact is loaded",
+        )
+
+        advanced_options.add_argument(
+            '--calmjs-async-loader', action='store_true',
+            dest=CALMJS_ASYNC_LOADER, default=False,
+            help="place the modules exported through the calmjs bootstrap "
+                 "module into separate chunks that are fetched when they "
+                 "are first required asynchronously, i.e. through require "
+                 "with an array and a callback; implies --split-chunks",
+        )
+
         advanced_options.add_argument(
             '--webpack-entry-point', action='store',
             dest=WEBPACK_ENTRY_POINT, default=DEFAULT_BOOTSTRAP_EXPORT,
@@ -147,6 +273,56 @@ class WebpackRuntime(SourcePackageToolchainRuntime):
                  "contains all discovered JavaScript modules",
         )
 
+        advanced_options.add_argument(
+            '--webpack-version-cache', action='store',
+            dest=WEBPACK_VERSION_CACHE, default=None,
+            metavar=metavar('file'),
+            help="path to a file for caching the version of the webpack "
+                 "binary, such that subsequent builds do not need to run it "
+                 "again to find the version; relative paths are resolved "
+                 "from the working directory",
+        )
+
+        advanced_options.add_argument(
+            '--artifact-probe-cache', action='store',
+            dest=ARTIFACT_PROBE_CACHE, default=None,
+            metavar=metavar('file'),
+            help="path to a file for caching the names of the modules "
+                 "exported by the prebuilt artifacts that are probed for "
+                 "testing, such that unchanged artifacts are not read again; "
+                 "relative paths are resolved from the working directory",
+        )
+
+        advanced_options.add_argument(
+            '--webpack-link-driver', action='store',
+            dest=WEBPACK_LINK_DRIVER, default=DEFAULT_LINK_DRIVER,
+            choices=(LINK_DRIVER_CLI, LINK_DRIVER_NODE),
+            help="the driver for invoking webpack to link the artifact; "
+                 "'node' invokes webpack through its node API with a "
+                 "generated driver script; default: %s" % DEFAULT_LINK_DRIVER,
+        )
+
+        advanced_options.add_argument(
+            '--loaderplugin-staging', action='store',
+            dest=LOADERPLUGIN_STAGING, default=DEFAULT_LOADERPLUGIN_STAGING,
+            choices=STAGING_STRATEGIES,
+            help="the strategy for staging the resources handled by the "
+                 "loader plugins into the build directory; 'reference' has "
+                 "webpack use the source files in place; "
+                 "default: %s" % DEFAULT_LOADERPLUGIN_STAGING,
+        )
+
+        advanced_options.add_argument(
+            '--transpile-rewriter', action='store',
+            dest=TRANSPILE_REWRITER, default=DEFAULT_TRANSPILE_REWRITER,
+            choices=TRANSPILE_REWRITERS,
+            help="the rewriter for the dynamic requires in the source files "
+                 "being transpiled; 'splice' inserts the calmjs loader into "
+                 "the original source text rather than writing out the "
+                 "whole source through the unparser; "
+                 "default: %s" % DEFAULT_TRANSPILE_REWRITER,
+        )
+
     def create_spec(
             self, source_package_names=(), export_target=None,
             working_dir=None,
@@ -158,6 +334,23 @@ class WebpackRuntime(SourcePackageToolchainRuntime):
             webpack_entry_point=DEFAULT_BOOTSTRAP_EXPORT,
             webpack_optimize_minimize=False,
             verify_imports=True,
+            verify_imports_cache=None,
+            verify_imports_prescan=False,
+            build_jobs=1,
+            incremental_build=False,
+            webpack_version_cache=None,
+            webpack_link_driver=DEFAULT_LINK_DRIVER,
+            webpack_watch=False,
+            build_report=False,
+            artifact_cache_dir=None,
+            artifact_cache_link=False,
+            loaderplugin_staging=DEFAULT_LOADERPLUGIN_STAGING,
+            calmjs_lazy_loader=False,
+            webpack_split_chunks=False,
+            calmjs_async_loader=False,
+            transpile_passthrough=False,
+            transpile_rewriter=DEFAULT_TRANSPILE_REWRITER,
+            artifact_probe_cache=None,
             toolchain=None, **kwargs):
         """
         Accept all arguments, but also the explicit set of arguments
@@ -179,6 +372,23 @@ class WebpackRuntime(SourcePackageToolchainRuntime):
             webpack_entry_point=webpack_entry_point,
             webpack_optimize_minimize=webpack_optimize_minimize,
             verify_imports=verify_imports,
+            verify_imports_cache=verify_imports_cache,
+            verify_imports_prescan=verify_imports_prescan,
+            build_jobs=build_jobs,
+            incremental_build=incremental_build,
+            webpack_version_cache=webpack_version_cache,
+            webpack_link_driver=webpack_link_driver,
+            webpack_watch=webpack_watch,
+            build_report=build_report,
+            artifact_cache_dir=artifact_cache_dir,
+            artifact_cache_link=artifact_cache_link,
+            loaderplugin_staging=loaderplugin_staging,
+            calmjs_lazy_loader=calmjs_lazy_loader,
+            webpack_split_chunks=webpack_split_chunks,
+            calmjs_async_loader=calmjs_async_loader,
+            transpile_passthrough=transpile_passthrough,
+            transpile_rewriter=transpile_rewriter,
+            artifact_probe_cache=artifact_probe_cache,
         )
 
 
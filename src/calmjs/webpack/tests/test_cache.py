@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unittest
+import os
+import json
+from codecs import open
+from os.path import join
+
+from calmjs.utils import pretty_logging
+from calmjs.testing import mocks
+from calmjs.testing import utils
+
+from calmjs.webpack import cache as cache_module
+from calmjs.webpack.cache import ArtifactCache
+from calmjs.webpack.cache import BuildManifest
+from calmjs.webpack.cache import FileRecordCache
+from calmjs.webpack.cache import dump_json
+from calmjs.webpack.cache import file_digest
+from calmjs.webpack.cache import get_cached_bin_version
+from calmjs.webpack.cache import write_if_changed
+
+
+def write(path, content):
+    with open(path, 'w', encoding='utf8') as fd:
+        fd.write(content)
+
+
+class FileDigestTestCase(unittest.TestCase):
+
+    def test_file_digest(self):
+        tmpdir = utils.mkdtemp(self)
+        write(join(tmpdir, 'a.js'), 'var a = 1;')
+        write(join(tmpdir, 'b.js'), 'var a = 1;')
+        write(join(tmpdir, 'c.js'), 'var a = 2;')
+        self.assertEqual(
+            file_digest(join(tmpdir, 'a.js')),
+            file_digest(join(tmpdir, 'b.js')),
+        )
+        self.assertNotEqual(
+            file_digest(join(tmpdir, 'a.js')),
+            file_digest(join(tmpdir, 'c.js')),
+        )
+
+
+class WriteIfChangedTestCase(unittest.TestCase):
+
+    def test_write_if_changed(self):
+        tmpdir = utils.mkdtemp(self)
+        target = join(tmpdir, 'a.js')
+        self.assertTrue(write_if_changed(target, 'var a = 1;'))
+        os.utime(target, (0, 0))
+        self.assertFalse(write_if_changed(target, 'var a = 1;'))
+        self.assertFalse(write_if_changed(target, b'var a = 1;'))
+        self.assertEqual(0, os.stat(target).st_mtime)
+
+        self.assertTrue(write_if_changed(target, 'var a = 2;'))
+        self.assertNotEqual(0, os.stat(target).st_mtime)
+        with open(target, encoding='utf8') as fd:
+            self.assertEqual('var a = 2;', fd.read())
+        self.assertEqual(['a.js'], os.listdir(tmpdir))
+
+    def test_dump_json(self):
+        tmpdir = utils.mkdtemp(self)
+        target = join(tmpdir, 'a.json')
+        self.assertTrue(dump_json(target, {'b': 1, 'a': [2]}))
+        self.assertFalse(dump_json(target, {'a': [2], 'b': 1}))
+        with open(target) as fd:
+            self.assertEqual({'a': [2], 'b': 1}, json.load(fd))
+
+    def test_cache_dump_unchanged(self):
+        # the caches are written through write_if_changed.
+        tmpdir = utils.mkdtemp(self)
+        path = join(tmpdir, 'cache.json')
+        source = join(tmpdir, 'a.js')
+        with open(source, 'w') as fd:
+            fd.write('var a = 1;')
+        records = FileRecordCache(path)
+        records.set(source, ['a'])
+        records.dump()
+        os.utime(path, (0, 0))
+        records.modified = True
+        records.dump()
+        self.assertEqual(0, os.stat(path).st_mtime)
+        self.assertEqual(['a.js', 'cache.json'], sorted(os.listdir(tmpdir)))
+
+
+class FileRecordCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = utils.mkdtemp(self)
+        self.cache_path = join(self.tmpdir, 'cache.json')
+
+    def test_get_set_missing(self):
+        cache = FileRecordCache(self.cache_path).load()
+        self.assertIsNone(cache.get(join(self.tmpdir, 'missing.js')))
+        self.assertEqual(
+            'x', cache.get(join(self.tmpdir, 'missing.js'), 'x'))
+
+    def test_persisted(self):
+        target = join(self.tmpdir, 'a.js')
+        write(target, "require('a');")
+        cache = FileRecordCache(self.cache_path).load()
+        self.assertIsNone(cache.get(target))
+        cache.set(target, ['a'])
+        self.assertEqual(['a'], cache.get(target))
+        cache.dump()
+        self.assertFalse(cache.modified)
+
+        cache = FileRecordCache(self.cache_path).load()
+        self.assertEqual(['a'], cache.get(target))
+
+    def test_changed_contents(self):
+        target = join(self.tmpdir, 'a.js')
+        write(target, "require('a');")
+        cache = FileRecordCache(self.cache_path).load()
+        cache.set(target, ['a'])
+        write(target, "require('b');")
+        # ensure the timestamp is different
+        os.utime(target, (0, 0))
+        self.assertIsNone(cache.get(target))
+
+    def test_touched_contents(self):
+        target = join(self.tmpdir, 'a.js')
+        write(target, "require('a');")
+        cache = FileRecordCache(self.cache_path).load()
+        cache.set(target, ['a'])
+        os.utime(target, (0, 0))
+        self.assertEqual(['a'], cache.get(target))
+
+    def test_identical_contents_moved(self):
+        first = utils.mkdtemp(self)
+        second = utils.mkdtemp(self)
+        write(join(first, 'a.js'), "require('a');")
+        write(join(second, 'a.js'), "require('a');")
+        cache = FileRecordCache(self.cache_path).load()
+        cache.set(join(first, 'a.js'), ['a'])
+        cache.dump()
+
+        cache = FileRecordCache(self.cache_path).load()
+        self.assertEqual(['a'], cache.get(join(second, 'a.js')))
+        self.assertEqual(1, len(cache.records))
+
+    def test_eviction(self):
+        cache = FileRecordCache(self.cache_path, max_entries=2).load()
+        for name in ('a', 'b', 'c'):
+            target = join(self.tmpdir, name + '.js')
+            write(target, 'require(%s);' % json.dumps(name))
+            cache.set(target, [name])
+        # use the oldest one so it will be retained.
+        self.assertEqual(['a'], cache.get(join(self.tmpdir, 'a.js')))
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            cache.dump()
+        self.assertIn('evicted 1 record(s)', s.getvalue())
+
+        cache = FileRecordCache(self.cache_path).load()
+        self.assertEqual(['a'], cache.get(join(self.tmpdir, 'a.js')))
+        self.assertIsNone(cache.get(join(self.tmpdir, 'b.js')))
+        self.assertEqual(['c'], cache.get(join(self.tmpdir, 'c.js')))
+
+    def test_load_unusable(self):
+        write(self.cache_path, '{')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            cache = FileRecordCache(self.cache_path).load()
+        self.assertIn('ignoring unusable cache file', s.getvalue())
+        self.assertEqual({}, cache.records)
+
+    def test_load_incompatible_version(self):
+        write(self.cache_path, '{"version": 0, "records": {}}')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            cache = FileRecordCache(self.cache_path).load()
+        self.assertIn('incompatible version', s.getvalue())
+        self.assertEqual({}, cache.records)
+
+    def test_dump_missing_dir(self):
+        target = join(self.tmpdir, 'a.js')
+        write(target, "require('a');")
+        cache = FileRecordCache(join(self.tmpdir, 'no', 'cache.json'))
+        cache.set(target, ['a'])
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            cache.dump()
+        self.assertIn('parent directory does not exist', s.getvalue())
+
+
+class BuildManifestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.src_dir = utils.mkdtemp(self)
+        self.build_dir = utils.mkdtemp(self)
+        self.manifest_path = join(self.build_dir, 'manifest.json')
+        self.source = join(self.src_dir, 'a.js')
+        write(self.source, "require('a');")
+        write(join(self.build_dir, 'a.js'), "require('a');")
+
+    def test_lookup_set(self):
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        self.assertIsNone(manifest.lookup('p', self.source, 'a.js'))
+        manifest.set('p', self.source, 'a.js', imports=['a'])
+        manifest.dump()
+
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        self.assertEqual(
+            ['a'], manifest.lookup('p', self.source, 'a.js')['imports'])
+        # different target, process or missing source map.
+        self.assertIsNone(manifest.lookup('p', self.source, 'b.js'))
+        self.assertIsNone(manifest.lookup('q', self.source, 'a.js'))
+        self.assertIsNone(
+            manifest.lookup('p', self.source, 'a.js', sourcemap=True))
+
+    def test_lookup_rewriter(self):
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        manifest.set('p', self.source, 'a.js', rewriter='unparse')
+        self.assertIsNotNone(manifest.lookup('p', self.source, 'a.js'))
+        self.assertIsNotNone(
+            manifest.lookup('p', self.source, 'a.js', rewriter='unparse'))
+        self.assertIsNone(
+            manifest.lookup('p', self.source, 'a.js', rewriter='splice'))
+        # records without the rewriter are stale for any rewriter.
+        manifest.set('p', self.source, 'a.js')
+        self.assertIsNone(
+            manifest.lookup('p', self.source, 'a.js', rewriter='unparse'))
+
+    def test_lookup_changed(self):
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        manifest.set('p', self.source, 'a.js')
+        write(self.source, "require('b');")
+        self.assertIsNone(manifest.lookup('p', self.source, 'a.js'))
+        os.remove(self.source)
+        self.assertIsNone(manifest.lookup('p', self.source, 'a.js'))
+
+    def test_prune(self):
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        manifest.set('p', self.source, 'a.js')
+        # a target outside of the build directory is never removed.
+        outside = join(self.src_dir, 'b.js')
+        write(outside, '')
+        manifest.set('p', outside, '../' + os.path.basename(
+            self.src_dir) + '/b.js')
+        manifest.dump()
+
+        manifest = BuildManifest(self.manifest_path, self.build_dir).load()
+        self.assertEqual(sorted([self.source, outside]), manifest.prune())
+        self.assertFalse(os.path.exists(join(self.build_dir, 'a.js')))
+        self.assertTrue(os.path.exists(outside))
+        self.assertEqual({'p': {}}, manifest.records)
+
+    def test_load_unusable(self):
+        write(self.manifest_path, '[]')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            manifest = BuildManifest(
+                self.manifest_path, self.build_dir).load()
+        self.assertIn('ignoring unusable build manifest', s.getvalue())
+        self.assertEqual({}, manifest.records)
+
+
+class CachedBinVersionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = utils.mkdtemp(self)
+        self.bin_path = join(self.tmpdir, 'webpack')
+        write(self.bin_path, '')
+        os.chmod(self.bin_path, 0o755)
+        self.calls = []
+
+        def get_bin_version(bin_path, kw={}):
+            self.calls.append(bin_path)
+            return (4, 0, 0)
+
+        utils.stub_item_attr_value(self, cache_module, '_bin_versions', {})
+        utils.stub_item_attr_value(
+            self, cache_module.cli, 'get_bin_version', get_bin_version)
+
+    def test_cached_in_process(self):
+        self.assertEqual((4, 0, 0), get_cached_bin_version(self.bin_path))
+        self.assertEqual((4, 0, 0), get_cached_bin_version(self.bin_path))
+        self.assertEqual([self.bin_path], self.calls)
+
+    def test_binary_changed(self):
+        get_cached_bin_version(self.bin_path)
+        write(self.bin_path, 'changed')
+        get_cached_bin_version(self.bin_path)
+        self.assertEqual(2, len(self.calls))
+
+    def test_binary_missing(self):
+        missing = join(self.tmpdir, 'missing')
+        get_cached_bin_version(missing)
+        get_cached_bin_version(missing)
+        self.assertEqual([missing, missing], self.calls)
+
+    def test_persisted(self):
+        cache_path = join(self.tmpdir, 'versions.json')
+        get_cached_bin_version(self.bin_path, cache_path=cache_path)
+        # simulate a new process
+        cache_module._bin_versions.clear()
+        self.assertEqual((4, 0, 0), get_cached_bin_version(
+            self.bin_path, cache_path=cache_path))
+        self.assertEqual(1, len(self.calls))
+
+    def test_persisted_unusable(self):
+        cache_path = join(self.tmpdir, 'versions.json')
+        write(cache_path, '{')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            self.assertEqual((4, 0, 0), get_cached_bin_version(
+                self.bin_path, cache_path=cache_path))
+        self.assertIn('ignoring unusable version cache file', s.getvalue())
+        with open(cache_path, encoding='utf8') as fd:
+            self.assertEqual(1, len(json.load(fd)['records']))
+
+
+class ArtifactCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = utils.mkdtemp(self)
+        self.cache_dir = join(utils.mkdtemp(self), 'artifacts')
+        write(join(self.output_dir, 'bundle.js'), 'var bundle = 1;')
+        write(join(self.output_dir, 'bundle.js.map'), '{}')
+
+    def test_store_restore(self):
+        cache = ArtifactCache(self.cache_dir)
+        self.assertIsNone(cache.lookup('abc'))
+        self.assertIsNone(cache.restore('abc', self.output_dir))
+        self.assertEqual(['bundle.js', 'bundle.js.map'], cache.store(
+            'abc', self.output_dir,
+            ['bundle.js', 'bundle.js.map', 'missing.js', '../bundle.js'],
+        ))
+        self.assertEqual(
+            ['bundle.js', 'bundle.js.map'], cache.lookup('abc'))
+
+        target_dir = utils.mkdtemp(self)
+        self.assertEqual([
+            join(target_dir, 'bundle.js'), join(target_dir, 'bundle.js.map'),
+        ], cache.restore('abc', target_dir))
+        with open(join(target_dir, 'bundle.js'), encoding='utf8') as fd:
+            self.assertEqual('var bundle = 1;', fd.read())
+
+        # identical files are left untouched when restored again.
+        os.utime(join(target_dir, 'bundle.js'), (0, 0))
+        cache.restore('abc', target_dir)
+        self.assertEqual(0, os.stat(join(target_dir, 'bundle.js')).st_mtime)
+
+        # storing again replaces the entry.
+        cache.store('abc', self.output_dir, ['bundle.js'])
+        self.assertEqual(['bundle.js'], cache.lookup('abc'))
+
+    def test_store_restore_link(self):
+        cache = ArtifactCache(self.cache_dir, link=True)
+        cache.store('abc', self.output_dir, ['bundle.js', 'bundle.js.map'])
+        source = join(self.output_dir, 'bundle.js')
+        cached = join(self.cache_dir, 'abc', 'bundle.js')
+        self.assertTrue(os.path.samefile(source, cached))
+
+        target_dir = utils.mkdtemp(self)
+        target = join(target_dir, 'bundle.js')
+        write(target, 'var bundle = 0;')
+        cache.restore('abc', target_dir)
+        self.assertTrue(os.path.samefile(cached, target))
+        # replacing the restored file leaves the cached one untouched.
+        write_if_changed(target, 'var bundle = 2;')
+        with open(cached, encoding='utf8') as fd:
+            self.assertEqual('var bundle = 1;', fd.read())
+
+        # identical files are left untouched.
+        write(target, 'var bundle = 1;')
+        os.utime(target, (0, 0))
+        cache.restore('abc', target_dir)
+        self.assertFalse(os.path.samefile(cached, target))
+        self.assertEqual(0, os.stat(target).st_mtime)
+
+    def test_store_link_failure(self):
+        def link(source, target):
+            raise OSError('cross-device link')
+
+        utils.stub_item_attr_value(self, cache_module, 'link', link)
+        cache = ArtifactCache(self.cache_dir, link=True)
+        cache.store('abc', self.output_dir, ['bundle.js'])
+        cached = join(self.cache_dir, 'abc', 'bundle.js')
+        self.assertFalse(os.path.samefile(
+            join(self.output_dir, 'bundle.js'), cached))
+        with open(cached, encoding='utf8') as fd:
+            self.assertEqual('var bundle = 1;', fd.read())
+
+    def test_lookup_incomplete(self):
+        cache = ArtifactCache(self.cache_dir)
+        cache.store('abc', self.output_dir, ['bundle.js'])
+        os.remove(join(self.cache_dir, 'abc', 'bundle.js'))
+        self.assertIsNone(cache.lookup('abc'))
+
+    def test_lookup_unusable(self):
+        cache = ArtifactCache(self.cache_dir)
+        cache.store('abc', self.output_dir, ['bundle.js'])
+        write(join(self.cache_dir, 'abc', cache.manifest_name), '{')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            self.assertIsNone(cache.lookup('abc'))
+        self.assertIn('ignoring unusable artifact cache entry', s.getvalue())
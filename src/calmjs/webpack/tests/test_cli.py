@@ -8,6 +8,8 @@ from calmjs.utils import pretty_logging
 
 from calmjs.webpack.cli import create_spec
 from calmjs.webpack.cli import compile_all
+from calmjs.webpack.runtime import WebpackRuntime
+from calmjs.webpack.toolchain import WebpackToolchain
 
 from calmjs.testing.mocks import StringIO
 from calmjs.testing.utils import remember_cwd
@@ -43,6 +45,75 @@ class CliTestCase(unittest.TestCase):
         self.assertIn('webpack_externals', spec)
         self.assertEqual(spec['webpack_output_library'], '__calmjs__')
 
+    def test_create_spec_calmjs_lazy_loader(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], calmjs_lazy_loader=True)
+        self.assertTrue(spec['calmjs_lazy_loader'])
+
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec(
+                [], calmjs_compat=False, calmjs_lazy_loader=True)
+        self.assertNotIn('calmjs_lazy_loader', spec)
+
+    def test_create_spec_split_chunks(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], webpack_split_chunks=True)
+        self.assertTrue(spec['webpack_split_chunks'])
+
+    def test_create_spec_calmjs_async_loader(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], calmjs_async_loader=True)
+        self.assertTrue(spec['calmjs_async_loader'])
+
+    def test_create_spec_transpile_passthrough(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], transpile_passthrough=True)
+        self.assertTrue(spec['transpile_passthrough'])
+
+    def test_create_spec_verify_imports_prescan(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([])
+        self.assertFalse(spec['verify_imports_prescan'])
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], verify_imports_prescan=True)
+        self.assertTrue(spec['verify_imports_prescan'])
+
+    def test_create_spec_transpile_rewriter(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([])
+        self.assertEqual('unparse', spec['transpile_rewriter'])
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], transpile_rewriter='splice')
+        self.assertEqual('splice', spec['transpile_rewriter'])
+
+    def test_create_spec_artifact_cache_link(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([])
+        self.assertFalse(spec['artifact_cache_link'])
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], artifact_cache_link=True)
+        self.assertTrue(spec['artifact_cache_link'])
+
+    def test_create_spec_artifact_probe_cache(self):
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([])
+        self.assertNotIn('artifact_probe_cache', spec)
+        with pretty_logging(stream=StringIO()):
+            spec = create_spec([], artifact_probe_cache='probe.json')
+        self.assertEqual(
+            join(os.path.realpath(self.cwd), 'probe.json'),
+            spec['artifact_probe_cache'])
+
+    def test_runtime_artifact_probe_cache(self):
+        runtime = WebpackRuntime(WebpackToolchain())
+        args = runtime.argparser.parse_args([
+            'example.package', '--artifact-probe-cache', 'probe.json'])
+        with pretty_logging(stream=StringIO()):
+            spec = runtime.create_spec(**vars(args))
+        self.assertEqual(
+            join(os.path.realpath(self.cwd), 'probe.json'),
+            spec['artifact_probe_cache'])
+
     def test_create_spec_empty_calmjs_compat_disable(self):
         with pretty_logging(stream=StringIO()) as stream:
             spec = create_spec([], calmjs_compat=False)
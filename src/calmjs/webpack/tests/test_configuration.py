@@ -171,6 +171,18 @@ class WebpackConfigObjectTestCase(unittest.TestCase):
         module.exports = webpackConfig;
         """).lstrip(), str(config))
 
+    def test_split_chunks(self):
+        config = configuration.WebpackConfig(
+            __webpack_split_chunks__=True, output={'filename': 'bundle.js'})
+        self.assertEqual(
+            '{"output": {"filename": "bundle.js"}}', config.json())
+        result = str(config)
+        # the chunks are no longer limited, and the manifest is emitted.
+        self.assertNotIn('LimitChunkCountPlugin', result)
+        self.assertIn('CalmjsChunkManifest', result)
+        self.assertIn(
+            'compilation.outputOptions.filename + ".chunks.json"', result)
+
     def test_base_config_plugins(self):
         config = configuration.WebpackConfig({
             'mode': 'production',
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 import unittest
 from os.path import dirname
 from os.path import join
@@ -268,7 +269,8 @@ class KarmaTestcase(unittest.TestCase):
         # create the required mocks and stubs so that toolchain finds
         # a webpack version
         stub_item_attr_value(
-            self, dev, 'get_bin_version', lambda p, kw: (1, 0, 0))
+            self, dev, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (1, 0, 0))
         webpack = join(mkdtemp(self), 'webpack')
         with open(webpack, 'w'):
             pass
@@ -373,3 +375,32 @@ class KarmaTestcase(unittest.TestCase):
         log = s.getvalue()
         self.assertIn("unable to extract calmjs related exports from", log)
         self.assertIn(fake_artifact, log)
+
+    def test_karma_setup_artifact_probe_cache(self):
+        karma_config = karma.build_base_config()
+        src_dir = mkdtemp(self)
+        fake_artifact = join(src_dir, 'fake_artifact.js')
+        with open(fake_artifact, 'w') as fd:
+            fd.write('(function(root, factory) { factory() })')
+            fd.write('(this, function() {});')
+        cache_path = join(src_dir, 'probe_cache.json')
+
+        for _ in range(2):
+            spec = Spec(
+                karma_config=karma_config,
+                build_dir=mkdtemp(self),
+                test_module_paths_map={},
+                artifact_paths=[fake_artifact],
+                artifact_probe_cache=cache_path,
+                toolchain_bin_path=self.setup_fake_webpack(),
+            )
+            with pretty_logging(stream=StringIO()) as s:
+                karma_webpack(spec)
+            # the result is still reported when taken from the cache.
+            self.assertIn(
+                "unable to extract calmjs related exports from",
+                s.getvalue())
+
+        with open(cache_path) as fd:
+            records = json.load(fd)['records']
+        self.assertEqual([None], [r['value'] for r in records.values()])
@@ -8,7 +8,10 @@ from pkg_resources import resource_filename
 
 from calmjs.parse.parsers.es5 import parse
 from calmjs.parse.asttypes import Object
+from calmjs.interrogate import yield_module_imports
+from calmjs.testing import utils
 from calmjs.webpack import interrogation
+from calmjs.webpack.cache import FileRecordCache
 
 
 def read(p):
@@ -67,6 +70,209 @@ class WebpackTestCase(unittest.TestCase):
             'example/package/math',
         ], interrogation.probe_calmjs_webpack_module_names(mangled))
 
+    def test_probe_lazy_loader_module_names(self):
+        # as produced by the lazy version of the loader module.
+        lazy = parse(read(join(_root, '4.16', 'example_package.js')).replace(
+            'exports.modules = {\n', 'exports.modules = {};\n'
+            'var loaders = exports.loaders = {\n',
+        ).replace(
+            ': __webpack_require__(3)',
+            ': function() { return __webpack_require__(3); }',
+        ))
+        self.assertEqual([
+            'example/package/bad',
+            'example/package/main',
+            'example/package/math',
+        ], interrogation.probe_calmjs_webpack_module_names(lazy))
+
+    def test_probe_async_loader_module_names(self):
+        # as produced by the asynchronous version of the loader module.
+        lazy = parse(read(join(_root, '4.16', 'example_package.js')).replace(
+            'exports.modules = {\n', 'exports.modules = {};\n'
+            'var loaders = exports.loaders = {\n',
+        ).replace(
+            ': __webpack_require__(3)',
+            ': function(f) { __webpack_require__.e(1).then(function() { '
+            'f(__webpack_require__(3)); }); }',
+        ))
+        self.assertEqual([
+            'example/package/bad',
+            'example/package/main',
+            'example/package/math',
+        ], interrogation.probe_calmjs_webpack_module_names(lazy))
+
+    def test_extract_module_containers(self):
+        # the various forms of the modules passed to the bootstrap for
+        # the artifacts with multiple chunks.
+        for source in (
+                'return (function(modules) {})([a, , , b]);',
+                'return (function(modules) {})({0: a, 3: b});',
+                'return (function(modules) {})({"0": a, "3": b});',
+                'return (function(modules) {})(Array(3).concat([b]));'):
+            node = parse('(function() {\n%s\n})();' % source)
+            self.assertEqual(
+                'b', interrogation.extract_module(node, 3).value, source)
+            with self.assertRaises(TypeError):
+                interrogation.extract_module(node, 4)
+
+    def test_artifact_index(self):
+        for v in _versions:
+            index = interrogation.ArtifactIndex(parse(read(
+                join(_root, v, 'example_package.js'))))
+            # the absent factory is decided without the remaining nodes
+            self.assertIsNone(index.find('factory_min'))
+            self.assertNotIn('modules_return', index._found)
+            self.assertIsNotNone(index.find('factory'))
+            self.assertIs(index.modules, index.modules)
+            self.assertIs(
+                index.modules[str(index.entry_index('entry'))],
+                index.module(index.entry_index('entry')),
+            )
+            with self.assertRaises(TypeError):
+                index.module(len(index.modules) + 1)
+            with self.assertRaises(TypeError):
+                index.entry_index('entry_min')
+
+    def test_probe_artifact_export_manifest(self):
+        tmpdir = utils.mkdtemp(self)
+        artifact = join(tmpdir, 'example_package.js')
+        with codecs.open(artifact, 'w', encoding='utf8') as fd:
+            fd.write(read(join(_root, '4.16', 'example_package.js')))
+        names = [
+            'example/package/bad',
+            'example/package/main',
+            'example/package/math',
+        ]
+        self.assertIsNone(interrogation.read_export_manifest(artifact))
+        self.assertEqual(names, sorted(
+            interrogation.probe_calmjs_webpack_artifact_module_names(
+                artifact)))
+
+        # the manifest takes precedence over the probing.
+        manifest = interrogation.write_export_manifest(
+            artifact, ['example/package/main'])
+        self.assertEqual(artifact + '.modules.json', manifest)
+        self.assertEqual(
+            ['example/package/main'],
+            interrogation.probe_calmjs_webpack_artifact_module_names(
+                artifact))
+
+        # but not for an artifact modified since.
+        with open(artifact, 'a') as fd:
+            fd.write('\n')
+        self.assertIsNone(interrogation.read_export_manifest(artifact))
+        self.assertEqual(names, sorted(
+            interrogation.probe_calmjs_webpack_artifact_module_names(
+                artifact)))
+
+        with open(manifest, 'w') as fd:
+            fd.write('{')
+        self.assertIsNone(interrogation.read_export_manifest(artifact))
+
+    def test_scan_calmjs_webpack_module_names(self):
+        # the scan has the same result as the probe of the parsed tree
+        # for the original, mangled and uglified artifacts.
+        for path in [join(_root, v, f) for v in _versions for f in (
+                'example_package.js',
+                'example_package.min.js',
+                'example_package.extras.js',
+                'example_package.extras.min.js',
+                )] + [
+                join(_root, 'example_package.mangled.js'),
+                join(_root, 'empty_package.js'),
+                ]:
+            text = read(path)
+            self.assertEqual(
+                interrogation.probe_calmjs_webpack_module_names(parse(text)),
+                interrogation.scan_calmjs_webpack_module_names(text),
+                path,
+            )
+            with self.assertRaises(TypeError):
+                interrogation.scan_calmjs_webpack_module_names(
+                    text.replace('__calmjs__', '__not_calmjs__'))
+
+    def test_scan_calmjs_webpack_module_names_unrecognized(self):
+        # the layouts that need the full parse for the result.
+        for text in (
+                read(join(_root, 'typical_names.js')),
+                'function wrapper(root, factory) {}',
+                '(function(root, factory) {})(this, function() {\n'
+                'return (function(modules) {})(Array(3).concat(a)); });',
+                read(join(_root, '4.16', 'example_package.js')).replace(
+                    '__webpack_require__.s = ', '__webpack_require__.s = a + '
+                ),
+                '(function(root, factory) {})(this, function() {\n'
+                'return (function(modules) {})([; });'):
+            self.assertIsNone(
+                interrogation.scan_calmjs_webpack_module_names(text))
+
+    def test_scan_artifact_index_containers(self):
+        for source in (
+                '[a, , , b]',
+                '[, a, , b, ]',
+                '{0: a, 3: b}',
+                '{"0": a, "3": b, "3": c}',
+                'Array(3).concat([b])'):
+            index = interrogation.scan_artifact_index(
+                '(function(root, factory) {})(this, function() {\n'
+                'return (function(modules) {})(%s); });' % source)
+            self.assertEqual('b', index.module(3).value, source)
+            self.assertEqual(
+                sorted(interrogation.ArtifactIndex(parse(
+                    '(function() {\nreturn (function(modules) {})(%s);\n'
+                    '})();' % source)).modules),
+                sorted(index.modules),
+                source,
+            )
+            with self.assertRaises(TypeError):
+                index.module(4)
+
+    def test_probe_all_artifact_module_names(self):
+        tmpdir = utils.mkdtemp(self)
+        paths = []
+        for name, text in (
+                ('base.js', read(join(_root, '4.16', 'example_package.js'))),
+                ('empty.js', read(join(_root, 'empty_package.js'))),
+                ('other.js', read(join(_root, 'typical_names.js'))),
+                ('min.js', read(join(
+                    _root, '4.16', 'example_package.min.js')))):
+            paths.append(join(tmpdir, name))
+            with codecs.open(paths[-1], 'w', encoding='utf8') as fd:
+                fd.write(text)
+        names = [
+            'example/package/bad',
+            'example/package/main',
+            'example/package/math',
+        ]
+        expected = [names, [], None, names]
+        self.assertEqual(expected, [
+            r if r is None else sorted(r) for r in
+            interrogation.probe_all_calmjs_webpack_artifact_module_names(
+                paths)])
+        self.assertEqual(
+            expected,
+            [r if r is None else sorted(r) for r in
+             interrogation.probe_all_calmjs_webpack_artifact_module_names(
+                 paths, jobs=2)])
+
+        cache = FileRecordCache(join(tmpdir, 'cache.json'))
+        results = (
+            interrogation.probe_all_calmjs_webpack_artifact_module_names(
+                paths, cache=cache))
+        cache.dump()
+        self.assertEqual(4, len(cache.records))
+
+        # the artifacts with a record are no longer probed.
+        def probe(path):
+            raise AssertionError('%s probed' % path)
+
+        utils.stub_item_attr_value(
+            self, interrogation, '_probe_artifact_module_names', probe)
+        self.assertEqual(
+            results,
+            interrogation.probe_all_calmjs_webpack_artifact_module_names(
+                paths, cache=FileRecordCache(cache.path).load()))
+
     def test_probe_failure(self):
         # simply TypeError is raised
         for v in _versions:
@@ -102,3 +308,65 @@ class WebpackTestCase(unittest.TestCase):
                 _unusual_names, lambda node: isinstance(node, Object)))):
             self.assertEqual(
                 a, interrogation.to_identifier(r.properties[0].left))
+
+
+# the corpus for the prescan, with whether the scan is expected to have
+# decided the result.
+_prescan_corpus = [
+    ("", True),
+    ("var a = 1;", True),
+    ("// require('commented')\nvar a = '/* require(\\'s\\') */';", True),
+    ("var a = require('a'), b = require(\"b\");", True),
+    ("var a = require  (\n  'a' /* x */ );", True),
+    ("var a = require('a\\'b\\x41\\u0042');", True),
+    ("var a = require('a\\\nb');", True),
+    ("require('a'); require('a'); require('b')('c');", True),
+    ("f(function() { require('b'); }, require('c'), x / require('d'));", True),
+    ("var re = /require('regex')/g, d = 4 / 2 / require('e');", True),
+    ("x ? require('t') : require('f');", True),
+    ("for (var k in require('obj')) { require(k + 'x'); }", False),
+    ("var a = require(dynamic);", False),
+    ("var a = require('a' + b);", False),
+    ("var a = require('a', 'b');", False),
+    ("var a = require();", False),
+    ("var a = require;", False),
+    ("var a = x.require('a');", False),
+    ("var a = new require('a');", False),
+    ("var a = (require)('a');", False),
+    ("var o = {require: 1, 'define': 2};", False),
+    ("require(['a', 'b'], function(a, b) {});", False),
+    ("define(['require', 'a'], function(require, a) {});", False),
+    ("define('name', ['a'], function(a) { return require('b'); });", False),
+    ("var a = require('a') @ 1;", False),
+    ("var a = 1 @ 2;", False),
+]
+
+
+class PrescanTestCase(unittest.TestCase):
+
+    def assertPrescanMatches(self, text):
+        result = interrogation.prescan_module_imports(text)
+        if result is not None:
+            self.assertEqual(
+                list(yield_module_imports(parse(text))), result, text)
+        return result
+
+    def test_prescan_corpus(self):
+        for text, decided in _prescan_corpus:
+            if '@' in text:
+                # lexically invalid, so left to the parser.
+                self.assertIsNone(
+                    interrogation.prescan_module_imports(text))
+                continue
+            result = self.assertPrescanMatches(text)
+            self.assertEqual(decided, result is not None, text)
+
+    def test_prescan_examples(self):
+        self.assertEqual([], self.assertPrescanMatches(
+            read(join(_root, 'typical_names.js'))))
+        # the umd wrappers of the artifacts are not simple.
+        self.assertIsNone(self.assertPrescanMatches(
+            read(join(_root, 'empty_package.js'))))
+        for version in _versions:
+            for name in ('example_package.js', 'example_package.min.js'):
+                self.assertPrescanMatches(read(join(_root, version, name)))
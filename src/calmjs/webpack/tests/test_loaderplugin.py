@@ -126,6 +126,75 @@ class WebpackLoaderPluginTestCase(unittest.TestCase):
         self.assertEqual(
             ['text!some.file.txt'], export_module_names)
 
+    def call_staged(self, strategy):
+        srcfile = join(mkdtemp(self), 'some.file.txt')
+        spec = Spec(build_dir=mkdtemp(self), loaderplugin_staging=strategy)
+        toolchain = Toolchain()
+        with open(srcfile, 'w') as fd:
+            fd.write('hello world')
+
+        reg = LoaderPluginRegistry('calmjs.webpack.loaders')
+        text = loaderplugin.WebpackLoaderHandler(reg, 'text')
+        modpaths, targets, export_module_names = text(
+            toolchain, spec,
+            'text!some.file.txt', srcfile, 'some.file.txt',
+            'text!some.file.txt'
+        )
+        return srcfile, join(spec['build_dir'], 'some.file.txt'), targets
+
+    def test_call_staging_copy(self):
+        srcfile, target, targets = self.call_staged('copy')
+        self.assertEqual('some.file.txt', targets['some.file.txt'])
+        self.assertFalse(os.path.samefile(srcfile, target))
+
+    @unittest.skipIf(not hasattr(os, 'link'), 'hardlinks unsupported')
+    def test_call_staging_hardlink(self):
+        srcfile, target, targets = self.call_staged('hardlink')
+        self.assertEqual('some.file.txt', targets['some.file.txt'])
+        self.assertTrue(os.path.samefile(srcfile, target))
+        self.assertFalse(os.path.islink(target))
+
+    @unittest.skipIf(not hasattr(os, 'symlink'), 'symlinks unsupported')
+    def test_call_staging_symlink(self):
+        srcfile, target, targets = self.call_staged('symlink')
+        self.assertEqual('some.file.txt', targets['some.file.txt'])
+        self.assertTrue(os.path.islink(target))
+
+    def test_call_staging_reference(self):
+        srcfile, target, targets = self.call_staged('reference')
+        self.assertEqual({
+            'some.file.txt': srcfile,
+            './some.file.txt': srcfile,
+        }, targets)
+        self.assertFalse(exists(target))
+
+    def test_call_staging_unsupported(self):
+        with self.assertRaises(RuntimeError) as e:
+            self.call_staged('teleport')
+        self.assertEqual(
+            "unsupported loaderplugin staging strategy 'teleport'",
+            str(e.exception))
+
+    @unittest.skipIf(not hasattr(os, 'link'), 'hardlinks unsupported')
+    def test_call_staging_copy_over_link(self):
+        # copying over the link from a previous build must not modify
+        # the source file.
+        srcfile = join(mkdtemp(self), 'some.file.txt')
+        spec = Spec(build_dir=mkdtemp(self), loaderplugin_staging='hardlink')
+        with open(srcfile, 'w') as fd:
+            fd.write('hello world')
+        reg = LoaderPluginRegistry('calmjs.webpack.loaders')
+        text = loaderplugin.WebpackLoaderHandler(reg, 'text')
+        text.stage(Toolchain(), spec, srcfile, 'some.file.txt')
+        spec['loaderplugin_staging'] = 'copy'
+        text.stage(Toolchain(), spec, srcfile, 'some.file.txt')
+        target = join(spec['build_dir'], 'some.file.txt')
+        self.assertFalse(os.path.samefile(srcfile, target))
+        with open(target, 'w') as fd:
+            fd.write('changed')
+        with open(srcfile) as fd:
+            self.assertEqual('hello world', fd.read())
+
     def test_call_loader_chaining(self):
         srcfile = join(mkdtemp(self), 'some.css')
         spec = Spec(build_dir=mkdtemp(self))
@@ -322,6 +391,28 @@ class PluginLoaderUtilityTestCase(unittest.TestCase):
             'loaders': ['style', 'css'],
         }], spec['webpack_module_rules'])
 
+    @unittest.skipIf(not hasattr(os, 'symlink'), 'symlinks unsupported')
+    def test_update_spec_webpack_loaders_modules_symlink(self):
+        srcfile = join(mkdtemp(self), 'some.file.txt')
+        target = join(mkdtemp(self), 'some.file.txt')
+        with open(srcfile, 'w') as fd:
+            fd.write('hello world')
+        os.symlink(srcfile, target)
+        spec = Spec(
+            calmjs_webpack_modname_loader_map={
+                'some.file.txt': ['text'],
+            },
+        )
+        alias = {
+            'some.file.txt': target,
+        }
+        update_spec_webpack_loaders_modules(spec, alias)
+        # the rule must match the path webpack resolves the symlink to.
+        self.assertEqual([{
+            'test': os.path.realpath(srcfile),
+            'loaders': ['text'],
+        }], spec['webpack_module_rules'])
+
     def test_update_spec_webpack_loaders_modules_missing_alias(self):
         spec = Spec(
             calmjs_webpack_modname_loader_map={
@@ -17,6 +17,9 @@ from calmjs.webpack.manipulation import (
     convert_dynamic_require,
     convert_dynamic_require_unparser,
     inject_array_items_to_object_property_value,
+    record_module_imports_hook,
+    splice_dynamic_require,
+    write_dynamic_require_spliced,
 )
 
 
@@ -243,6 +246,85 @@ class UnparserTestCase(unittest.TestCase):
             'version': 3,
         }, json.loads(srcmap.getvalue()))
 
+    def test_record_module_imports_hook(self):
+        imports = {}
+        unparser = convert_dynamic_require_unparser(prewalk_hooks=(
+            record_module_imports_hook(imports),
+        ))
+        original = StringIO(textwrap.dedent("""
+        var static_module = require('static');
+        var dynamic_module = require(dynamic);
+        """).lstrip())
+        original.name = 'source.js'
+        output = StringIO()
+        io.write(unparser, io.read(es5, original), output)
+        # the dynamic require is converted before the imports recorded.
+        self.assertEqual({
+            'source.js': ['static', '__calmjs_loader__'],
+        }, imports)
+
+
+class SpliceTestCase(unittest.TestCase):
+    """
+    Using the splice version.
+    """
+
+    def readwrite(self, source):
+        tree = es5(source)
+        tree.sourcepath = 'source.js'
+        output = StringIO()
+        output.name = 'output.js'
+        srcmap = StringIO()
+        srcmap.name = 'output.js.map'
+        write_dynamic_require_spliced(source, tree, output, srcmap)
+        return output, srcmap
+
+    def test_splice_static(self):
+        source = "require('static')  ;\n\n  var a=1\n"
+        self.assertEqual(
+            (source, [[[0, 0, 0, 0]], [], [[0, 0, 2, 0]], []]),
+            splice_dynamic_require(source, es5(source)),
+        )
+
+    def test_splice_dynamic(self):
+        output, srcmap = self.readwrite(
+            "require(['jQuery'], function($) {\n"
+            "    var m = require(dynamic),o=require(d2);\n"
+            "});\n"
+        )
+        # the original formatting is preserved.
+        self.assertEqual(
+            "require(['jQuery'], function($) {\n"
+            "    var m = require('__calmjs_loader__').require(dynamic),"
+            "o=require('__calmjs_loader__').require(d2);\n"
+            "});\n"
+            "\n"
+            "//# sourceMappingURL=output.js.map\n", output.getvalue())
+        self.assertEqual({
+            'file': 'output.js',
+            'mappings': 'AAAA;AACA,YAAY,6BAAA,mBAAmB,6BAAA;AAC/B;',
+            'names': [],
+            'sources': ['source.js'],
+            'version': 3,
+        }, json.loads(srcmap.getvalue()))
+
+    def test_splice_no_sourcemap(self):
+        output = StringIO()
+        source = "require(dynamic);"
+        write_dynamic_require_spliced(source, es5(source), output)
+        self.assertEqual(
+            "require('__calmjs_loader__').require(dynamic);",
+            output.getvalue())
+
+    def test_splice_mismatched_text(self):
+        source = "require(dynamic);"
+        streams = []
+        with self.assertRaises(ValueError):
+            write_dynamic_require_spliced(
+                '\n' + source, es5(source), lambda: streams.append(1))
+        # the output stream is never produced.
+        self.assertEqual([], streams)
+
 
 class InjectArrayTestCase(unittest.TestCase):
     # only test supported usage cases; there are _many_ unsupported
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unittest
+from threading import Thread
+
+from calmjs.parse.exceptions import ECMASyntaxError
+from calmjs.parse.parsers.es5 import parse as es5
+from calmjs.parse.walkers import ReprWalker
+
+from calmjs.webpack import parsers
+from calmjs.webpack.configuration import asttypes
+
+repr_ = ReprWalker().walk
+
+
+class ParsersTestCase(unittest.TestCase):
+
+    def assertSameParse(self, source):
+        self.assertEqual(
+            repr_(es5(source), pos=True),
+            repr_(parsers.parse(source), pos=True),
+        )
+
+    def test_parser_reused(self):
+        parser = parsers.get_parser()
+        self.assertIs(parser, parsers.get_parser())
+        self.assertIsNot(parser, parsers.get_parser(asttypes))
+
+    def test_warm_up(self):
+        results = []
+
+        def target():
+            parsers.warm_up()
+            results.append(dict(parsers._local.parsers))
+            results.append(parsers.get_parser())
+
+        thread = Thread(target=target)
+        thread.start()
+        thread.join()
+        entries, parser = results
+        self.assertEqual([(parsers.es5_asttypes, False)], list(entries))
+        self.assertIs(parser, entries[(parsers.es5_asttypes, False)][0])
+
+    def test_parse_with_comments(self):
+        source = "// leading\nvar a = 1; /* trailing */\nb;\n"
+        self.assertIsNot(
+            parsers.get_parser(), parsers.get_parser(with_comments=True))
+        for with_comments in (True, False, True):
+            expected = es5(source, with_comments=with_comments)
+            tree = parsers.parse(source, with_comments=with_comments)
+            self.assertEqual(repr_(expected, pos=True), repr_(tree, pos=True))
+            self.assertEqual(
+                [str(node.comments) for node in expected.children()],
+                [str(node.comments) for node in tree.children()],
+            )
+        self.assertEqual('// leading', str(tree.children()[0].comments))
+
+    def test_parser_per_thread(self):
+        results = []
+        thread = Thread(target=lambda: results.append(parsers.get_parser()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(results[0], parsers.get_parser())
+
+    def test_parse_positions_reset(self):
+        source = "var a = 1;\nrequire(x);\n"
+        self.assertSameParse(source)
+        self.assertSameParse(source)
+        tree = parsers.parse(source)
+        node = tree.children()[1].expr
+        self.assertEqual((2, 1, 11), (node.lineno, node.colno, node.lexpos))
+
+    def test_parse_after_error(self):
+        with self.assertRaises(ECMASyntaxError):
+            parsers.parse("var a = (\n/")
+        # the lexer must not be left in the state from the error, or
+        # the previous token affecting the detection of regex.
+        self.assertSameParse("/a/.test(b);\n")
+        self.assertSameParse("a\n/b/g;\n")
+
+    def test_lexer_reset(self):
+        lexer = parsers.get_lexer()
+        lexer.input("a;\nb;")
+        self.assertEqual(['a', ';', 'b', ';'], [
+            token.value for token in iter(lexer.token, None)])
+        lexer = parsers.get_lexer()
+        lexer.input("/a/;")
+        token = lexer.token()
+        self.assertEqual(('REGEX', 1), (token.type, token.lineno))
+        # the parser is usable again after the lexer was used.
+        self.assertSameParse("a;\nb;")
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unittest
+import json
+from codecs import open
+from os.path import join
+
+from calmjs.toolchain import Spec
+from calmjs.testing import utils
+
+from calmjs.webpack import report
+
+
+class DummyToolchain(object):
+
+    @report.timed('dummy')
+    def step(self, spec, value):
+        return value
+
+
+class ReportTestCase(unittest.TestCase):
+
+    def test_record_timing(self):
+        spec = Spec()
+        with report.record_timing(spec, 'step'):
+            pass
+        with self.assertRaises(ValueError):
+            with report.record_timing(spec, 'step'):
+                raise ValueError('failure')
+        self.assertEqual(2, spec['build_timings']['step']['count'])
+        self.assertGreaterEqual(spec['build_timings']['step']['wall'], 0)
+        self.assertGreaterEqual(spec['build_timings']['step']['cpu'], 0)
+
+    def test_timed(self):
+        spec = Spec()
+        self.assertEqual(1, DummyToolchain().step(spec, 1))
+        self.assertEqual(1, spec['build_timings']['dummy']['count'])
+
+    def test_add_reported_timing(self):
+        spec = Spec()
+        report.add_reported_timing(spec, None)
+        report.add_reported_timing(spec, {'time': None})
+        self.assertNotIn('build_timings', spec)
+        report.add_reported_timing(spec, {'time': 1500})
+        self.assertEqual({
+            'wall': 1.5, 'cpu': 0.0, 'count': 1,
+        }, spec['build_timings']['link.webpack_compile'])
+
+    def test_write_build_report(self):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(export_target=join(tmpdir, 'bundle.js'))
+        report.add_timing(spec, 'link', 1.0, 0.5)
+        path = report.write_build_report(spec)
+        self.assertEqual(join(tmpdir, 'bundle.js.report.json'), path)
+        with open(path, encoding='utf8') as fd:
+            result = json.load(fd)
+        self.assertEqual(join(tmpdir, 'bundle.js'), result['export_target'])
+        self.assertEqual({
+            'link': {'wall': 1.0, 'cpu': 0.5, 'count': 1},
+        }, result['timings'])
+        self.assertIsNone(result['webpack_build_result'])
@@ -3,8 +3,12 @@ from __future__ import unicode_literals
 
 import unittest
 import json
+import textwrap
 import os
+import pkg_resources
 from codecs import open
+from io import BytesIO
+from os.path import dirname
 from os.path import exists
 from os.path import join
 
@@ -13,14 +17,19 @@ from calmjs.parse import asttypes
 from calmjs.parse.parsers.es5 import read as read_es5
 from calmjs.parse.exceptions import ECMASyntaxError
 from calmjs.utils import pretty_logging
+from calmjs import toolchain as calmjs_toolchain
+from calmjs.toolchain import AdviceRegistry
 from calmjs.toolchain import Spec
 from calmjs.toolchain import CONFIG_JS_FILES
 from calmjs.toolchain import LOADERPLUGIN_SOURCEPATH_MAPS
+from calmjs.cli import get_node_version
+from calmjs.cli import node as run_node
 from calmjs.npm import get_npm_version
 
 from calmjs.webpack import toolchain
 from calmjs.webpack.base import WEBPACK_RESOLVELOADER_ALIAS
 from calmjs.webpack.loaderplugin import AutogenWebpackLoaderPluginRegistry
+from calmjs.webpack.configuration import WebpackConfig
 from calmjs.webpack.interrogation import walker
 
 from calmjs.testing import utils
@@ -140,7 +149,8 @@ class ToolchainUnitTestCase(unittest.TestCase):
 
     def setUp(self):
         utils.stub_item_attr_value(
-            self, toolchain, 'get_bin_version', lambda p, kw: (1, 0, 0))
+            self, toolchain, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (1, 0, 0))
 
     def test_prepare_failure_manual(self):
         webpack = toolchain.WebpackToolchain()
@@ -205,6 +215,22 @@ class ToolchainUnitTestCase(unittest.TestCase):
             str(e.exception), "'export_target' must not be same as "
             "'webpack_config_js'")
 
+    def test_prepare_build_report(self):
+        tmpdir = utils.mkdtemp(self)
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+        webpack = toolchain.WebpackToolchain()
+        spec = Spec(
+            build_dir=tmpdir,
+            export_target=join(tmpdir, 'bundle.js'),
+            build_report=True,
+        )
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        webpack.prepare(spec)
+        self.assertIn('prepare', spec['build_timings'])
+        spec.handle('success')
+        self.assertTrue(exists(join(tmpdir, 'bundle.js.report.json')))
+
     def test_assemble_null(self):
         tmpdir = utils.mkdtemp(self)
 
@@ -247,6 +273,72 @@ class ToolchainUnitTestCase(unittest.TestCase):
         self.assertEqual(
             config_js['entry'], join(tmpdir, '__calmjs_bootstrap__.js'))
 
+    def test_assemble_referenced_in_place(self):
+        tmpdir = utils.mkdtemp(self)
+        srcdir = utils.mkdtemp(self)
+        resource = join(srcdir, 'data.json')
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            # mock a webpack executable.
+            pass
+
+        spec = Spec(
+            export_target=join(tmpdir, 'bundle.js'),
+            build_dir=tmpdir,
+            transpiled_modpaths={},
+            bundled_modpaths={},
+            transpiled_targetpaths={},
+            bundled_targetpaths={},
+            loaderplugins_targetpaths={
+                # as produced by the reference staging strategy.
+                'data.json': resource,
+                'text.txt': 'text.txt',
+            },
+            export_module_names=[],
+        )
+
+        webpack = toolchain.WebpackToolchain()
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        webpack.prepare(spec)
+        webpack.assemble(spec)
+        self.assertEqual(
+            resource, spec['webpack_config']['resolve']['alias']['data.json'])
+        self.assertEqual(
+            join(tmpdir, 'text.txt'),
+            spec['webpack_config']['resolve']['alias']['text.txt'],
+        )
+
+    def test_assemble_unchanged_untouched(self):
+        tmpdir = utils.mkdtemp(self)
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            # mock a webpack executable.
+            pass
+
+        def assemble():
+            spec = Spec(
+                export_target=join(tmpdir, 'bundle.js'),
+                build_dir=tmpdir,
+                transpiled_modpaths={},
+                bundled_modpaths={},
+                transpiled_targetpaths={},
+                bundled_targetpaths={},
+                export_module_names=[],
+            )
+            webpack = toolchain.WebpackToolchain()
+            spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+            webpack.prepare(spec)
+            webpack.assemble(spec)
+
+        names = ('config.js', '__calmjs_bootstrap__.js')
+        assemble()
+        for name in names:
+            # ensure that any rewrite will be detected.
+            os.utime(join(tmpdir, name), (0, 0))
+        assemble()
+        for name in names:
+            self.assertEqual(0, os.stat(join(tmpdir, name)).st_mtime)
+
     def test_assemble_explicit_entry(self):
         tmpdir = utils.mkdtemp(self)
 
@@ -387,6 +479,252 @@ class ToolchainUnitTestCase(unittest.TestCase):
             self.assertIn('require("example/module")', calmjs_module)
             self.assertIn('calmjs_bootstrap.modules', calmjs_module)
 
+        # the export manifest is only written for a built export target
+        spec.handle('success')
+        self.assertFalse(exists(join(tmpdir, 'bundle.js.modules.json')))
+        with open(join(tmpdir, 'bundle.js'), 'w') as fd:
+            fd.write('/* artifact */')
+        webpack.write_export_manifest(spec)
+        with open(join(tmpdir, 'bundle.js.modules.json')) as fd:
+            self.assertEqual([
+                'bundled_dir',
+                'bundled_pkg',
+                'example/module',
+            ], json.load(fd)['modules'])
+
+    def test_prepare_assemble_calmjs_lazy_loader(self):
+        tmpdir = utils.mkdtemp(self)
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            # mock a webpack executable.
+            pass
+
+        spec = Spec(
+            export_target=join(tmpdir, 'bundle.js'),
+            build_dir=tmpdir,
+            transpiled_modpaths={
+                'example/module': 'example/module'
+            },
+            bundled_modpaths={},
+            transpiled_targetpaths={
+                'example/module': 'example/module.js',
+            },
+            bundled_targetpaths={},
+            export_module_names=['example/module'],
+            webpack_output_library='__calmjs__',
+            webpack_externals={'__calmjs__': {
+                "root": '__calmjs__',
+                "amd": '__calmjs__',
+                "commonjs": ['global', '__calmjs__'],
+                "commonjs2": ['global', '__calmjs__'],
+            }},
+            calmjs_lazy_loader=True,
+        )
+
+        webpack = toolchain.WebpackToolchain()
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        webpack.prepare(spec)
+        with pretty_logging(stream=mocks.StringIO()):
+            webpack.assemble(spec)
+
+        with open(join(tmpdir, '__calmjs_loader__.js')) as fd:
+            calmjs_module = fd.read()
+        # the module is only required by the function for the getter.
+        self.assertIn(
+            '"example/module": function() { '
+            'return require("example/module"); }', calmjs_module)
+        self.assertIn('Object.defineProperty', calmjs_module)
+        with open(join(tmpdir, '__calmjs_bootstrap__.js')) as fd:
+            self.assertIn('getOwnPropertyDescriptor', fd.read())
+
+    def test_prepare_assemble_calmjs_async_loader(self):
+        tmpdir = utils.mkdtemp(self)
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            # mock a webpack executable.
+            pass
+
+        spec = Spec(
+            export_target=join(tmpdir, 'bundle.js'),
+            build_dir=tmpdir,
+            transpiled_modpaths={
+                'example/module': 'example/module'
+            },
+            bundled_modpaths={},
+            transpiled_targetpaths={
+                'example/module': 'example/module.js',
+            },
+            bundled_targetpaths={},
+            export_module_names=['example/module'],
+            webpack_output_library='__calmjs__',
+            webpack_externals={'__calmjs__': {
+                "root": '__calmjs__',
+                "amd": '__calmjs__',
+                "commonjs": ['global', '__calmjs__'],
+                "commonjs2": ['global', '__calmjs__'],
+            }},
+            # also takes precedence over the lazy loader.
+            calmjs_lazy_loader=True,
+            calmjs_async_loader=True,
+        )
+
+        webpack = toolchain.WebpackToolchain()
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        with pretty_logging(stream=mocks.StringIO()) as s:
+            webpack.prepare(spec)
+        self.assertIn(
+            "enabling 'webpack_split_chunks' as required by "
+            "'calmjs_async_loader'", s.getvalue())
+        self.assertTrue(spec['webpack_split_chunks'])
+        with pretty_logging(stream=mocks.StringIO()):
+            webpack.assemble(spec)
+
+        with open(join(tmpdir, '__calmjs_loader__.js')) as fd:
+            calmjs_module = fd.read()
+        # the module is behind the split point of the AMD style require.
+        self.assertIn(
+            '"example/module": function(f) { '
+            'require(["example/module"], f); }', calmjs_module)
+        self.assertNotIn('return require("example/module")', calmjs_module)
+        with open(join(tmpdir, 'config.js'), encoding='utf8') as fd:
+            self.assertIn('"chunkFilename": "bundle.[id].js"', fd.read())
+
+    @unittest.skipIf(get_node_version() is None, 'node not available')
+    def test_calmjs_async_loader_sync_access(self):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(build_dir=tmpdir, export_module_names=['example/module'])
+        webpack = toolchain.WebpackToolchain()
+        webpack.write_lookup_module(
+            spec, '__calmjs_loader__.js',
+            *toolchain._WEBPACK_CALMJS_MODULE_ASYNC_LOADER_TEMPLATE)
+        with open(join(tmpdir, '__calmjs_loader__.js')) as fd:
+            calmjs_module = fd.read()
+
+        stdout, stderr = run_node(textwrap.dedent("""
+        var loader = {};
+        var require = function(name, f) {
+            if (name.map) {
+                // the chunk is fetched later.
+                setTimeout(function() { f({'name': name[0]}); }, 0);
+            }
+            else if (name === '__calmjs__') {
+                return {'modules': {'external/module': 'external'}};
+            }
+        };
+        (function(require, exports) {
+        %s
+        })(require, loader);
+        try {
+            loader.require('example/module');
+        }
+        catch (e) {
+            console.log('require: ' + e.message);
+        }
+        try {
+            loader.modules['example/module'];
+        }
+        catch (e) {
+            console.log('modules: ' + e.message);
+        }
+        console.log('external: ' + loader.require('external/module'));
+        loader.require(['example/module'], function(module) {
+            console.log('async: ' + module.name);
+            console.log('sync: ' + loader.require('example/module').name);
+        });
+        """) % calmjs_module)
+
+        self.assertEqual('', stderr)
+        message = (
+            "module 'example/module' is not loaded; it must be required "
+            "asynchronously before it may be accessed")
+        self.assertEqual([
+            'require: ' + message,
+            'modules: ' + message,
+            'external: external',
+            'async: example/module',
+            'sync: example/module',
+        ], stdout.splitlines())
+
+    def test_prepare_assemble_split_chunks(self):
+        tmpdir = utils.mkdtemp(self)
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            # mock a webpack executable.
+            pass
+
+        spec = Spec(
+            export_target=join(tmpdir, 'bundle.js'),
+            build_dir=tmpdir,
+            transpiled_modpaths={},
+            bundled_modpaths={},
+            transpiled_targetpaths={},
+            bundled_targetpaths={},
+            export_module_names=[],
+            webpack_output_library='__calmjs__',
+            webpack_externals={'__calmjs__': {
+                "root": '__calmjs__',
+                "amd": '__calmjs__',
+                "commonjs": ['global', '__calmjs__'],
+                "commonjs2": ['global', '__calmjs__'],
+            }},
+            webpack_split_chunks=True,
+        )
+
+        webpack = toolchain.WebpackToolchain()
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        webpack.prepare(spec)
+        with pretty_logging(stream=mocks.StringIO()):
+            webpack.assemble(spec)
+
+        with open(join(tmpdir, 'config.js'), encoding='utf8') as fd:
+            config_js = fd.read()
+        self.assertIn('"chunkFilename": "bundle.[id].js"', config_js)
+        self.assertIn('"jsonpFunction": "webpackJsonp_bundle"', config_js)
+        self.assertIn('CalmjsChunkManifest', config_js)
+        self.assertNotIn('LimitChunkCountPlugin', config_js)
+        with open(join(tmpdir, '__calmjs_bootstrap__.js')) as fd:
+            self.assertIn('__webpack_public_path__', fd.read())
+
+        # the emitted files are listed by the chunk manifest.
+        with open(join(tmpdir, 'bundle.js.chunks.json'), 'w') as fd:
+            json.dump({'entry': ['bundle.js'], 'chunks': {
+                '0': ['bundle.js', 'bundle.js.map'],
+                '1': ['bundle.1.js'],
+            }}, fd)
+        self.assertEqual([
+            'bundle.1.js', 'bundle.js', 'bundle.js.chunks.json',
+            'bundle.js.map',
+        ], webpack.emitted_names(spec))
+
+    def test_prepare_assemble_split_chunks_jsonp_function(self):
+        def assemble(name):
+            tmpdir = utils.mkdtemp(self)
+            with open(join(tmpdir, 'webpack'), 'w'):
+                pass
+            spec = Spec(
+                export_target=join(tmpdir, name),
+                build_dir=tmpdir,
+                transpiled_modpaths={},
+                bundled_modpaths={},
+                transpiled_targetpaths={},
+                bundled_targetpaths={},
+                export_module_names=[],
+                webpack_split_chunks=True,
+            )
+            webpack = toolchain.WebpackToolchain()
+            spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+            webpack.prepare(spec)
+            with pretty_logging(stream=mocks.StringIO()):
+                webpack.assemble(spec)
+            return spec['webpack_config']['output']['jsonpFunction']
+
+        # the split artifacts must not share the global for loading
+        # their chunks.
+        first = assemble('bundle.js')
+        second = assemble('other-bundle.js')
+        self.assertEqual('webpackJsonp_bundle', first)
+        self.assertEqual('webpackJsonp_other_bundle', second)
+
     def test_prepare_assemble_calmjs_bootstrap_explicit(self):
         tmpdir = utils.mkdtemp(self)
 
@@ -705,6 +1043,136 @@ class ToolchainUnitTestCase(unittest.TestCase):
             'module3': join(build_dir, 'module3.js'),
         })
 
+    def test_assemble_alias_check_cached(self):
+        tmpdir = utils.mkdtemp(self)
+        build_dir = utils.mkdtemp(self)
+        cache_path = join(tmpdir, 'imports.json')
+        webpack = toolchain.WebpackToolchain()
+
+        export_target = join(build_dir, 'export.js')
+        config_js = join(build_dir, 'config.js')
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+
+        with open(join(build_dir, 'module1.js'), 'w') as fd:
+            fd.write(
+                "define(['underscore', 'module2'], "
+                "function(underscore, module2) {"
+                "});"
+            )
+
+        with open(join(build_dir, 'module2.js'), 'w') as fd:
+            fd.write("var $ = require('jquery');\n")
+
+        def make_spec():
+            spec = Spec(
+                build_dir=build_dir,
+                export_target=export_target,
+                webpack_config_js=config_js,
+                transpiled_modpaths={
+                    'module1': 'module1',
+                    'module2': 'module2',
+                },
+                transpiled_targetpaths={
+                    'module1': 'module1.js',
+                    'module2': 'module2.js',
+                },
+                bundled_modpaths={},
+                bundled_targetpaths={},
+                export_module_names=['module1', 'module2'],
+                verify_imports_cache=cache_path,
+            )
+            spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+            return spec
+
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            webpack.assemble(make_spec())
+
+        self.assertTrue(exists(cache_path))
+        self.assertNotIn('using cached import names', s.getvalue())
+        self.assertIn(
+            "source file(s) referenced modules that are not in alias or "
+            "externals: 'jquery', 'underscore'", s.getvalue()
+        )
+
+        def fail(path):
+            raise AssertionError('%s should not be parsed' % path)
+
+        original = toolchain.read_module_imports
+        toolchain.read_module_imports = fail
+        try:
+            with pretty_logging(
+                    logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+                webpack.assemble(make_spec())
+        finally:
+            toolchain.read_module_imports = original
+
+        self.assertIn(
+            "using cached import names for alias 'module1'", s.getvalue())
+        self.assertIn(
+            "source file(s) referenced modules that are not in alias or "
+            "externals: 'jquery', 'underscore'", s.getvalue()
+        )
+
+    def test_transpile_assemble_alias_check_recorded(self):
+        tmpdir = utils.mkdtemp(self)
+        build_dir = utils.mkdtemp(self)
+        webpack = toolchain.WebpackToolchain()
+
+        export_target = join(build_dir, 'export.js')
+        config_js = join(build_dir, 'config.js')
+        source = join(tmpdir, 'module1.js')
+
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+
+        with open(source, 'w') as fd:
+            fd.write(
+                "var $ = require('jquery');\n"
+                "var dynamic = require(dynamic);\n"
+            )
+
+        spec = Spec(
+            build_dir=build_dir,
+            export_target=export_target,
+            webpack_config_js=config_js,
+            transpiled_modpaths={
+                'module1': 'module1',
+            },
+            transpiled_targetpaths={
+                'module1': 'module1.js',
+            },
+            bundled_modpaths={},
+            bundled_targetpaths={},
+            export_module_names=['module1'],
+        )
+        spec[webpack.webpack_bin_key] = join(tmpdir, 'webpack')
+        webpack.transpile_modname_source_target(
+            spec, 'module1', source, 'module1.js')
+        self.assertEqual({
+            join(build_dir, 'module1.js'): ['jquery', '__calmjs_loader__'],
+        }, spec['transpiled_imports'])
+        self.assertEqual({}, webpack.transpiled_imports)
+
+        def fail(path):
+            raise AssertionError('%s should not be parsed' % path)
+
+        original = toolchain.read_module_imports
+        toolchain.read_module_imports = fail
+        try:
+            with pretty_logging(
+                    logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+                webpack.assemble(spec)
+        finally:
+            toolchain.read_module_imports = original
+
+        self.assertIn(
+            "source file(s) referenced modules that are not in alias or "
+            "externals: '__calmjs_loader__', 'jquery'", s.getvalue()
+        )
+
     def test_assemble_alias_check_dynamic(self):
         tmpdir = utils.mkdtemp(self)
         build_dir = utils.mkdtemp(self)
@@ -905,7 +1373,8 @@ class ToolchainCompileLoaderTestCase(unittest.TestCase):
 
         # also stub the version finding.
         utils.stub_item_attr_value(
-            self, toolchain, 'get_bin_version', lambda p, kw: (1, 0, 0))
+            self, toolchain, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (1, 0, 0))
 
     def test_compile_plugin_base(self):
         working_dir = utils.mkdtemp(self)
@@ -1057,3 +1526,1032 @@ class ToolchainCompileLoaderTestCase(unittest.TestCase):
 
         self.assertNotIn(
             "not in modules: %s" % (['text!hello/world.txt'],), s.getvalue())
+
+
+class ToolchainParallelTranspileTestCase(unittest.TestCase):
+    """
+    Test the transpile step through the worker processes.
+    """
+
+    def setUp(self):
+        self.src_dir = utils.mkdtemp(self)
+        self.sources = {}
+        for name, code in (
+                ('mod1', "var mod2 = require('mod2');\n"),
+                ('mod2', "var dynamic = require(dynamic);\n"),
+                ('mod3', "define(['mod1'], function(mod1) {});\n")):
+            self.sources[name] = join(self.src_dir, name + '.js')
+            with open(self.sources[name], 'w') as fd:
+                fd.write(code)
+
+    def compile(self, build_jobs, **kw):
+        build_dir = utils.mkdtemp(self)
+        webpack = toolchain.WebpackToolchain()
+        spec = Spec(
+            build_dir=build_dir,
+            transpile_sourcepath=self.sources,
+            generate_source_map=True,
+            build_jobs=build_jobs,
+            **kw
+        )
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            webpack.compile(spec)
+        return webpack, spec, s.getvalue()
+
+    def test_compile_parallel(self):
+        _, serial_spec, _ = self.compile(1)
+        webpack, spec, log = self.compile(2)
+        self.assertIn('transpiling using 2 worker processes', log)
+        self.assertIsNone(webpack._transpile_pool)
+        self.assertIsNone(webpack._transpile_pending)
+        self.assertEqual(
+            serial_spec['transpiled_targetpaths'],
+            spec['transpiled_targetpaths'],
+        )
+        self.assertEqual(
+            sorted(serial_spec['export_module_names']),
+            sorted(spec['export_module_names']),
+        )
+        for name in self.sources:
+            for suffix in ('.js', '.js.map'):
+                with open(join(
+                        serial_spec['build_dir'], name + suffix)) as fd:
+                    serial = fd.read()
+                with open(join(spec['build_dir'], name + suffix)) as fd:
+                    self.assertEqual(serial, fd.read())
+
+        self.assertEqual({
+            join(spec['build_dir'], 'mod1.js'): ['mod2'],
+            join(spec['build_dir'], 'mod2.js'): ['__calmjs_loader__'],
+            join(spec['build_dir'], 'mod3.js'): ['mod1'],
+        }, spec['transpiled_imports'])
+
+        # the transpile is timed once through to the collection of the
+        # results, separately from the submission of the entries.
+        timings = spec['build_timings']
+        self.assertEqual(1, timings['compile.transpile']['count'])
+        self.assertEqual(3, timings['compile.transpile.submit']['count'])
+        self.assertGreaterEqual(
+            timings['compile.transpile']['wall'],
+            timings['compile.transpile.submit']['wall'],
+        )
+        self.assertEqual(
+            3, serial_spec['build_timings']['compile.transpile']['count'])
+        self.assertNotIn(
+            'compile.transpile.submit', serial_spec['build_timings'])
+
+    def test_compile_parallel_overridden_transpiler(self):
+        transpiled = []
+
+        class CustomToolchain(toolchain.WebpackToolchain):
+            def transpile_modname_source_target(
+                    self, spec, modname, source, target):
+                transpiled.append(modname)
+                return super(
+                    CustomToolchain, self).transpile_modname_source_target(
+                        spec, modname, source, target)
+
+        self.assertTrue(toolchain.WebpackToolchain().has_default_transpiler())
+        webpack = CustomToolchain()
+        self.assertFalse(webpack.has_default_transpiler())
+        spec = Spec(
+            build_dir=utils.mkdtemp(self),
+            transpile_sourcepath=self.sources,
+            build_jobs=2,
+        )
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            webpack.compile(spec)
+
+        log = s.getvalue()
+        self.assertIn(
+            "the transpiler of '%s.CustomToolchain' is overridden" % (
+                __name__), log)
+        self.assertNotIn('transpiling using', log)
+        self.assertEqual(sorted(self.sources), sorted(transpiled))
+        self.assertEqual(
+            3, spec['build_timings']['compile.transpile']['count'])
+        for name in self.sources:
+            self.assertTrue(exists(join(spec['build_dir'], name + '.js')))
+
+    def test_compile_passthrough(self):
+        # formatting that the unparser would not preserve.
+        with open(self.sources['mod1'], 'w') as fd:
+            fd.write("var mod2=require('mod2')\n")
+
+        for build_jobs in (1, 2):
+            webpack, spec, log = self.compile(
+                build_jobs, transpile_passthrough=True)
+            build_dir = spec['build_dir']
+            for name in ('mod1', 'mod3'):
+                with open(self.sources[name]) as fd:
+                    source = fd.read()
+                with open(join(build_dir, name + '.js')) as fd:
+                    self.assertEqual(source, fd.read())
+                self.assertFalse(exists(join(build_dir, name + '.js.map')))
+
+            # only the one with the dynamic require is transpiled.
+            with open(join(build_dir, 'mod2.js')) as fd:
+                self.assertIn(
+                    "require('__calmjs_loader__').require(dynamic)", fd.read())
+            self.assertTrue(exists(join(build_dir, 'mod2.js.map')))
+            self.assertEqual({
+                join(build_dir, 'mod1.js'): ['mod2'],
+                join(build_dir, 'mod2.js'): ['__calmjs_loader__'],
+                join(build_dir, 'mod3.js'): ['mod1'],
+            }, spec['transpiled_imports'])
+
+    def test_compile_splice(self):
+        with open(self.sources['mod2'], 'w') as fd:
+            fd.write("var dynamic=require(dynamic)\n")
+
+        _, serial_spec, _ = self.compile(1, transpile_rewriter='splice')
+        _, spec, _ = self.compile(2, transpile_rewriter='splice')
+        for name in self.sources:
+            for suffix in ('.js', '.js.map'):
+                with open(join(
+                        serial_spec['build_dir'], name + suffix)) as fd:
+                    serial = fd.read()
+                with open(join(spec['build_dir'], name + suffix)) as fd:
+                    self.assertEqual(serial, fd.read())
+
+        with open(join(spec['build_dir'], 'mod2.js')) as fd:
+            self.assertEqual(
+                "var dynamic=require('__calmjs_loader__').require(dynamic)\n"
+                "\n//# sourceMappingURL=mod2.js.map\n", fd.read())
+        with open(join(spec['build_dir'], 'mod2.js.map')) as fd:
+            self.assertEqual(
+                'AAAA,YAAY,6BAAA;', json.load(fd)['mappings'])
+        self.assertEqual({
+            join(spec['build_dir'], 'mod1.js'): ['mod2'],
+            join(spec['build_dir'], 'mod2.js'): ['__calmjs_loader__'],
+            join(spec['build_dir'], 'mod3.js'): ['mod1'],
+        }, spec['transpiled_imports'])
+
+    def test_compile_unsupported_rewriter(self):
+        with self.assertRaises(toolchain.WebpackRuntimeError):
+            self.compile(1, transpile_rewriter='unknown')
+
+    def test_transpile_source_target_passthrough_stale_map(self):
+        target = join(utils.mkdtemp(self), 'mod1.js')
+        self.assertEqual((['mod2'], False), toolchain.transpile_source_target(
+            self.sources['mod1'], target, True, False))
+        self.assertTrue(exists(target + '.map'))
+        self.assertEqual((['mod2'], True), toolchain.transpile_source_target(
+            self.sources['mod1'], target, True, True))
+        self.assertFalse(exists(target + '.map'))
+
+    def test_transpile_source_target_passthrough_invalid(self):
+        # the scan of the tokens cannot tell this source is invalid.
+        source = join(self.src_dir, 'invalid.js')
+        with open(source, 'w') as fd:
+            fd.write("var a = ;\n")
+        target = join(utils.mkdtemp(self), 'invalid.js')
+        with self.assertRaises(ECMASyntaxError):
+            toolchain.transpile_source_target(source, target, True, True)
+        self.assertFalse(exists(target))
+
+    def test_compile_parallel_failure(self):
+        for name in ('mod1', 'mod3'):
+            with open(self.sources[name], 'w') as fd:
+                fd.write("function() {});\n")
+
+        build_dir = utils.mkdtemp(self)
+        webpack = toolchain.WebpackToolchain()
+        spec = Spec(
+            build_dir=build_dir,
+            transpile_sourcepath=self.sources,
+            build_jobs=2,
+        )
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            with self.assertRaises(ECMASyntaxError):
+                webpack.compile(spec)
+
+        self.assertIn("failed to transpile '%s' for modname 'mod1'" % (
+            self.sources['mod1']), s.getvalue())
+        self.assertIn("failed to transpile '%s' for modname 'mod3'" % (
+            self.sources['mod3']), s.getvalue())
+        self.assertIsNone(webpack._transpile_pool)
+        # the successful one will still be written.
+        self.assertTrue(exists(join(build_dir, 'mod2.js')))
+
+    def test_read_all_module_imports(self):
+        paths = [self.sources[name] for name in ('mod3', 'mod1', 'mod2')]
+        expected = [['mod1'], ['mod2'], []]
+        self.assertEqual(expected, toolchain.read_all_module_imports(paths))
+        self.assertEqual(
+            expected, toolchain.read_all_module_imports(paths, jobs=2))
+        self.assertEqual([], toolchain.read_all_module_imports([], jobs=2))
+
+    def test_read_all_module_imports_prescan(self):
+        malformed = join(self.src_dir, 'malformed.js')
+        with open(malformed, 'w') as fd:
+            fd.write("function() { require('mod1'); }\n")
+        paths = [self.sources['mod1'], self.sources['mod3'], malformed]
+        with self.assertRaises(ECMASyntaxError):
+            toolchain.read_all_module_imports(paths)
+        # only the syntax errors beyond the lexer are missed by the scan
+        # of the tokens, while the amd sources are still parsed.
+        expected = [['mod2'], ['mod1'], ['mod1']]
+        self.assertEqual(expected, toolchain.read_all_module_imports(
+            paths, prescan=True))
+        self.assertEqual(expected, toolchain.read_all_module_imports(
+            paths, jobs=2, prescan=True))
+
+    def test_verify_all_imports_prescan(self):
+        # lexically valid, but only the parser can tell it is invalid.
+        malformed = join(self.src_dir, 'malformed.js')
+        with open(malformed, 'w') as fd:
+            fd.write("function() { require('mod1'); }\n")
+        webpack_config = {
+            'resolve': {'alias': {'mod1': self.sources['mod1']}},
+            'resolveLoader': {'alias': {}},
+            'externals': {},
+        }
+        webpack = toolchain.WebpackToolchain()
+        spec = Spec(transpile_passthrough=True)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            with self.assertRaises(ECMASyntaxError):
+                webpack.verify_all_imports(
+                    spec, webpack_config, {'malformed': malformed})
+        # only the dedicated flag enables the prescan.
+        spec = Spec(verify_imports_prescan=True)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            self.assertEqual(set(), webpack.verify_all_imports(
+                spec, webpack_config, {'malformed': malformed}))
+
+    def test_check_all_alias_declared_parallel(self):
+        webpack = toolchain.WebpackToolchain()
+        alias = dict(self.sources)
+        alias['missing'] = join(self.src_dir, 'missing.js')
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            missing = webpack.check_all_alias_declared(
+                alias, lambda name: name in ('mod1', 'mod3'), jobs=2)
+        self.assertEqual({'mod2'}, missing)
+        self.assertIn(
+            "modname 'mod1' has references not in modules: ['mod2']",
+            s.getvalue())
+        self.assertIn(
+            "alias 'missing' points to '%s' but file does not exist" % (
+                alias['missing']), s.getvalue())
+
+
+class ToolchainIncrementalBuildTestCase(unittest.TestCase):
+    """
+    Test the compile step with incremental build enabled.
+    """
+
+    def setUp(self):
+        self.src_dir = utils.mkdtemp(self)
+        self.build_dir = utils.mkdtemp(self)
+        self.sources = {}
+        for name, code in (
+                ('mod1', "var mod2 = require('mod2');\n"),
+                ('mod2', "var dynamic = require(dynamic);\n")):
+            self.sources[name] = join(self.src_dir, name + '.js')
+            with open(self.sources[name], 'w') as fd:
+                fd.write(code)
+        self.bundled = join(self.src_dir, 'bundled.js')
+        with open(self.bundled, 'w') as fd:
+            fd.write("var bundled = 1;\n")
+
+    def compile(
+            self, build_jobs=1, transpile_passthrough=False,
+            transpile_rewriter='unparse'):
+        webpack = toolchain.WebpackToolchain()
+        spec = Spec(
+            build_dir=self.build_dir,
+            transpile_sourcepath=dict(self.sources),
+            bundle_sourcepath={'bundled': self.bundled},
+            generate_source_map=True,
+            incremental_build=True,
+            build_jobs=build_jobs,
+            transpile_passthrough=transpile_passthrough,
+            transpile_rewriter=transpile_rewriter,
+        )
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            webpack.compile(spec)
+        return spec, s.getvalue()
+
+    def test_incremental_build(self):
+        spec, log = self.compile()
+        self.assertNotIn('skipping', log)
+        self.assertEqual(1, spec['build_timings']['compile']['count'])
+        self.assertEqual(
+            2, spec['build_timings']['compile.transpile']['count'])
+        self.assertEqual(1, spec['build_timings']['compile.bundle']['count'])
+        self.assertTrue(exists(join(
+            self.build_dir, '__calmjs_build_manifest__.json')))
+        first_imports = spec['transpiled_imports']
+
+        spec, log = self.compile()
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod2'],
+            log)
+        self.assertIn(
+            "skipping copy of unchanged '%s'" % self.bundled, log)
+        self.assertEqual(first_imports, spec['transpiled_imports'])
+        self.assertEqual(
+            sorted(['mod1', 'mod2', 'bundled']),
+            sorted(spec['export_module_names']),
+        )
+        self.assertEqual({
+            'mod1': 'mod1.js',
+            'mod2': 'mod2.js',
+        }, spec['transpiled_targetpaths'])
+        self.assertEqual(
+            {'bundled': 'bundled.js'}, spec['bundled_targetpaths'])
+
+    def test_incremental_build_changed_removed(self):
+        self.compile()
+        with open(self.sources['mod1'], 'w') as fd:
+            fd.write("var mod3 = require('mod3');\n")
+        self.sources.pop('mod2')
+
+        spec, log = self.compile()
+        self.assertNotIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+        self.assertIn('removed outputs of 1 source(s)', log)
+        self.assertEqual(
+            {join(self.build_dir, 'mod1.js'): ['mod3']},
+            spec['transpiled_imports'],
+        )
+        self.assertTrue(exists(join(self.build_dir, 'mod1.js')))
+        self.assertFalse(exists(join(self.build_dir, 'mod2.js')))
+        self.assertFalse(exists(join(self.build_dir, 'mod2.js.map')))
+
+    def test_incremental_build_missing_target(self):
+        self.compile()
+        os.remove(join(self.build_dir, 'mod1.js.map'))
+        spec, log = self.compile()
+        self.assertNotIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+        self.assertTrue(exists(join(self.build_dir, 'mod1.js.map')))
+
+    def test_incremental_build_parallel(self):
+        self.compile()
+        with open(self.sources['mod1'], 'w') as fd:
+            fd.write("var mod3 = require('mod3');\n")
+        spec, log = self.compile(build_jobs=2)
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod2'],
+            log)
+        self.assertEqual({
+            join(self.build_dir, 'mod1.js'): ['mod3'],
+            join(self.build_dir, 'mod2.js'): ['__calmjs_loader__'],
+        }, spec['transpiled_imports'])
+        spec, log = self.compile()
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+
+    def test_incremental_build_passthrough(self):
+        self.compile(transpile_passthrough=True)
+        self.assertFalse(exists(join(self.build_dir, 'mod1.js.map')))
+        spec, log = self.compile(transpile_passthrough=True)
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod2'],
+            log)
+
+        # the source map is required once passthrough is disabled.
+        spec, log = self.compile()
+        self.assertNotIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod1'],
+            log)
+        self.assertTrue(exists(join(self.build_dir, 'mod1.js.map')))
+
+    def test_incremental_build_rewriter(self):
+        self.compile()
+        # the targets produced by a different rewriter are stale.
+        spec, log = self.compile(transpile_rewriter='splice')
+        self.assertNotIn('skipping transpile', log)
+        with open(join(self.build_dir, 'mod2.js')) as fd:
+            self.assertTrue(fd.read().startswith(
+                "var dynamic = require('__calmjs_loader__').require(dynamic);"
+                "\n"))
+        spec, log = self.compile(transpile_rewriter='splice')
+        self.assertIn(
+            "skipping transpile of unchanged '%s'" % self.sources['mod2'],
+            log)
+        spec, log = self.compile()
+        self.assertNotIn('skipping transpile', log)
+
+
+class NodeDriverTestCase(unittest.TestCase):
+    """
+    Test the helpers and the link step through the node driver.
+    """
+
+    def test_find_webpack_package_version(self):
+        tmpdir = utils.mkdtemp(self)
+        empty = join(tmpdir, 'empty')
+        node_modules = join(tmpdir, 'node_modules')
+        os.makedirs(empty)
+        os.makedirs(join(node_modules, 'webpack'))
+        self.assertIsNone(
+            toolchain.find_webpack_package_version([empty, node_modules]))
+
+        package_json = join(node_modules, 'webpack', 'package.json')
+        with open(package_json, 'w') as fd:
+            fd.write('{')
+        self.assertIsNone(
+            toolchain.find_webpack_package_version([node_modules]))
+
+        with open(package_json, 'w') as fd:
+            json.dump({'name': 'webpack', 'version': '4.16.5-beta.1'}, fd)
+        self.assertEqual((4, 16, 5), toolchain.find_webpack_package_version(
+            [empty, node_modules]))
+
+    def test_parse_node_driver_result(self):
+        self.assertIsNone(toolchain.parse_node_driver_result(''))
+        self.assertIsNone(toolchain.parse_node_driver_result('not json\n'))
+        self.assertIsNone(toolchain.parse_node_driver_result('[]\n'))
+        self.assertEqual({'errors': []}, toolchain.parse_node_driver_result(
+            'some other output\n{"errors": []}\n'))
+
+    def test_write_node_driver(self):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(
+            build_dir=tmpdir, webpack_config_js=join(tmpdir, 'config.js'))
+        driver = toolchain.WebpackToolchain().write_node_driver(spec)
+        self.assertEqual(join(tmpdir, '__calmjs_webpack_driver__.js'), driver)
+        with open(driver, encoding='utf8') as fd:
+            # must be a valid ES5 script that requires the config.
+            tree = read_es5(fd)
+        self.assertIn(json.dumps(join(tmpdir, 'config.js')), str(tree))
+
+    def stub_popen(self, output, returncode):
+        calls = []
+
+        class Popen(object):
+            def __init__(self, args, **kw):
+                calls.append(args)
+                self.returncode = returncode
+                config_js = join(dirname(args[1]), 'config.js')
+                if exists(config_js):
+                    with open(config_js, encoding='utf8') as fd:
+                        calls.append(fd.read())
+
+            def communicate(self):
+                return output, None
+
+        utils.stub_item_attr_value(self, toolchain, 'Popen', Popen)
+        return calls
+
+    def link_node(self, output, returncode=0):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(
+            build_dir=tmpdir, webpack_config_js=join(tmpdir, 'config.js'),
+            webpack_link_driver='node',
+        )
+        webpack = toolchain.WebpackToolchain()
+        calls = self.stub_popen(output, returncode)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            try:
+                webpack.link(spec)
+            finally:
+                self.assertEqual([(
+                    'node', join(tmpdir, '__calmjs_webpack_driver__.js'),
+                )], calls)
+        return spec, s.getvalue()
+
+    def test_link_node_success(self):
+        spec, log = self.link_node(json.dumps({
+            'version': '4.16.5',
+            'errors': [],
+            'warnings': ['a warning'],
+            'assets': [{'name': 'bundle.js', 'size': 42}],
+            'time': 100,
+        }).encode('utf8'))
+        self.assertEqual('4.16.5', spec['webpack_build_result']['version'])
+        self.assertEqual(
+            0.1, spec['build_timings']['link.webpack_compile']['wall'])
+        self.assertIn('link.webpack', spec['build_timings'])
+        self.assertIn('webpack: a warning', log)
+        self.assertIn("webpack emitted 'bundle.js' (42 bytes)", log)
+        self.assertIn('webpack 4.16.5 completed in 100 ms', log)
+
+    def test_link_node_failure(self):
+        with self.assertRaises(toolchain.WebpackExitError):
+            self.link_node(json.dumps({
+                'version': '4.16.5',
+                'errors': ['module not found'],
+                'warnings': [],
+                'assets': [],
+                'time': 100,
+            }).encode('utf8'), returncode=2)
+
+    def test_link_node_no_result(self):
+        with self.assertRaises(toolchain.WebpackExitError):
+            self.link_node(b'', returncode=1)
+
+    def test_report_node_driver_results(self):
+        stream = BytesIO(b'webpack output\n{"errors": ["failed"]}\n{}\n')
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            toolchain.report_node_driver_results(stream)
+        self.assertIn('webpack: failed', s.getvalue())
+        self.assertEqual(2, s.getvalue().count('completed in'))
+
+    def test_link_unsupported_driver(self):
+        spec = Spec(webpack_link_driver='unknown')
+        with self.assertRaises(toolchain.WebpackRuntimeError):
+            toolchain.WebpackToolchain().link(spec)
+
+    def stub_call(self, returncode, emitted):
+        calls = []
+
+        def call(args, **kw):
+            calls.append(args)
+            with open(args[-1], encoding='utf8') as fd:
+                config_js = fd.read()
+            calls.append(config_js)
+            path = json.loads(config_js.split(
+                'config.output.path = ', 1)[1].split(';', 1)[0])
+            os.mkdir(path)
+            for name, content in emitted.items():
+                with open(join(path, name), 'w') as fd:
+                    fd.write(content)
+            return returncode
+
+        utils.stub_item_attr_value(self, toolchain, 'call', call)
+        return calls
+
+    def test_link_cli(self):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(
+            build_dir=tmpdir, webpack_config_js=join(tmpdir, 'config.js'),
+            export_target=join(tmpdir, 'bundle.js'),
+            toolchain_bin_path=join(tmpdir, 'webpack'),
+        )
+        unchanged = join(tmpdir, 'bundle.js.map')
+        with open(unchanged, 'w') as fd:
+            fd.write('map')
+        os.utime(unchanged, (0, 0))
+        calls = self.stub_call(0, {
+            'bundle.js': 'bundle',
+            'bundle.js.map': 'map',
+        })
+        webpack = toolchain.WebpackToolchain()
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            webpack.link_cli(spec, '')
+
+        # webpack was invoked with the staging configuration that loads
+        # the original one.
+        self.assertIn(json.dumps(join(tmpdir, 'config.js')), calls[1])
+        self.assertFalse(exists(dirname(calls[0][-1])))
+        with open(spec['export_target']) as fd:
+            self.assertEqual('bundle', fd.read())
+        # the identical file was not rewritten.
+        self.assertEqual(0, os.stat(unchanged).st_mtime)
+
+    def test_link_cli_failure(self):
+        tmpdir = utils.mkdtemp(self)
+        spec = Spec(
+            build_dir=tmpdir, webpack_config_js=join(tmpdir, 'config.js'),
+            export_target=join(tmpdir, 'bundle.js'),
+            toolchain_bin_path=join(tmpdir, 'webpack'),
+        )
+        calls = self.stub_call(2, {'bundle.js': 'partial'})
+        webpack = toolchain.WebpackToolchain()
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            with self.assertRaises(toolchain.WebpackExitError):
+                webpack.link_cli(spec, '')
+        # nothing was moved over the export target.
+        self.assertFalse(exists(spec['export_target']))
+        self.assertFalse(exists(dirname(calls[0][-1])))
+
+    def make_batch_spec(self, tmpdir, name):
+        build_dir = join(tmpdir, name)
+        os.mkdir(build_dir)
+        spec = Spec(
+            export_target=join(tmpdir, name + '.js'),
+            build_dir=build_dir,
+            transpiled_modpaths={},
+            bundled_modpaths={},
+            transpiled_targetpaths={},
+            bundled_targetpaths={},
+            export_module_names=[],
+            toolchain_bin_path=join(tmpdir, 'webpack'),
+        )
+        return spec
+
+    def test_batch(self):
+        utils.stub_item_attr_value(
+            self, toolchain, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (4, 0, 0))
+        tmpdir = utils.mkdtemp(self)
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+        specs = [
+            self.make_batch_spec(tmpdir, 'a'),
+            self.make_batch_spec(tmpdir, 'b'),
+            self.make_batch_spec(tmpdir, 'c'),
+        ]
+        # this one will fail to assemble.
+        specs[1].pop('export_target')
+        cleanup = []
+        for spec in specs:
+            spec.advise('cleanup', cleanup.append, spec)
+        calls = self.stub_popen(json.dumps({
+            'version': '4.16.5',
+            'errors': ['c failed'],
+            'warnings': [],
+            'assets': [],
+            'time': None,
+            'children': [{
+                'errors': [],
+                'warnings': [],
+                'assets': [{'name': 'a.js', 'size': 1}],
+                'time': 10,
+            }, {
+                'errors': ['c failed'],
+                'warnings': [],
+                'assets': [],
+                'time': 10,
+            }],
+        }).encode('utf8'), 2)
+
+        webpack = toolchain.WebpackToolchain()
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            built = webpack.batch(specs)
+
+        self.assertEqual([specs[0]], built)
+        # the failed spec was cleaned up right away.
+        self.assertEqual([specs[1], specs[0], specs[2]], cleanup)
+        self.assertEqual(
+            [{'name': 'a.js', 'size': 1}],
+            specs[0]['webpack_build_result']['assets'])
+        self.assertEqual(
+            ["'export_target' not found in spec"],
+            specs[1]['webpack_build_result']['errors'])
+        self.assertEqual(
+            ['c failed'], specs[2]['webpack_build_result']['errors'])
+        self.assertIn("webpack failed to link artifact for", s.getvalue())
+
+        # both assembled specs were linked in a single invocation, in
+        # the same order.
+        self.assertEqual(2, len(calls))
+        self.assertLess(
+            calls[1].index(json.dumps(join(tmpdir, 'a', 'config.js'))),
+            calls[1].index(json.dumps(join(tmpdir, 'c', 'config.js'))),
+        )
+        # the batch directory is removed.
+        self.assertFalse(exists(dirname(calls[0][1])))
+
+    def test_batch_no_result(self):
+        utils.stub_item_attr_value(
+            self, toolchain, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (4, 0, 0))
+        tmpdir = utils.mkdtemp(self)
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+        specs = [
+            self.make_batch_spec(tmpdir, 'a'),
+            self.make_batch_spec(tmpdir, 'b'),
+        ]
+        self.stub_popen(b'', 1)
+        webpack = toolchain.WebpackToolchain()
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            self.assertEqual([], webpack.batch(specs))
+        for spec in specs:
+            self.assertEqual(
+                ['webpack exited with code 1'],
+                spec['webpack_build_result']['errors'],
+            )
+
+    def test_batch_empty(self):
+        self.assertEqual([], toolchain.WebpackToolchain().batch([]))
+
+    def test_batch_advice_packages(self):
+        utils.stub_item_attr_value(
+            self, toolchain, 'get_cached_bin_version',
+            lambda p, kw, cache_path: (4, 0, 0))
+        utils.make_dummy_dist(self, ((
+            'entry_points.txt',
+            '[demo.advice]\n'
+            'calmjs.webpack.toolchain:WebpackToolchain'
+            ' = calmjs.testing.spec:advice_marker\n'
+        ),), 'example.package', '1.0')
+        working_set = pkg_resources.WorkingSet([self._calmjs_testing_tmpdir])
+        utils.stub_item_attr_value(self, calmjs_toolchain, 'get_registry', {
+            'demo.advice': AdviceRegistry(
+                'demo.advice', _working_set=working_set),
+        }.get)
+
+        tmpdir = utils.mkdtemp(self)
+        with open(join(tmpdir, 'webpack'), 'w'):
+            pass
+        spec = self.make_batch_spec(tmpdir, 'a')
+        spec['calmjs_toolchain_advice_registry'] = 'demo.advice'
+        spec['advice_packages'] = ['example.package[extra]']
+        self.stub_popen(json.dumps({
+            'errors': [],
+            'warnings': [],
+            'children': [{
+                'errors': [],
+                'warnings': [],
+                'assets': [{'name': 'a.js', 'size': 1}],
+                'time': 10,
+            }],
+        }).encode('utf8'), 0)
+
+        webpack = toolchain.WebpackToolchain()
+        with pretty_logging(stream=mocks.StringIO()):
+            self.assertEqual([spec], webpack.batch([spec]))
+        # the advice package was applied through the advice registry
+        # by the inherited setup, with its delayed advice executed.
+        self.assertEqual([
+            pkg_resources.Requirement.parse('example.package[extra]'),
+        ], spec['advice_packages_applied_requirements'])
+        self.assertEqual([
+            (['example.package[extra]'], ['extra']),
+        ], spec['marker_delayed'])
+
+
+class ToolchainWatchTestCase(unittest.TestCase):
+    """
+    Test the watch mode of the toolchain.
+    """
+
+    def setUp(self):
+        self.src_dir = utils.mkdtemp(self)
+        self.build_dir = utils.mkdtemp(self)
+        self.source = join(self.src_dir, 'mod1.js')
+        with open(self.source, 'w') as fd:
+            fd.write("var mod2 = require('mod2');\n")
+        self.bundled = join(self.src_dir, 'bundled.js')
+        with open(self.bundled, 'w') as fd:
+            fd.write("var bundled = 1;\n")
+        self.webpack = toolchain.WebpackToolchain()
+        self.spec = Spec(
+            build_dir=self.build_dir,
+            transpile_sourcepath={'mod1': self.source},
+            bundle_sourcepath={'bundled': self.bundled},
+            webpack_config_js=join(self.build_dir, 'config.js'),
+            toolchain_bin_path=join(self.build_dir, 'webpack'),
+            webpack_watch=True,
+        )
+        self.webpack.compile(self.spec)
+
+    def test_watch_sourcepaths(self):
+        sourcepaths = self.webpack.watch_sourcepaths(self.spec)
+        self.assertEqual(
+            sorted([self.source, self.bundled]), sorted(sourcepaths))
+        self.assertEqual(
+            [('transpile', ('mod1', self.source, 'mod1.js', 'mod1'))],
+            sourcepaths[self.source],
+        )
+
+    def test_recompile(self):
+        with open(self.source, 'w') as fd:
+            fd.write("var mod3 = require('mod3');\n")
+        self.webpack.recompile(
+            self.spec, self.webpack.watch_sourcepaths(self.spec),
+            [self.source],
+        )
+        with open(join(self.build_dir, 'mod1.js')) as fd:
+            self.assertIn('mod3', fd.read())
+        self.assertEqual(
+            ['mod3'],
+            self.spec['transpiled_imports'][join(self.build_dir, 'mod1.js')],
+        )
+
+    def stub_watcher(self, on_sleep, returncode=0):
+        calls = []
+        sleeps = []
+
+        class Process(object):
+            def __init__(self, args, **kw):
+                calls.append(args)
+                self.returncode = None
+                self.stdout = None
+
+            def poll(self):
+                if len(sleeps) > 1:
+                    self.returncode = returncode
+                return self.returncode
+
+            def terminate(self):
+                calls.append('terminate')
+                self.returncode = -15
+
+            def wait(self):
+                return self.returncode
+
+        def sleep(interval):
+            sleeps.append(interval)
+            on_sleep(len(sleeps))
+
+        utils.stub_item_attr_value(self, toolchain, 'Popen', Process)
+        utils.stub_item_attr_value(self, toolchain, 'sleep', sleep)
+        return calls
+
+    def test_link_watch(self):
+        def on_sleep(count):
+            if count == 1:
+                # also change the size, for coarse modification times.
+                with open(self.source, 'w') as fd:
+                    fd.write("var mod3 = require('mod3'), mod4;\n")
+
+        calls = self.stub_watcher(on_sleep)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            self.webpack.link(self.spec)
+
+        config_js = join(self.build_dir, '__calmjs_webpack_watch__.js')
+        self.assertEqual((
+            join(self.build_dir, 'webpack'), '--watch', '--config', config_js,
+        ), calls[0])
+        with open(config_js) as fd:
+            self.assertIn(json.dumps(join(self.build_dir, 'config.js')), (
+                fd.read()))
+        self.assertIn('watching 2 source file(s) for changes', s.getvalue())
+        self.assertIn('compiling 1 changed source file(s)', s.getvalue())
+        with open(join(self.build_dir, 'mod1.js')) as fd:
+            self.assertIn('mod3', fd.read())
+
+    @unittest.skipIf(get_node_version() is None, 'node not available')
+    def test_link_watch_cli_output_file_system(self):
+        self.stub_watcher(lambda count: None)
+        output_dir = utils.mkdtemp(self)
+        with open(self.spec['webpack_config_js'], 'w') as fd:
+            fd.write('module.exports = {"plugins": [1]};\n')
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            self.webpack.link(self.spec)
+
+        unchanged = join(output_dir, 'unchanged.js')
+        changed = join(output_dir, 'changed.js')
+        for path in (unchanged, changed):
+            with open(path, 'w') as fd:
+                fd.write('var a = 1;')
+        os.utime(unchanged, (0, 0))
+        # keep a hard link to the original to verify that it is replaced
+        # rather than written in place.
+        os.link(changed, changed + '.orig')
+
+        stdout, stderr = run_node(textwrap.dedent("""
+        var fs = require('fs');
+        var config = require(%s);
+        var compiler = {'outputFileSystem': fs};
+        config.plugins[1].apply(compiler);
+        console.log('plugins: ' + config.plugins.length);
+        compiler.outputFileSystem.writeFile(%s, 'var a = 1;', function() {
+            compiler.outputFileSystem.writeFile(%s, 'var a = 2;', function() {
+                console.log('done');
+            });
+        });
+        """) % (
+            json.dumps(join(self.build_dir, '__calmjs_webpack_watch__.js')),
+            json.dumps(unchanged), json.dumps(changed),
+        ))
+        self.assertEqual('plugins: 2\ndone\n', stdout)
+        self.assertEqual(0, os.stat(unchanged).st_mtime)
+        with open(changed) as fd:
+            self.assertEqual('var a = 2;', fd.read())
+        with open(changed + '.orig') as fd:
+            self.assertEqual('var a = 1;', fd.read())
+
+    def test_link_watch_compile_error(self):
+        def on_sleep(count):
+            if count == 1:
+                with open(self.source, 'w') as fd:
+                    fd.write("var mod3 = ;\n")
+
+        self.stub_watcher(on_sleep)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            self.webpack.link(self.spec)
+        self.assertIn('failed to compile changed sources', s.getvalue())
+
+    def test_link_watch_interrupted(self):
+        def on_sleep(count):
+            raise KeyboardInterrupt()
+
+        calls = self.stub_watcher(on_sleep)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            self.webpack.link(self.spec)
+        self.assertIn('stopping watch mode', s.getvalue())
+        self.assertEqual('terminate', calls[-1])
+
+    def test_link_watch_webpack_failure(self):
+        self.stub_watcher(lambda count: None, returncode=1)
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()):
+            with self.assertRaises(toolchain.WebpackExitError):
+                self.webpack.link(self.spec)
+
+
+class ToolchainArtifactCacheTestCase(unittest.TestCase):
+    """
+    Test the link step with the artifact cache.
+    """
+
+    def setUp(self):
+        self.output_dir = utils.mkdtemp(self)
+        self.cache_dir = utils.mkdtemp(self)
+        self.export_target = join(self.output_dir, 'bundle.js')
+        self.calls = []
+
+        class Popen(object):
+            def __init__(inner, args, **kw):
+                self.calls.append(args)
+                inner.returncode = 0
+                with open(self.export_target, 'w') as fd:
+                    fd.write('var bundle = %d;' % len(self.calls))
+
+            def communicate(inner):
+                return json.dumps({
+                    'errors': [],
+                    'warnings': [],
+                    'assets': [{'name': 'bundle.js', 'size': 15}],
+                    'time': 1,
+                }).encode('utf8'), None
+
+        utils.stub_item_attr_value(self, toolchain, 'Popen', Popen)
+
+    def make_spec(self, source='var mod = 1;'):
+        build_dir = utils.mkdtemp(self)
+        with open(join(build_dir, 'mod.js'), 'w') as fd:
+            fd.write(source)
+        return Spec(
+            build_dir=build_dir,
+            export_target=self.export_target,
+            webpack_config_js=join(build_dir, 'config.js'),
+            webpack_config=WebpackConfig({
+                'entry': join(build_dir, 'mod.js'),
+                'output': {'path': self.output_dir},
+            }),
+            webpack_link_driver='node',
+            artifact_cache_dir=self.cache_dir,
+        )
+
+    def link(self, spec):
+        with pretty_logging(
+                logger='calmjs.webpack', stream=mocks.StringIO()) as s:
+            toolchain.WebpackToolchain().link(spec)
+        return s.getvalue()
+
+    def test_artifact_fingerprint(self):
+        webpack = toolchain.WebpackToolchain()
+        spec1 = self.make_spec()
+        spec2 = self.make_spec()
+        spec3 = self.make_spec('var mod = 2;')
+        self.assertEqual(
+            webpack.artifact_fingerprint(spec1),
+            webpack.artifact_fingerprint(spec2),
+        )
+        self.assertNotEqual(
+            webpack.artifact_fingerprint(spec1),
+            webpack.artifact_fingerprint(spec3),
+        )
+        spec2['webpack_config']['__webpack_target__'] = (3, 0, 0)
+        self.assertNotEqual(
+            webpack.artifact_fingerprint(spec1),
+            webpack.artifact_fingerprint(spec2),
+        )
+
+    def test_link_cached(self):
+        self.link(self.make_spec())
+        self.assertEqual(1, len(self.calls))
+        os.remove(self.export_target)
+
+        log = self.link(self.make_spec())
+        self.assertIn('skipping webpack', log)
+        self.assertEqual(1, len(self.calls))
+        with open(self.export_target) as fd:
+            self.assertEqual('var bundle = 1;', fd.read())
+
+        self.link(self.make_spec('var mod = 2;'))
+        self.assertEqual(2, len(self.calls))
+        with open(self.export_target) as fd:
+            self.assertEqual('var bundle = 2;', fd.read())
+
+    def test_link_cached_link(self):
+        spec = self.make_spec()
+        spec['artifact_cache_link'] = True
+        self.link(spec)
+        fingerprint = spec['artifact_fingerprint']
+        self.assertTrue(os.path.samefile(self.export_target, join(
+            self.cache_dir, fingerprint, 'bundle.js')))
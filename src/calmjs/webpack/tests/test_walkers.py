@@ -13,9 +13,10 @@ from calmjs.parse.walkers import ReprWalker
 from calmjs.parse.walkers import Walker
 
 from calmjs.webpack.walkers import _replace_list_item
-from calmjs.webpack.walkers import _replace_list_items
-from calmjs.webpack.walkers import _replace_obj_attr
 from calmjs.webpack.walkers import ReplacementWalker
+from calmjs.webpack.walkers import filter_slots
+from calmjs.webpack.walkers import find_slots
+from calmjs.webpack.walkers import replace_slots
 
 astrepr = partial(ReprWalker().walk, indent=2)
 
@@ -29,7 +30,7 @@ class ReplacementHelperTestCase(unittest.TestCase):
         _replace_list_item(items, 1, 'str')
         self.assertEqual(items, [1, 'str', 5])
 
-    def test_replace_list_items(self):
+    def test_replace_slots_list_items(self):
         class Foo(object):
             pass
 
@@ -38,15 +39,21 @@ class ReplacementHelperTestCase(unittest.TestCase):
         item_c = tuple([2, 1])
         o = Foo()
         o.items = [item_a, item_b, item_c]
-        replacements = {
-            item_b: tuple(['replaced', 'thing']),
-        }
-        _replace_list_items(o, 'items', {})
+        replacement = tuple(['replaced', 'thing'])
+        replace_slots([])
+        self.assertEqual(o.items, [item_a, item_b, item_c])
+        # the empty replacements are skipped for the list items.
+        replace_slots([
+            (container, key, None) for container, key in find_slots(o, item_b)
+        ])
         self.assertEqual(o.items, [item_a, item_b, item_c])
-        _replace_list_items(o, 'items', replacements)
-        self.assertEqual(o.items, [item_a, replacements[item_b], item_c])
+        replace_slots([
+            (container, key, replacement)
+            for container, key in find_slots(o, item_b)
+        ])
+        self.assertEqual(o.items, [item_a, replacement, item_c])
 
-    def test_replace_obj_attr(self):
+    def test_replace_slots_obj_attr(self):
         class Foo(object):
             pass
 
@@ -57,14 +64,16 @@ class ReplacementHelperTestCase(unittest.TestCase):
         o.attr1 = attr1
         o.attr2 = attr2
 
-        replacements = {attr2: attr3}
-
         # mimic real usage
-        _replace_obj_attr(o, 'attr1', replacements)
+        replace_slots([
+            (container, key, attr3) for container, key in find_slots(o, attr3)
+        ])
         self.assertEqual(o.attr1, attr1)
         self.assertEqual(o.attr2, attr2)
 
-        _replace_obj_attr(o, 'attr2', replacements)
+        replace_slots([
+            (container, key, attr3) for container, key in find_slots(o, attr2)
+        ])
         self.assertEqual(o.attr1, attr1)
         self.assertEqual(o.attr2, attr3)
 
@@ -94,3 +103,73 @@ class ReplacementTestCase(unittest.TestCase):
         "test string";
         f4();
         """).lstrip())
+
+    def test_replace_empty_nodemap(self):
+        class Tree(object):
+            def __iter__(self):
+                raise AssertionError('tree walked')
+
+        ReplacementWalker().replace(Tree(), {})
+
+    def test_replace_nested(self):
+        walker = Walker()
+        tree = es5("""
+        f1(f2(f3()));
+        """)
+        calls = list(walker.filter(
+            tree, lambda n: isinstance(n, FunctionCall)))
+        replacer = ReplacementWalker()
+        replacer.replace(tree, {
+            calls[1]: String('"two"'),
+            calls[2]: String('"three"'),
+        })
+        self.assertEqual(str(tree), 'f1("two");\n')
+
+
+class SlotsTestCase(unittest.TestCase):
+
+    def test_find_slots(self):
+        class Foo(object):
+            pass
+
+        child = Foo()
+        parent = Foo()
+        parent.attr = child
+        parent.items = [Foo(), child, child]
+        parent.other = Foo()
+        self.assertEqual(sorted([
+            (parent.items, 1),
+            (parent.items, 2),
+            (parent, 'attr'),
+        ], key=repr), sorted(find_slots(parent, child), key=repr))
+        self.assertEqual([], find_slots(parent, Foo()))
+
+    def test_filter_slots(self):
+        walker = Walker()
+        tree = es5("""
+        f1(f2(), [f3()]);
+        var a = f4();
+        """)
+
+        def condition(n):
+            return isinstance(n, FunctionCall)
+
+        slots = list(filter_slots(tree, condition))
+        self.assertEqual(
+            list(walker.filter(tree, condition)),
+            [node for container, key, node in slots],
+        )
+        for container, key, node in slots:
+            if isinstance(container, list):
+                self.assertIs(node, container[key])
+            else:
+                self.assertIs(node, getattr(container, key))
+
+        replace_slots([
+            (container, key, String('"%d"' % idx))
+            for idx, (container, key, node) in enumerate(slots)
+        ])
+        self.assertEqual(str(tree), textwrap.dedent("""
+        "0";
+        var a = "3";
+        """).lstrip())
@@ -6,47 +6,103 @@ Toolchain for using webpack with calmjs.
 from __future__ import unicode_literals
 
 import codecs
+import errno
 from functools import partial
+import hashlib
 import json
 import logging
+import re
+import shutil
 import sys
+from multiprocessing import Pool
+from os import makedirs
+from os import mkdir
+from os import remove
+from os import stat
+from os import walk
 from os.path import basename
 from os.path import dirname
 from os.path import join
 from os.path import exists
+from os.path import isabs
 from os.path import isdir
+from os.path import isfile
 from os.path import pathsep
+from os.path import realpath
+from os.path import relpath
+from os.path import sep
+from os.path import splitext
+from subprocess import PIPE
+from subprocess import Popen
 from subprocess import call
+from tempfile import mkdtemp
+from threading import Thread
+from time import sleep
 
 from calmjs.types.exceptions import ToolchainAbort
-from calmjs.cli import get_bin_version
+from calmjs.types.exceptions import ToolchainCancel
 from calmjs.toolchain import ES5Toolchain
+from calmjs.toolchain import Spec
 from calmjs.toolchain import ToolchainSpecCompileEntry
 from calmjs.toolchain import CALMJS_LOADERPLUGIN_REGISTRY
 from calmjs.toolchain import CONFIG_JS_FILES
 from calmjs.toolchain import EXPORT_TARGET
 from calmjs.toolchain import EXPORT_MODULE_NAMES
 from calmjs.toolchain import BUILD_DIR
+from calmjs.toolchain import GENERATE_SOURCE_MAP
 from calmjs.toolchain import TOOLCHAIN_BIN_PATH
+from calmjs.toolchain import SETUP
+from calmjs.toolchain import CLEANUP
+from calmjs.toolchain import SUCCESS
+from calmjs.toolchain import BEFORE_LINK
+from calmjs.toolchain import AFTER_LINK
+from calmjs.toolchain import BEFORE_FINALIZE
+from calmjs.toolchain import AFTER_FINALIZE
+from calmjs.toolchain import DEBUG
+from calmjs.toolchain import log_exc_reason
 from calmjs.toolchain import toolchain_spec_prepare_loaderplugins
+from calmjs.toolchain import dict_setget_dict
 from calmjs.interrogate import yield_module_imports
 from calmjs.utils import json_dumps
+from calmjs.utils import raise_os_error
 
-from calmjs.parse.parsers.es5 import parse
+from calmjs.parse.exceptions import ECMASyntaxError
 from calmjs.parse import io
 from calmjs.parse.utils import repr_compat
 
+from calmjs.webpack.interrogation import prescan_module_imports
+from calmjs.webpack.interrogation import write_export_manifest
+from calmjs.webpack.manipulation import convert_dynamic_require
 from calmjs.webpack.manipulation import convert_dynamic_require_unparser
+from calmjs.webpack.manipulation import extract_dynamic_require
+from calmjs.webpack.manipulation import record_module_imports_hook
+from calmjs.webpack.manipulation import write_dynamic_require_spliced
+from calmjs.webpack.parsers import parse
+from calmjs.webpack.parsers import warm_up
 from calmjs.webpack.base import DEFAULT_CALMJS_EXPORT_NAME
 from calmjs.webpack.base import WEBPACK_MODULE_RULES
 from calmjs.webpack.loaderplugin import update_spec_webpack_loaders_modules
 from calmjs.webpack.configuration import WebpackConfig
-
+from calmjs.webpack.configuration import CHUNK_MANIFEST_SUFFIX
+
+from .cache import ArtifactCache
+from .cache import BuildManifest
+from .cache import FileRecordCache
+from .cache import file_digest
+from .cache import get_cached_bin_version
+from .cache import write_if_changed
 from .dev import webpack_advice
 from .env import webpack_env
+from .report import add_reported_timing
+from .report import record_timing
+from .report import timed
+from .report import write_build_report
 from .exc import WebpackRuntimeError
 from .exc import WebpackExitError
 
+from .base import CALMJS_ASYNC_LOADER
+from .base import CALMJS_LAZY_LOADER
+from .base import WEBPACK_SPLIT_CHUNKS
 from .base import CALMJS_WEBPACK_LOADERPLUGINS
 from .base import WEBPACK_CONFIG
 from .base import WEBPACK_EXTERNALS
@@ -56,7 +112,30 @@ from .base import WEBPACK_ENTRY_POINT
 from .base import WEBPACK_OPTIMIZE_MINIMIZE
 from .base import WEBPACK_DEVTOOL
 from .base import WEBPACK_MODE
+from .base import ARTIFACT_CACHE_DIR
+from .base import ARTIFACT_CACHE_LINK
+from .base import ARTIFACT_FINGERPRINT
+from .base import BUILD_JOBS
+from .base import BUILD_REPORT
+from .base import BUILD_MANIFEST
+from .base import INCREMENTAL_BUILD
+from .base import TRANSPILED_IMPORTS
+from .base import TRANSPILE_PASSTHROUGH
+from .base import TRANSPILE_REWRITER
 from .base import VERIFY_IMPORTS
+from .base import VERIFY_IMPORTS_CACHE
+from .base import VERIFY_IMPORTS_PRESCAN
+from .base import WEBPACK_VERSION_CACHE
+from .base import WEBPACK_LINK_DRIVER
+from .base import WEBPACK_BUILD_RESULT
+from .base import WEBPACK_WATCH
+from .base import LINK_DRIVER_CLI
+from .base import LINK_DRIVER_NODE
+from .base import DEFAULT_LINK_DRIVER
+from .base import DEFAULT_TRANSPILE_REWRITER
+from .base import REWRITER_SPLICE
+from .base import REWRITER_UNPARSE
+from .base import TRANSPILE_REWRITERS
 from .base import DEFAULT_BOOTSTRAP_EXPORT
 from .base import DEFAULT_BOOTSTRAP_EXPORT_CONFIG
 from .base import DEFAULT_WEBPACK_DEVTOOL
@@ -75,6 +154,19 @@ _DEFAULT_BOOTSTRAP_FILENAME = '__calmjs_bootstrap__.js'
 # name for the extended loader module, usually will be working in
 # conjunction with DEFAULT_CALMJS_EXPORT_NAME
 _DEFAULT_LOADER_FILENAME = '__calmjs_loader__.js'
+# the manifest of the sources processed for incremental builds
+_DEFAULT_BUILD_MANIFEST_FILENAME = '__calmjs_build_manifest__.json'
+# the script for invoking webpack through its node API
+_DEFAULT_DRIVER_FILENAME = '__calmjs_webpack_driver__.js'
+# the configuration for the cli driver in watch mode
+_DEFAULT_WATCH_CONFIG_FILENAME = '__calmjs_webpack_watch__.js'
+_DEFAULT_NODE = 'node'
+# the lockfiles for the packages within node_modules, which are either
+# found alongside or within node_modules.
+_NODE_LOCKFILE_NAMES = (
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock')
+_NODE_MODULES_LOCKFILE_NAMES = ('.package-lock.json', '.yarn-integrity')
+_VERSION_PATTERN = re.compile(r'^(\d+)\.(\d+)\.(\d+)')
 
 # TODO document how the custom loader will ONLY work for
 # libraryTarget: "window", but
@@ -123,6 +215,145 @@ exports.require = function(modules, f) {
 };
 """, "    %(module)s: require(%(module)s)", ",\n",
 
+# the lazy version of the loader module above, where the modules are
+# only required when first accessed, with the result then memoized as
+# the value on the object that it was accessed through.
+_WEBPACK_CALMJS_MODULE_LAZY_LOADER_TEMPLATE = """'use strict';
+
+var calmjs_bootstrap = require('__calmjs__') || {};
+var externals = calmjs_bootstrap.modules || {};
+// also exported such that the names remain discoverable from within
+// the generated artifact.
+var loaders = exports.loaders = {
+%s
+};
+
+var memoize = function(target, name, value) {
+    Object.defineProperty(target, name, {
+        'value': value,
+        'writable': true,
+        'enumerable': true,
+        'configurable': true
+    });
+    return value;
+};
+
+exports.modules = {};
+Object.keys(loaders).forEach(function(name) {
+    Object.defineProperty(exports.modules, name, {
+        'get': function() {
+            return memoize(this, name, loaders[name]());
+        },
+        'set': function(value) {
+            memoize(this, name, value);
+        },
+        'enumerable': true,
+        'configurable': true
+    });
+});
+
+exports.require = function(modules, f) {
+    if (modules.map) {
+        f.apply(null, modules.map(function(m) {
+            return exports.modules[m] || externals[m];
+        }));
+    }
+    else {
+        // assuming the synchronous version
+        return exports.modules[modules] || externals[modules];
+    }
+};
+""", "    %(module)s: function() { return require(%(module)s); }", ",\n",
+
+# the asynchronous version of the loader module, where each module is
+# behind a split point such that webpack will fetch the chunk for it
+# when it is first required asynchronously; until then, accessing the
+# module synchronously raises an error.
+_WEBPACK_CALMJS_MODULE_ASYNC_LOADER_TEMPLATE = """'use strict';
+
+var calmjs_bootstrap = require('__calmjs__') || {};
+var externals = calmjs_bootstrap.modules || {};
+// also exported such that the names remain discoverable from within
+// the generated artifact.
+var loaders = exports.loaders = {
+%s
+};
+var loaded = {};
+
+var memoize = function(target, name, value) {
+    Object.defineProperty(target, name, {
+        'value': value,
+        'writable': true,
+        'enumerable': true,
+        'configurable': true
+    });
+    return value;
+};
+
+exports.modules = {};
+Object.keys(loaders).forEach(function(name) {
+    Object.defineProperty(exports.modules, name, {
+        'get': function() {
+            if (!loaded.hasOwnProperty(name)) {
+                throw new Error(
+                    "module '" + name + "' is not loaded; it must be " +
+                    "required asynchronously before it may be accessed");
+            }
+            return memoize(this, name, loaded[name]);
+        },
+        'set': function(value) {
+            memoize(this, name, value);
+        },
+        'enumerable': true,
+        'configurable': true
+    });
+});
+
+var load = function(name, callback) {
+    if (loaded.hasOwnProperty(name)) {
+        callback(loaded[name]);
+    }
+    else if (loaders.hasOwnProperty(name)) {
+        loaders[name](function(module) {
+            loaded[name] = module;
+            callback(module);
+        });
+    }
+    else {
+        callback(externals[name]);
+    }
+};
+
+exports.require = function(modules, f) {
+    if (modules.map) {
+        var results = [];
+        var remaining = modules.length;
+        var done = function() {
+            if (f) {
+                f.apply(null, results);
+            }
+        };
+        if (!remaining) {
+            return done();
+        }
+        modules.forEach(function(m, i) {
+            load(m, function(module) {
+                results[i] = module;
+                remaining -= 1;
+                if (!remaining) {
+                    done();
+                }
+            });
+        });
+    }
+    else {
+        // the synchronous version is only able to return the modules
+        // that have already been loaded; the others will raise.
+        return exports.modules[modules] || externals[modules];
+    }
+};
+""", "    %(module)s: function(f) { require([%(module)s], f); }", ",\n",
+
 # the more complicated version: load both the exported module along with
 # the loader module, and assemble this and export for the pass through
 # effect.
@@ -135,8 +366,155 @@ var external_modules = calmjs_bootstrap.modules || {};
 exports.require = calmjs_loader.require;
 exports.modules = external_modules;
 for (var k in calmjs_loader.modules) {
-    exports.modules[k] = calmjs_loader.modules[k];
+    // copy the property as is, such that lazily loaded modules are not
+    // evaluated here.
+    Object.defineProperty(exports.modules, k, Object.getOwnPropertyDescriptor(
+        calmjs_loader.modules, k));
+}
+"""
+
+# appended to the bootstrap module for when the chunks are split, such
+# that they are loaded relative to the location of the artifact.
+_WEBPACK_ENTRY_CALMJS_PUBLIC_PATH_TEMPLATE = """
+if (typeof document !== 'undefined' && document.currentScript) {
+    __webpack_public_path__ = document.currentScript.src.replace(
+        /[^\\/]*$/, '');
+}
+"""
+
+# the wrapper of the output filesystem of webpack for the generated
+# scripts, which must provide fs; it leaves the emitted files that are
+# identical to the existing ones untouched, and atomically replaces the
+# others.
+_WEBPACK_OUTPUT_FILE_SYSTEM = """var outputFileSystem = function(ofs) {
+    var wrapped = Object.create(ofs);
+    wrapped.writeFile = function(target, content, callback) {
+        fs.readFile(target, function(err, existing) {
+            if (!err && existing.equals(Buffer.from(content))) {
+                return callback();
+            }
+            var temp = target + '.' + process.pid + '.tmp';
+            ofs.writeFile(temp, content, function(err) {
+                if (err) {
+                    return callback(err);
+                }
+                fs.rename(temp, target, callback);
+            });
+        });
+    };
+    return wrapped;
+};
+"""
+
+# the node driver script; build webpack with the configuration through
+# its node API and write a compact JSON summary of the result as the
+# final line of the standard output.
+_WEBPACK_NODE_DRIVER_TEMPLATE = """'use strict';
+
+var fs = require('fs');
+var webpack = require('webpack');
+var config = require(%(config)s);
+var watch = %(watch)s;
+
+var message = function(e) {
+    return typeof e === 'string' ? e : String(e.message || e);
+};
+
+var summarize = function(stats) {
+    var info = stats.toJson({
+        'all': false,
+        'errors': true,
+        'warnings': true,
+        'assets': true,
+        'timings': true
+    });
+    return {
+        'version': webpack.version || null,
+        'errors': (info.errors || []).map(message),
+        'warnings': (info.warnings || []).map(message),
+        'assets': (info.assets || []).map(function(asset) {
+            return {'name': asset.name, 'size': asset.size};
+        }),
+        'time': info.time === undefined ? null : info.time
+    };
+};
+
+var report = function(err, stats) {
+    var result = {
+        'version': webpack.version || null,
+        'errors': [],
+        'warnings': [],
+        'assets': [],
+        'time': null
+    };
+    if (err) {
+        result.errors.push(String(err.stack || err));
+    }
+    else if (stats.stats) {
+        // a multi-compiler build; report each of the compilations.
+        result.children = stats.stats.map(summarize);
+        result.children.forEach(function(child) {
+            result.errors = result.errors.concat(child.errors);
+        });
+    }
+    else {
+        result = summarize(stats);
+    }
+    process.stdout.write('\\n' + JSON.stringify(result) + '\\n');
+    if (!watch) {
+        process.exitCode = result.errors.length ? 2 : 0;
+    }
+};
+
+""" + _WEBPACK_OUTPUT_FILE_SYSTEM + """
+var compiler = webpack(config);
+(compiler.compilers || [compiler]).forEach(function(child) {
+    child.outputFileSystem = outputFileSystem(child.outputFileSystem);
+});
+
+if (watch) {
+    // keep the compiler and its module graph for the rebuilds.
+    compiler.watch({}, report);
 }
+else {
+    compiler.run(report);
+}
+"""
+
+# the configuration for the multi-compiler build of a batch.
+_WEBPACK_BATCH_CONFIG_TEMPLATE = """'use strict';
+
+module.exports = [
+%s
+];
+"""
+
+# the configuration for the cli driver, which has webpack emit into the
+# staging directory rather than over the export target.
+_WEBPACK_CLI_CONFIG_TEMPLATE = """'use strict';
+
+var config = require(%(config)s);
+config.output.path = %(path)s;
+module.exports = config;
+"""
+
+# the configuration for the cli driver in watch mode, where the emitted
+# files are written through the same output filesystem as the node
+# driver, as there is no single point at which staged files may be moved
+# into place.
+_WEBPACK_CLI_WATCH_CONFIG_TEMPLATE = """'use strict';
+
+var fs = require('fs');
+var config = require(%(config)s);
+
+""" + _WEBPACK_OUTPUT_FILE_SYSTEM + """
+config.plugins = (config.plugins || []).concat([{
+    'apply': function(compiler) {
+        compiler.outputFileSystem = outputFileSystem(
+            compiler.outputFileSystem);
+    }
+}]);
+module.exports = config;
 """
 
 
@@ -144,6 +522,225 @@ def get_webpack_runtime_name(platform):
     return _PLATFORM_SPECIFIC_RUNTIME.get(platform, _DEFAULT_RUNTIME)
 
 
+def find_webpack_package_version(node_modules_dirs):
+    """
+    Return the version of the first webpack package found within the
+    provided node_modules directories as a tuple of integers, read from
+    its package.json; return None if not found.
+    """
+
+    for node_modules in node_modules_dirs:
+        package_json = join(node_modules, 'webpack', 'package.json')
+        if not isfile(package_json):
+            continue
+        try:
+            with codecs.open(package_json, encoding='utf8') as fd:
+                match = _VERSION_PATTERN.match(json.load(fd)['version'])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.debug("unable to read version from '%s'", package_json)
+            continue
+        if match:
+            return tuple(int(i) for i in match.groups())
+    return None
+
+
+def parse_node_driver_result(output):
+    """
+    Return the build result reported by the node driver as the final
+    line of the output; None if that is not available.
+    """
+
+    lines = output.strip().splitlines()
+    if not lines:
+        return None
+    try:
+        result = json.loads(lines[-1])
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def log_node_driver_result(result):
+    """
+    Log the contents of a build result reported by the node driver.
+    """
+
+    for warning in result.get('warnings', []):
+        logger.warning('webpack: %s', warning)
+    for error in result.get('errors', []):
+        logger.error('webpack: %s', error)
+    for asset in result.get('assets', []):
+        logger.info(
+            "webpack emitted '%s' (%s bytes)",
+            asset.get('name'), asset.get('size'),
+        )
+    logger.info(
+        'webpack %s completed in %s ms',
+        result.get('version'), result.get('time'),
+    )
+
+
+def snapshot_sources(paths):
+    """
+    Return a mapping from the provided paths to their modification time
+    and size; paths that cannot be accessed are omitted.
+    """
+
+    result = {}
+    for path in paths:
+        try:
+            st = stat(path)
+        except OSError:
+            continue
+        result[path] = (st.st_mtime, st.st_size)
+    return result
+
+
+def report_node_driver_results(stream):
+    """
+    Log every build result reported by a node driver in watch mode
+    through the provided output stream, until it is closed.
+    """
+
+    for line in iter(stream.readline, b''):
+        result = parse_node_driver_result(line.decode('utf8', 'replace'))
+        if result is not None:
+            log_node_driver_result(result)
+
+
+def move_staged_files(staging_dir, target_dir):
+    """
+    Move the files within staging_dir into the same relative locations
+    within target_dir through write_if_changed, such that the existing
+    files with identical content are left untouched and the others are
+    replaced atomically.  Return the list of the files written.
+    """
+
+    written = []
+    for root, dirs, files in walk(staging_dir):
+        for name in sorted(files):
+            source = join(root, name)
+            target = join(target_dir, relpath(source, staging_dir))
+            if not isdir(dirname(target)):
+                makedirs(dirname(target))
+            with open(source, 'rb') as fd:
+                if write_if_changed(target, fd.read()):
+                    written.append(target)
+    return written
+
+
+def parse_source_text(text, path):
+    """
+    Parse the ES5 source text read from path into a tree, with the path
+    included in the syntax errors raised and assigned as the sourcepath
+    of the tree, as done by calmjs.parse.io.read.
+    """
+
+    try:
+        tree = parse(text)
+    except ECMASyntaxError as e:
+        raise type(e)('%s in %s' % (str(e), repr_compat(path)))
+    tree.sourcepath = path
+    return tree
+
+
+def read_module_imports(path, prescan=False):
+    """
+    Parse the ES5 source file at path and return the list of the names
+    of the modules that it imports.  If prescan is enabled, the file is
+    only parsed if the scan of its tokens cannot determine that, such
+    that its syntax is only checked by its lexer otherwise; the full
+    check of the syntax is left to the transpile, which always parses.
+    """
+
+    with codecs.open(path, 'r', encoding='utf8') as fd:
+        text = fd.read()
+    imports = prescan_module_imports(text) if prescan else None
+    if imports is None:
+        imports = list(yield_module_imports(parse_source_text(text, path)))
+    return imports
+
+
+def read_all_module_imports(paths, jobs=1, prescan=False):
+    """
+    Return a list with the names of the modules imported by each of the
+    files at the provided paths, in the same order.  If jobs is greater
+    than 1, the files will be parsed by a pool of worker processes.
+    The prescan flag is passed to read_module_imports.
+    """
+
+    reader = partial(read_module_imports, prescan=prescan)
+    jobs = min(jobs, len(paths))
+    if jobs < 2:
+        return [reader(path) for path in paths]
+
+    logger.debug(
+        "reading imports from %d files using %d worker processes",
+        len(paths), jobs,
+    )
+    pool = Pool(jobs, initializer=warm_up)
+    try:
+        return pool.map(reader, paths)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def transpile_source_target(
+        source, target, sourcemap=False, passthrough=False,
+        rewriter=DEFAULT_TRANSPILE_REWRITER):
+    """
+    Transpile the ES5 source file at source to target by rewriting the
+    dynamic requires with the specified rewriter, and optionally write
+    out the source map alongside the target.  If passthrough is enabled
+    and the source has no dynamic requires, the source is staged to
+    target verbatim instead, with any previous source map at target
+    removed.  Return a tuple of the list of the names of the modules
+    imported by the target and whether the source was staged verbatim.
+
+    This is the function executed by the worker processes for the
+    parallel transpile, so it must remain importable at module level.
+    """
+
+    opener = partial(codecs.open, encoding='utf8')
+    with opener(source, 'r') as fd:
+        text = fd.read()
+    # the source is always parsed, such that the invalid sources are
+    # rejected rather than staged verbatim.
+    tree = parse_source_text(text, source)
+
+    if passthrough and not any(extract_dynamic_require(tree)):
+        write_if_changed(target, text)
+        if exists(target + '.map'):
+            remove(target + '.map')
+        return list(yield_module_imports(tree)), True
+
+    if rewriter == REWRITER_SPLICE:
+        try:
+            write_dynamic_require_spliced(
+                text, tree, partial(opener, target, 'w'),
+                partial(opener, target + '.map', 'w') if sourcemap else None,
+            )
+        except ValueError as e:
+            logger.warning(
+                "unable to splice the dynamic requires in '%s', falling "
+                "back to the unparser: %s", source, e,
+            )
+        else:
+            return list(yield_module_imports(
+                convert_dynamic_require(tree))), False
+
+    imports = {}
+    unparser = convert_dynamic_require_unparser(prewalk_hooks=(
+        record_module_imports_hook(imports),
+    ))
+    io.write(
+        unparser, [tree], partial(opener, target, 'w'),
+        partial(opener, target + '.map', 'w') if sourcemap else None,
+    )
+    return imports[source], False
+
+
 def check_name_declared(alias, loaders, externals, loader_registry, name):
     """
     Helper to check whether the name provided is in the preceding alias
@@ -189,15 +786,27 @@ class WebpackToolchain(ES5Toolchain):
     webpack_bin_key = TOOLCHAIN_BIN_PATH
     webpack_bin = get_webpack_runtime_name(sys.platform)
     webpack_config_name = 'config.js'
+    node_bin = _DEFAULT_NODE
+    # the interval in seconds between the checks for changed sources in
+    # watch mode.
+    watch_interval = 0.5
     loaderplugin_registry = CALMJS_WEBPACK_LOADERPLUGINS
 
     def __init__(self, *a, **kw):
         super(WebpackToolchain, self).__init__(*a, **kw)
         self.binary = self.webpack_bin
+        # the pool and the pending results for the parallel transpile.
+        self._transpile_pool = None
+        self._transpile_pending = None
 
     def setup_transpiler(self):
         self.parser = parse
-        self.transpiler = convert_dynamic_require_unparser()
+        # the names of the modules imported by each source are recorded
+        # in here during the transpile, keyed by the source path.
+        self.transpiled_imports = {}
+        self.transpiler = convert_dynamic_require_unparser(prewalk_hooks=(
+            record_module_imports_hook(self.transpiled_imports),
+        ))
 
     def build_compile_entries(self):
         return super(WebpackToolchain, self).build_compile_entries() + (
@@ -207,8 +816,239 @@ class WebpackToolchain(ES5Toolchain):
         )
 
     def transpile_modname_source_target(self, spec, modname, source, target):
-        return super(WebpackToolchain, self).transpile_modname_source_target(
-            spec, modname, source, target)
+        rewriter = spec.get(TRANSPILE_REWRITER, DEFAULT_TRANSPILE_REWRITER)
+        if rewriter not in TRANSPILE_REWRITERS:
+            raise WebpackRuntimeError(
+                "unsupported transpile rewriter '%s'" % rewriter)
+
+        manifest = spec.get(BUILD_MANIFEST)
+        if manifest is not None:
+            record = manifest.lookup(
+                'transpiled', source, target,
+                sourcemap=bool(spec.get(GENERATE_SOURCE_MAP)),
+                passthrough=bool(spec.get(TRANSPILE_PASSTHROUGH)),
+                rewriter=rewriter,
+            )
+            if record is not None:
+                logger.debug(
+                    "skipping transpile of unchanged '%s' for modname '%s'",
+                    source, modname,
+                )
+                dict_setget_dict(spec, TRANSPILED_IMPORTS)[join(
+                    spec[BUILD_DIR], *target.split('/'))] = record['imports']
+                return
+
+        if self._transpile_pending is not None:
+            # parallel transpile in progress, defer to the pool.
+            bd_target = self._generate_transpile_target(spec, target)
+            logger.info('Transpiling %s to %s', source, bd_target)
+            self._transpile_pending.append((
+                modname, source, target, self._transpile_pool.apply_async(
+                    transpile_source_target, (
+                        source, bd_target,
+                        bool(spec.get(GENERATE_SOURCE_MAP)),
+                        bool(spec.get(TRANSPILE_PASSTHROUGH)),
+                        rewriter,
+                    ),
+                ),
+            ))
+            return
+
+        if spec.get(TRANSPILE_PASSTHROUGH) or rewriter != REWRITER_UNPARSE:
+            # the unparser of this instance is not necessarily used, so
+            # go through the same function used by the workers.
+            bd_target = self._generate_transpile_target(spec, target)
+            logger.info('Transpiling %s to %s', source, bd_target)
+            imports, passthrough = transpile_source_target(
+                source, bd_target, bool(spec.get(GENERATE_SOURCE_MAP)),
+                bool(spec.get(TRANSPILE_PASSTHROUGH)), rewriter,
+            )
+            self.record_transpiled(
+                spec, modname, source, target, imports, passthrough)
+            return
+
+        result = super(
+            WebpackToolchain, self).transpile_modname_source_target(
+                spec, modname, source, target)
+        # move the recorded imports to the spec, such that they may be
+        # used for the verification of imports without parsing the
+        # target again.
+        imports = self.transpiled_imports.pop(source, None)
+        if imports is not None:
+            self.record_transpiled(spec, modname, source, target, imports)
+        return result
+
+    def has_default_transpiler(self):
+        """
+        Return True if the transpiler and the transpile method are the
+        ones provided by this class, such that the transpile may be done
+        by the module level function used by the worker processes.
+        """
+
+        cls = type(self)
+        return all(next(
+            base for base in cls.__mro__ if name in vars(base)
+        ) is WebpackToolchain for name in (
+            'setup_transpiler', 'transpile_modname_source_target',
+        ))
+
+    def record_transpiled(
+            self, spec, modname, source, target, imports, passthrough=False):
+        """
+        Record the names of the imports of a transpiled target, and also
+        to the build manifest, if one is in use along with the rewriter;
+        passthrough denotes the target being a verbatim copy of the
+        source.
+        """
+
+        dict_setget_dict(spec, TRANSPILED_IMPORTS)[join(
+            spec[BUILD_DIR], *target.split('/'))] = imports
+        manifest = spec.get(BUILD_MANIFEST)
+        if manifest is not None:
+            manifest.set(
+                'transpiled', source, target,
+                sourcemap=(
+                    target + '.map' if spec.get(GENERATE_SOURCE_MAP) and
+                    not passthrough else None
+                ),
+                export_module_names=[modname],
+                imports=imports,
+                passthrough=passthrough,
+                rewriter=spec.get(
+                    TRANSPILE_REWRITER, DEFAULT_TRANSPILE_REWRITER),
+            )
+
+    def compile_transpile_entry(self, spec, entry):
+        # with the worker processes, only the submission of the entry
+        # happens here; the transpile is timed as a whole by compile.
+        name = 'compile.transpile' if self._transpile_pool is None else (
+            'compile.transpile.submit')
+        with record_timing(spec, name):
+            return super(WebpackToolchain, self).compile_transpile_entry(
+                spec, entry)
+
+    @timed('compile.loaderplugin')
+    def compile_loaderplugin_entry(self, spec, entry):
+        return super(WebpackToolchain, self).compile_loaderplugin_entry(
+            spec, entry)
+
+    @timed('compile.bundle')
+    def compile_bundle_entry(self, spec, entry):
+        """
+        Copy the bundle sources as per the parent, except for unchanged
+        files already in place for an incremental build.
+        """
+
+        modname, source, target, modpath = entry
+        manifest = spec.get(BUILD_MANIFEST)
+        if manifest is None or not isfile(source):
+            return super(WebpackToolchain, self).compile_bundle_entry(
+                spec, entry)
+
+        record = manifest.lookup('bundled', source, target)
+        if record is not None:
+            logger.debug(
+                "skipping copy of unchanged '%s' for modname '%s'",
+                source, modname,
+            )
+            return {modname: modpath}, {modname: target}, record[
+                'export_module_names']
+
+        result = super(WebpackToolchain, self).compile_bundle_entry(
+            spec, entry)
+        manifest.set(
+            'bundled', source, target, export_module_names=result[2])
+        return result
+
+    @timed('compile')
+    def compile(self, spec):
+        """
+        Compile everything as per the parent, but if BUILD_JOBS is set
+        to a value greater than 1, the transpile of the sources will be
+        distributed to a pool of that many worker processes.  The
+        results are collected in the original order of submission, such
+        that the same error will be reported for the same input.
+
+        Note that the worker processes will always make use of the
+        default transpiler provided by this class, so if a subclass has
+        overridden the transpiler, the transpile will be done in the
+        current process instead, with a warning logged.  With the
+        worker processes, the compile.transpile timing covers the entire
+        compile step up to the collection of the last result, while the
+        time taken by the submission of the entries is recorded as
+        compile.transpile.submit.
+
+        If INCREMENTAL_BUILD is enabled, a build manifest in the build
+        directory will be used to skip the sources that are unchanged
+        since the previous build, and to remove the files produced from
+        sources that are no longer part of the build.
+        """
+
+        manifest = None
+        if spec.get(INCREMENTAL_BUILD):
+            manifest = spec[BUILD_MANIFEST] = BuildManifest(join(
+                spec[BUILD_DIR], _DEFAULT_BUILD_MANIFEST_FILENAME,
+            ), spec[BUILD_DIR]).load()
+            logger.info(
+                "incremental build using manifest '%s'", manifest.path)
+
+        jobs = spec.get(BUILD_JOBS) or 1
+        if jobs > 1 and not self.has_default_transpiler():
+            logger.warning(
+                "the transpiler of '%s.%s' is overridden and so it cannot be "
+                "used by the worker processes; transpiling in the current "
+                "process instead", type(self).__module__, type(self).__name__,
+            )
+            jobs = 1
+
+        if jobs < 2:
+            super(WebpackToolchain, self).compile(spec)
+        else:
+            logger.info("transpiling using %d worker processes", jobs)
+            self._transpile_pool = Pool(jobs, initializer=warm_up)
+            self._transpile_pending = pending = []
+            try:
+                # the transpile spans from the submission of the first
+                # entry to the collection of the last result.
+                with record_timing(spec, 'compile.transpile'):
+                    super(WebpackToolchain, self).compile(spec)
+                    self._transpile_pool.close()
+                    self.collect_transpile_results(spec, pending)
+            finally:
+                self._transpile_pool.terminate()
+                self._transpile_pool.join()
+                self._transpile_pool = self._transpile_pending = None
+
+        if manifest is not None:
+            removed = manifest.prune()
+            if removed:
+                logger.info(
+                    "removed outputs of %d source(s) no longer part of the "
+                    "build", len(removed),
+                )
+            manifest.dump()
+
+    def collect_transpile_results(self, spec, pending):
+        """
+        Wait for the pending transpile results and record the imports;
+        the first failure will be raised after all results are in.
+        """
+
+        failures = []
+        for modname, source, target, result in pending:
+            try:
+                imports, passthrough = result.get()
+            except Exception as e:
+                logger.error(
+                    "failed to transpile '%s' for modname '%s': %s",
+                    source, modname, e,
+                )
+                failures.append(e)
+                continue
+            self.record_transpiled(
+                spec, modname, source, target, imports, passthrough)
+        if failures:
+            raise failures[0]
 
     def prepare_binary(self, spec):
         """
@@ -235,6 +1075,7 @@ class WebpackToolchain(ES5Toolchain):
         # settings required will only be needed then.
         return spec[self.webpack_bin_key]
 
+    @timed('prepare')
     def prepare(self, spec):
         """
         Attempts to locate the webpack binary if not already specified;
@@ -242,6 +1083,8 @@ class WebpackToolchain(ES5Toolchain):
         """
 
         self.prepare_binary(spec)
+        if spec.get(BUILD_REPORT):
+            spec.advise(SUCCESS, write_build_report, spec)
 
         spec['webpack_config_js'] = join(
             spec[BUILD_DIR], self.webpack_config_name)
@@ -270,6 +1113,13 @@ class WebpackToolchain(ES5Toolchain):
                 "'%s' must not be same as '%s'" % (EXPORT_TARGET, matched[0]))
 
         spec[WEBPACK_EXTERNALS] = spec.get(WEBPACK_EXTERNALS, {})
+        if spec.get(CALMJS_ASYNC_LOADER) and not spec.get(
+                WEBPACK_SPLIT_CHUNKS):
+            logger.info(
+                "enabling '%s' as required by '%s'",
+                WEBPACK_SPLIT_CHUNKS, CALMJS_ASYNC_LOADER,
+            )
+            spec[WEBPACK_SPLIT_CHUNKS] = True
         toolchain_spec_prepare_loaderplugins(
             self, spec, 'loaderplugin', WEBPACK_RESOLVELOADER_ALIAS)
         webpack_advice(spec)
@@ -288,10 +1138,24 @@ class WebpackToolchain(ES5Toolchain):
         ]
 
         export_module_path = join(spec[BUILD_DIR], target)
-        with codecs.open(export_module_path, 'w', encoding='utf8') as fd:
-            fd.write(template % joiner.join(exported))
+        write_if_changed(export_module_path, template % joiner.join(exported))
         return export_module_path
 
+    def write_export_manifest(self, spec):
+        """
+        Write the manifest of the names of the modules exported through
+        the calmjs loader next to the export target, if it was built.
+        """
+
+        if not isfile(spec[EXPORT_TARGET]):
+            logger.debug(
+                "export target '%s' not found; not writing export manifest",
+                spec[EXPORT_TARGET],
+            )
+            return None
+        return write_export_manifest(
+            spec[EXPORT_TARGET], spec[EXPORT_MODULE_NAMES])
+
     def write_bootstrap_module(
             self, spec, template=_WEBPACK_ENTRY_CALMJS_MODULE_EXPORT_TEMPLATE):
         """
@@ -299,20 +1163,41 @@ class WebpackToolchain(ES5Toolchain):
         """
 
         export_module_path = join(spec[BUILD_DIR], _DEFAULT_BOOTSTRAP_FILENAME)
-        with codecs.open(export_module_path, 'w', encoding='utf8') as fd:
-            fd.write(template)
+        write_if_changed(export_module_path, template)
         return export_module_path
 
     def write_webpack_config(self, spec, webpack_config):
-        with codecs.open(
-                spec['webpack_config_js'], 'w', encoding='utf8') as fd:
-            fd.write(str(webpack_config))
+        """
+        Write the webpack configuration, leaving the file untouched if
+        its content is unchanged such that the file watchers and the
+        caches of webpack are not invalidated.
+        """
 
-    def check_all_alias_declared(self, alias, name_checker):
-        missing = set()
+        write_if_changed(spec['webpack_config_js'], str(webpack_config))
+
+    def check_all_alias_declared(
+            self, alias, name_checker, cache=None, recorded=None, jobs=1,
+            prescan=False):
+        """
+        Check that all the imports made by the sources in the alias
+        mapping are declared, as determined by name_checker.  The names
+        of the imports for a given path will be sourced from the
+        recorded mapping if available, such as the one produced by the
+        transpile step.  If a FileRecordCache instance is provided as
+        cache, it will be used to look up and record the names imported
+        by each remaining source file.
+
+        The remaining source files will be parsed by a pool of worker
+        processes if jobs is greater than 1; the names are always
+        checked in this process.  If prescan is enabled, the files will
+        only be parsed if the scan of their tokens cannot determine the
+        names of their imports.
+        """
+
+        recorded = {} if recorded is None else recorded
+        resolved = {}
+        unresolved = []
         for modname, path in alias.items():
-            # look into how to throw in a preprocess hook to the
-            # unparser to report this, to maybe save on parse time.
             if not exists(path):
                 logger.warning(
                     "alias '%s' points to '%s' but file does not exist",
@@ -320,11 +1205,28 @@ class WebpackToolchain(ES5Toolchain):
                 )
                 continue
 
-            with codecs.open(path, 'r', encoding='utf8') as fd:
-                tree = io.read(parse, fd)
+            imports = recorded.get(path)
+            if imports is None and cache is not None:
+                imports = cache.get(path)
+                if imports is not None:
+                    logger.debug(
+                        "using cached import names for alias '%s'", modname)
+            if imports is None:
+                unresolved.append((modname, path))
+            else:
+                resolved[modname] = imports
+
+        results = read_all_module_imports(
+            [path for modname, path in unresolved], jobs, prescan)
+        for (modname, path), imports in zip(unresolved, results):
+            resolved[modname] = imports
+            if cache is not None:
+                cache.set(path, imports)
 
+        missing = set()
+        for modname in alias:
             new_missing = [
-                name for name in yield_module_imports(tree)
+                name for name in resolved.get(modname, ())
                 if not name_checker(name)
             ]
             if new_missing:
@@ -335,6 +1237,34 @@ class WebpackToolchain(ES5Toolchain):
             missing.update(new_missing)
         return missing
 
+    def verify_all_imports(self, spec, webpack_config, source_alias):
+        """
+        Return the names of the modules imported by the sources in the
+        source alias that are not declared by the webpack config, using
+        the import names cache if one is specified.
+        """
+
+        cache = None
+        if spec.get(VERIFY_IMPORTS_CACHE):
+            logger.debug(
+                "using '%s' as the import names cache",
+                spec[VERIFY_IMPORTS_CACHE],
+            )
+            cache = FileRecordCache(spec[VERIFY_IMPORTS_CACHE]).load()
+        missing = self.check_all_alias_declared(source_alias, partial(
+            check_name_declared,
+            webpack_config['resolve']['alias'],
+            webpack_config['resolveLoader']['alias'],
+            webpack_config['externals'],
+            spec.get(CALMJS_LOADERPLUGIN_REGISTRY),
+        ), cache=cache, recorded=spec.get(TRANSPILED_IMPORTS),
+            jobs=spec.get(BUILD_JOBS) or 1,
+            prescan=bool(spec.get(VERIFY_IMPORTS_PRESCAN)))
+        if cache is not None:
+            cache.dump()
+        return missing
+
+    @timed('assemble')
     def assemble(self, spec):
         """
         Assemble the library by compiling everything and generate the
@@ -345,8 +1275,10 @@ class WebpackToolchain(ES5Toolchain):
             alias = {}
             key = prefix + self.targetpath_suffix
             for modname, target in spec.get(key, {}).items():
-                # the alias must point to the full path.
-                alias[modname] = join(spec[BUILD_DIR], *target.split('/'))
+                # the alias must point to the full path; targets that
+                # reference the source file in place are already so.
+                alias[modname] = target if isabs(target) else join(
+                    spec[BUILD_DIR], *target.split('/'))
             return alias
 
         # the build config is the file that will be passed to webpack for
@@ -378,10 +1310,29 @@ class WebpackToolchain(ES5Toolchain):
             webpack_config['optimization'] = {'minimize': True}
         if WEBPACK_OUTPUT_LIBRARY in spec:
             webpack_config['output']['library'] = spec[WEBPACK_OUTPUT_LIBRARY]
-
-        version = get_bin_version(spec[self.webpack_bin_key], kw={
-            'env': webpack_env(pathsep.join(self.find_node_modules_basedir())),
-        })
+        if spec.get(WEBPACK_SPLIT_CHUNKS):
+            name = splitext(basename(spec[EXPORT_TARGET]))[0]
+            webpack_config['output']['chunkFilename'] = '%s.[id].js' % name
+            # the chunks are loaded through this global, which must not
+            # be shared with the other split artifacts on the same page.
+            webpack_config['output']['jsonpFunction'] = (
+                'webpackJsonp_' + re.sub(r'\W', '_', name))
+            webpack_config['__webpack_split_chunks__'] = True
+
+        version = None
+        if spec.get(WEBPACK_LINK_DRIVER) == LINK_DRIVER_NODE:
+            # the node driver will require the webpack package directly
+            # from these node_modules, so its version may be read from
+            # there without running the binary.
+            version = find_webpack_package_version(
+                self.find_node_modules_basedir())
+        if version is None:
+            with record_timing(spec, 'assemble.webpack_version'):
+                version = get_cached_bin_version(
+                    spec[self.webpack_bin_key], kw={
+                        'env': webpack_env(
+                            pathsep.join(self.find_node_modules_basedir())),
+                    }, cache_path=spec.get(WEBPACK_VERSION_CACHE))
 
         logger.debug(
             "found webpack at '%s' to be version '%s'",
@@ -430,12 +1381,25 @@ class WebpackToolchain(ES5Toolchain):
                 # TODO check that the default loader not being passed
                 # through check_all_alias_declared is not an issue.
                 alias[DEFAULT_CALMJS_EXPORT_NAME] = self.write_lookup_module(
-                    spec, _DEFAULT_LOADER_FILENAME,
-                    *_WEBPACK_CALMJS_MODULE_LOADER_TEMPLATE
+                    spec, _DEFAULT_LOADER_FILENAME, *(
+                        _WEBPACK_CALMJS_MODULE_ASYNC_LOADER_TEMPLATE
+                        if spec.get(CALMJS_ASYNC_LOADER) else
+                        _WEBPACK_CALMJS_MODULE_LAZY_LOADER_TEMPLATE
+                        if spec.get(CALMJS_LAZY_LOADER) else
+                        _WEBPACK_CALMJS_MODULE_LOADER_TEMPLATE
+                    )
                 )
+                # record the exported names for the consumers of the
+                # artifact, such that it need not be parsed and probed.
+                spec.advise(SUCCESS, self.write_export_manifest, spec)
                 # the bootstrap module will be the entry point in this
                 # case.
-                webpack_config['entry'] = self.write_bootstrap_module(spec)
+                webpack_config['entry'] = self.write_bootstrap_module(
+                    spec, _WEBPACK_ENTRY_CALMJS_MODULE_EXPORT_TEMPLATE + (
+                        _WEBPACK_ENTRY_CALMJS_PUBLIC_PATH_TEMPLATE
+                        if spec.get(WEBPACK_SPLIT_CHUNKS) else ''
+                    )
+                )
 
                 if (spec.get(WEBPACK_OUTPUT_LIBRARY) !=
                         DEFAULT_BOOTSTRAP_EXPORT):
@@ -504,13 +1468,9 @@ class WebpackToolchain(ES5Toolchain):
         spec[WEBPACK_CONFIG] = webpack_config
 
         if spec.get(VERIFY_IMPORTS, True):
-            missing = self.check_all_alias_declared(source_alias, partial(
-                check_name_declared,
-                webpack_config['resolve']['alias'],
-                webpack_config['resolveLoader']['alias'],
-                webpack_config['externals'],
-                spec.get(CALMJS_LOADERPLUGIN_REGISTRY),
-            ))
+            with record_timing(spec, 'assemble.verify_imports'):
+                missing = self.verify_all_imports(
+                    spec, webpack_config, source_alias)
             if missing:
                 logger.warning(
                     "source file(s) referenced modules that are not in alias "
@@ -522,8 +1482,292 @@ class WebpackToolchain(ES5Toolchain):
         webpack_config['module']['rules'] = spec.get(WEBPACK_MODULE_RULES, [])
 
         # write the configuration file, after everything is checked.
-        self.write_webpack_config(spec, webpack_config)
+        with record_timing(spec, 'assemble.write_config'):
+            self.write_webpack_config(spec, webpack_config)
+
+    def write_node_driver(self, spec):
+        """
+        Write the node driver script for the webpack configuration that
+        was written to the build directory.
+        """
+
+        driver_path = join(spec[BUILD_DIR], _DEFAULT_DRIVER_FILENAME)
+        write_if_changed(driver_path, _WEBPACK_NODE_DRIVER_TEMPLATE % {
+            'config': json.dumps(spec['webpack_config_js']),
+            'watch': json.dumps(bool(spec.get(WEBPACK_WATCH))),
+        })
+        return driver_path
+
+    def link_cli(self, spec, node_path):
+        """
+        Link through the webpack binary.
+        """
+
+        # webpack emits into a staging directory, from which the files
+        # are moved into place only if their content has changed.
+        staging_dir = realpath(mkdtemp())
+        try:
+            output_dir = join(staging_dir, 'output')
+            config_js = join(staging_dir, self.webpack_config_name)
+            write_if_changed(config_js, _WEBPACK_CLI_CONFIG_TEMPLATE % {
+                'config': json.dumps(spec['webpack_config_js']),
+                'path': json.dumps(output_dir),
+            })
+            # TODO allow to (un)set option flags such as --display-reasons
+            args = (
+                spec[self.webpack_bin_key],
+                '--display-modules', '--display-reasons',
+                '--config', config_js,
+            )
+            logger.info(
+                'invoking NODE_PATH=%r %s %s %s %s %s', node_path, *args)
+            # note that webpack treats the configuration as an executable
+            # node.js program - so that it will need to be able to import
+            # (require) webpack - explicitly have to provide the one
+            # located or associated with this toolchain instance, i.e.
+            # the one at the current directory
+
+            with record_timing(spec, 'link.webpack'):
+                rc = call(args, env=webpack_env(node_path))
+            if rc != 0:
+                logger.error("webpack has encountered a fatal error")
+                raise WebpackExitError(rc, spec[self.webpack_bin_key])
+            if isdir(output_dir):
+                move_staged_files(output_dir, dirname(spec[EXPORT_TARGET]))
+        finally:
+            shutil.rmtree(staging_dir)
+
+    def run_node_driver(self, driver_path, node_path):
+        """
+        Run the node driver script at driver_path; return its exit code
+        along with the build result that it reported.
+        """
 
+        args = (self.node_bin, driver_path)
+        logger.info('invoking NODE_PATH=%r %s %s', node_path, *args)
+        try:
+            process = Popen(args, stdout=PIPE, env=webpack_env(node_path))
+        except OSError:
+            raise WebpackRuntimeError("unable to execute '%s'" % args[0])
+        output = process.communicate()[0]
+        if not isinstance(output, str):
+            output = output.decode('utf8', 'replace')
+
+        result = parse_node_driver_result(output)
+        if result is None:
+            logger.error("node driver did not report a webpack build result")
+        return process.returncode, result
+
+    def link_node(self, spec, node_path):
+        """
+        Link through the node API of webpack using the node driver
+        script, with the structured result recorded to the spec.
+        """
+
+        driver_path = self.write_node_driver(spec)
+        with record_timing(spec, 'link.webpack'):
+            rc, result = self.run_node_driver(driver_path, node_path)
+        spec[WEBPACK_BUILD_RESULT] = result
+        add_reported_timing(spec, result)
+        if result is not None:
+            log_node_driver_result(result)
+
+        if rc != 0:
+            logger.error("webpack has encountered a fatal error")
+            raise WebpackExitError(rc, self.node_bin)
+
+    def watch_sourcepaths(self, spec):
+        """
+        Return the mapping from the source paths to the compile entries
+        that produced targets from them, for the watch mode.
+        """
+
+        sourcepaths = {}
+        for entry in self.compile_entries:
+            if not isinstance(entry, ToolchainSpecCompileEntry):
+                continue
+            modpaths = spec.get(entry.store_key + self.modpath_suffix, {})
+            targets = spec.get(entry.store_key + self.targetpath_suffix, {})
+            for modname, source in spec.get(
+                    entry.read_key + self.sourcepath_suffix, {}).items():
+                if modname in targets and modname in modpaths:
+                    sourcepaths.setdefault(source, []).append((
+                        entry.process_name, (
+                            modname, source, targets[modname],
+                            modpaths[modname],
+                        ),
+                    ))
+        return sourcepaths
+
+    def recompile(self, spec, sourcepaths, changed):
+        """
+        Compile the entries for the changed sources again into the build
+        directory, using the mapping produced by watch_sourcepaths.
+        """
+
+        for source in sorted(changed):
+            for process_name, entry in sourcepaths.get(source, ()):
+                getattr(self, 'compile_%s_entry' % process_name)(spec, entry)
+        manifest = spec.get(BUILD_MANIFEST)
+        if manifest is not None:
+            manifest.dump()
+
+    def watch(self, spec, process):
+        """
+        Keep compiling the sources that have changed into the build
+        directory while the webpack watcher process is running, such
+        that webpack will rebuild the artifact from its existing module
+        graph.  Return True if interrupted, or False when the process
+        terminates on its own.
+        """
+
+        sourcepaths = self.watch_sourcepaths(spec)
+        snapshot = snapshot_sources(sourcepaths)
+        logger.info(
+            "watching %d source file(s) for changes; interrupt to stop",
+            len(snapshot),
+        )
+        try:
+            while process.poll() is None:
+                sleep(self.watch_interval)
+                current = snapshot_sources(sourcepaths)
+                changed = set(
+                    path for path, value in current.items()
+                    if snapshot.get(path) != value
+                )
+                snapshot = current
+                if not changed:
+                    continue
+                logger.info(
+                    "compiling %d changed source file(s)", len(changed))
+                try:
+                    self.recompile(spec, sourcepaths, changed)
+                except Exception as e:
+                    # keep watching, such that the error may be fixed.
+                    logger.error("failed to compile changed sources: %s", e)
+        except KeyboardInterrupt:
+            logger.info("stopping watch mode")
+            return True
+        return False
+
+    def link_watch(self, spec, node_path):
+        """
+        Link through a long-lived webpack watcher process, and watch
+        the sources for changes until interrupted.  Rather than being
+        staged, the files emitted by the cli driver are written through
+        the same output filesystem as the node driver, which leaves the
+        identical files untouched and atomically replaces the others.
+        """
+
+        driver = spec.get(WEBPACK_LINK_DRIVER, DEFAULT_LINK_DRIVER)
+        if driver == LINK_DRIVER_NODE:
+            args = (self.node_bin, self.write_node_driver(spec))
+            stdout = PIPE
+        else:
+            config_js = join(spec[BUILD_DIR], _DEFAULT_WATCH_CONFIG_FILENAME)
+            write_if_changed(config_js, _WEBPACK_CLI_WATCH_CONFIG_TEMPLATE % {
+                'config': json.dumps(spec['webpack_config_js']),
+            })
+            args = (
+                spec[self.webpack_bin_key], '--watch', '--config', config_js)
+            stdout = None
+        logger.info('invoking NODE_PATH=%r %s', node_path, ' '.join(args))
+        try:
+            process = Popen(args, stdout=stdout, env=webpack_env(node_path))
+        except OSError:
+            raise WebpackRuntimeError("unable to execute '%s'" % args[0])
+        if stdout is PIPE:
+            reporter = Thread(
+                target=report_node_driver_results, args=(process.stdout,))
+            reporter.daemon = True
+            reporter.start()
+
+        try:
+            interrupted = self.watch(spec, process)
+        finally:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+        if not interrupted and process.returncode != 0:
+            logger.error("webpack has encountered a fatal error")
+            raise WebpackExitError(process.returncode, args[0])
+
+    def artifact_fingerprint(self, spec):
+        """
+        Return the fingerprint of the inputs to webpack for the artifact
+        cache, which covers the contents of the files in the build
+        directory, the webpack configuration, the version of webpack and
+        the lockfiles for the node_modules that are in use.
+        """
+
+        build_dir = spec[BUILD_DIR]
+        excluded = {
+            self.webpack_config_name, _DEFAULT_DRIVER_FILENAME,
+            _DEFAULT_WATCH_CONFIG_FILENAME,
+            _DEFAULT_BUILD_MANIFEST_FILENAME,
+        }
+        fingerprint = hashlib.sha256()
+
+        def update(*values):
+            for value in values:
+                fingerprint.update(value.encode('utf8'))
+                fingerprint.update(b'\0')
+
+        for root, dirs, files in walk(build_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = join(root, name)
+                target = relpath(path, build_dir).replace(sep, '/')
+                if target not in excluded:
+                    update(target, file_digest(path))
+
+        # the resources that are referenced in place by the aliases are
+        # outside of the build directory.
+        for path in sorted(set(spec[WEBPACK_CONFIG].get(
+                'resolve', {}).get('alias', {}).values())):
+            if not path.startswith(join(build_dir, '')) and isfile(path):
+                update(path, file_digest(path))
+
+        # as the build directory is typically a temporary directory, it
+        # must not be part of the fingerprint.
+        config = str(spec[WEBPACK_CONFIG])
+        for path in (json.dumps(build_dir)[1:-1], build_dir):
+            config = config.replace(path, '<build_dir>')
+        update(config, repr(spec[WEBPACK_CONFIG].get('__webpack_target__')))
+
+        for node_modules in self.find_node_modules_basedir():
+            for path in [
+                    join(dirname(node_modules), name)
+                    for name in _NODE_LOCKFILE_NAMES] + [
+                    join(node_modules, name)
+                    for name in _NODE_MODULES_LOCKFILE_NAMES]:
+                if isfile(path):
+                    update(path, file_digest(path))
+        return fingerprint.hexdigest()
+
+    def emitted_names(self, spec):
+        """
+        Return the names of the files emitted by webpack relative to the
+        directory of the export target, as reported by the node driver
+        or the chunk manifest, or otherwise the export target along with
+        its source map.
+        """
+
+        result = spec.get(WEBPACK_BUILD_RESULT)
+        if result and result.get('assets'):
+            return [asset['name'] for asset in result['assets']]
+        name = basename(spec[EXPORT_TARGET])
+        manifest = spec[EXPORT_TARGET] + CHUNK_MANIFEST_SUFFIX
+        if spec.get(WEBPACK_SPLIT_CHUNKS) and isfile(manifest):
+            with codecs.open(manifest, encoding='utf8') as fd:
+                chunks = json.load(fd)['chunks']
+            return sorted(set(
+                [basename(manifest)] +
+                [f for files in chunks.values() for f in files]
+            ))
+        return [name, name + '.map']
+
+    @timed('link')
     def link(self, spec):
         """
         Basically link everything up as a bundle, as if statically
@@ -537,20 +1781,215 @@ class WebpackToolchain(ES5Toolchain):
                 'itself.'
             )
 
-        # TODO allow to (un)set option flags such as --display-reasons
-        args = (
-            spec[self.webpack_bin_key],
-            '--display-modules', '--display-reasons',
-            '--config', spec['webpack_config_js']
-        )
-        logger.info('invoking NODE_PATH=%r %s %s %s %s %s', node_path, *args)
-        # note that webpack treats the configuration as an executable
-        # node.js program - so that it will need to be able to import
-        # (require) webpack - explicitly have to provide the one located
-        # or associated with this toolchain instance, i.e. the one at
-        # the current directory
-
-        rc = call(args, env=webpack_env(node_path))
-        if rc != 0:
-            logger.error("webpack has encountered a fatal error")
-            raise WebpackExitError(rc, spec[self.webpack_bin_key])
+        driver = spec.get(WEBPACK_LINK_DRIVER, DEFAULT_LINK_DRIVER)
+        if driver not in (LINK_DRIVER_NODE, LINK_DRIVER_CLI):
+            raise WebpackRuntimeError(
+                "unsupported webpack link driver '%s'" % driver)
+        if spec.get(WEBPACK_WATCH):
+            self.link_watch(spec, node_path)
+            return
+
+        cache = None
+        if spec.get(ARTIFACT_CACHE_DIR):
+            cache = ArtifactCache(
+                spec[ARTIFACT_CACHE_DIR],
+                link=bool(spec.get(ARTIFACT_CACHE_LINK)),
+            )
+            with record_timing(spec, 'link.fingerprint'):
+                fingerprint = spec[ARTIFACT_FINGERPRINT] = (
+                    self.artifact_fingerprint(spec))
+            if cache.restore(
+                    fingerprint, dirname(spec[EXPORT_TARGET])) is not None:
+                logger.info(
+                    "restored artifact for fingerprint '%s' from the "
+                    "artifact cache '%s'; skipping webpack",
+                    fingerprint, cache.path,
+                )
+                return
+
+        if driver == LINK_DRIVER_NODE:
+            self.link_node(spec, node_path)
+        else:
+            self.link_cli(spec, node_path)
+
+        if cache is not None:
+            cache.store(
+                fingerprint, dirname(spec[EXPORT_TARGET]),
+                self.emitted_names(spec),
+            )
+
+    def calf_pre_link(self, spec):
+        """
+        The first half of calf, which sets up the spec along with the
+        advices from the advice packages through the inherited
+        setup_apply_advice_packages, and processes it up to right before
+        the link step.
+        """
+
+        if not isinstance(spec, Spec):
+            raise TypeError('spec must be of type Spec')
+
+        if not spec.get(BUILD_DIR):
+            tempdir = realpath(mkdtemp())
+            spec.advise(CLEANUP, shutil.rmtree, tempdir)
+            build_dir = join(tempdir, 'build')
+            mkdir(build_dir)
+            spec[BUILD_DIR] = build_dir
+        else:
+            build_dir = self.realpath(spec, BUILD_DIR)
+            if not isdir(build_dir):
+                logger.error("build_dir '%s' is not a directory", build_dir)
+                raise_os_error(errno.ENOTDIR, build_dir)
+
+        self.realpath(spec, EXPORT_TARGET)
+        spec.advise(SETUP, self.setup_apply_advice_packages, spec)
+        spec.handle(SETUP)
+
+        for p in ('prepare', 'compile', 'assemble'):
+            spec.handle('before_' + p)
+            getattr(self, p)(spec)
+            spec.handle('after_' + p)
+        spec.handle(BEFORE_LINK)
+
+    def calf_post_link(self, spec):
+        """
+        The second half of calf, which completes the spec after it was
+        linked.
+        """
+
+        spec.handle(AFTER_LINK)
+        spec.handle(BEFORE_FINALIZE)
+        self.finalize(spec)
+        spec.handle(AFTER_FINALIZE)
+        spec.handle(SUCCESS)
+
+    def calf(self, spec):
+        """
+        Process the spec through the complete lifecycle, by linking the
+        spec between the two halves of calf.
+        """
+
+        try:
+            self.calf_pre_link(spec)
+            self.link(spec)
+            self.calf_post_link(spec)
+        except ToolchainCancel:
+            if spec.get(DEBUG):
+                log_exc_reason(*sys.exc_info())
+        except ToolchainAbort:
+            if spec.get(DEBUG):
+                log_exc_reason(*sys.exc_info())
+            raise
+        finally:
+            spec.handle(CLEANUP)
+
+    def batch_assemble(self, spec):
+        """
+        Process the spec through the first half of calf; return True if
+        the spec is ready to be linked.  Otherwise, the failure is
+        recorded as the build result for the spec and the cleanup
+        advices are executed.
+        """
+
+        if not isinstance(spec, Spec):
+            raise TypeError('spec must be of type Spec')
+
+        # the batch is always linked through the node driver.
+        spec[WEBPACK_LINK_DRIVER] = LINK_DRIVER_NODE
+        try:
+            self.calf_pre_link(spec)
+        except ToolchainCancel:
+            if spec.get(DEBUG):
+                log_exc_reason(*sys.exc_info())
+            spec.handle(CLEANUP)
+            return False
+        except Exception as e:
+            logger.error(
+                "failed to assemble artifact for '%s': %s",
+                spec.get(EXPORT_TARGET), e,
+            )
+            spec[WEBPACK_BUILD_RESULT] = {'errors': [str(e)]}
+            spec.handle(CLEANUP)
+            return False
+        return True
+
+    def batch_finalize(self, spec):
+        """
+        Complete the spec that was linked as part of a batch through the
+        second half of calf; return True if successful.
+        """
+
+        try:
+            errors = spec[WEBPACK_BUILD_RESULT].get('errors')
+            if errors:
+                logger.error(
+                    "webpack failed to link artifact for '%s'",
+                    spec[EXPORT_TARGET],
+                )
+                return False
+            self.calf_post_link(spec)
+        except ToolchainCancel:
+            if spec.get(DEBUG):
+                log_exc_reason(*sys.exc_info())
+            return False
+        finally:
+            spec.handle(CLEANUP)
+        return True
+
+    def batch(self, specs):
+        """
+        Build the artifacts for all the provided specs, where each of
+        them are assembled in turn and then linked together through a
+        single webpack multi-compiler invocation by the node driver, so
+        that the startup and the module resolution of webpack are shared
+        by all of them.
+
+        The build result reported for each spec is recorded under the
+        WEBPACK_BUILD_RESULT key of the respective spec, including the
+        failures to assemble.  Return the list of the specs that were
+        successfully built.
+        """
+
+        assembled = [spec for spec in specs if self.batch_assemble(spec)]
+        if not assembled:
+            return []
+
+        batch_dir = realpath(mkdtemp())
+        try:
+            # the order of the configurations must match the specs.
+            config_js = join(batch_dir, self.webpack_config_name)
+            write_if_changed(config_js, _WEBPACK_BATCH_CONFIG_TEMPLATE % (
+                ',\n'.join(
+                    '    require(%s)' % json.dumps(spec['webpack_config_js'])
+                    for spec in assembled
+                )
+            ))
+            driver_path = join(batch_dir, _DEFAULT_DRIVER_FILENAME)
+            write_if_changed(driver_path, _WEBPACK_NODE_DRIVER_TEMPLATE % {
+                'config': json.dumps(config_js),
+                'watch': 'false',
+            })
+            rc, result = self.run_node_driver(
+                driver_path, pathsep.join(self.find_node_modules_basedir()))
+        except Exception as e:
+            rc, result = None, {'errors': [str(e)]}
+            logger.error("failed to link the batch: %s", e)
+        finally:
+            shutil.rmtree(batch_dir)
+
+        children = (result or {}).get('children')
+        if not children or len(children) != len(assembled):
+            # the results cannot be mapped back to the specs, so the
+            # failure of the entire batch is recorded for each of them.
+            failure = result or {
+                'errors': ['webpack exited with code %s' % rc]}
+            children = [dict(failure) for spec in assembled]
+
+        built = []
+        for spec, child in zip(assembled, children):
+            spec[WEBPACK_BUILD_RESULT] = child
+            add_reported_timing(spec, child)
+            log_node_driver_result(child)
+            if self.batch_finalize(spec):
+                built.append(spec)
+        return built
@@ -3,58 +3,88 @@
 Various walkers.
 """
 
-from calmjs.parse.asttypes import Node
-
 
 def _replace_list_item(list_, idx, replacement):
     if replacement:
         list_[idx] = replacement
 
 
-def _replace_list_items(tree, attr, itemmap):
-    list_ = getattr(tree, attr)
-    for idx, item in enumerate(list_):
-        _replace_list_item(list_, idx, itemmap.get(item))
+def find_slots(parent, child):
+    """
+    Return the list of the slots within the parent node that hold the
+    child, as tuples of the container, being either the parent or one
+    of its list attributes, along with the attribute name or the index
+    within that list.
+    """
 
+    slots = []
+    for attr, value in vars(parent).items():
+        if value is child:
+            slots.append((parent, attr))
+        elif isinstance(value, list):
+            slots.extend(
+                (value, idx) for idx, item in enumerate(value)
+                if item is child
+            )
+    return slots
 
-def _replace_obj_attr(tree, attr, itemmap):
-    replacement = itemmap.get(getattr(tree, attr), NotImplemented)
-    if replacement is not NotImplemented:
-        setattr(tree, attr, replacement)
 
+def filter_slots(node, condition):
+    """
+    Return a generator that yields the slots of the descendants of the
+    node that satisfy the condition, in the same order as the filter
+    method of calmjs.parse.walkers.Walker, as tuples of the container
+    and key as per find_slots, along with the descendant.  The tree is
+    walked once, with only the parents of the descendants that satisfy
+    the condition checked for the slots.
+    """
 
-class ReplacementWalker(object):
+    stack = [(node, iter(node))]
+    while stack:
+        parent, children = stack[-1]
+        for child in children:
+            break
+        else:
+            stack.pop()
+            continue
+        if condition(child):
+            for container, key in find_slots(parent, child):
+                yield container, key, child
+        stack.append((child, iter(child)))
+
+
+def replace_slots(replacements):
+    """
+    Apply the replacements, being tuples of the container and key of a
+    slot as per find_slots, along with the replacement for the slot.
+    """
 
-    def __init__(self):
-        self.methods = [
-            (list, _replace_list_items),
-            (Node, _replace_obj_attr),
-        ]
+    for container, key, replacement in replacements:
+        if isinstance(container, list):
+            _replace_list_item(container, key, replacement)
+        else:
+            setattr(container, key, replacement)
+
+
+class ReplacementWalker(object):
 
     def replace(self, tree, nodemap):
         """
         With a given tree, walk and replace all nodes represented in the
         node map.
 
-        The replace method processes the tree in two passes per child.
-        First pass will recursively check through all children through
-        the standard Node.children method call.  Second pass will then
-        look for the actual attributes of the Node and the replacement
-        will then occur with entities as specified by the nodemap.
+        The nodes in the node map are looked up by their identity as the
+        tree is walked once through the standard Node.children method,
+        with the slots of the nodes found being located in their parents
+        and replaced after the walk with the entities as specified by
+        the nodemap.  The tree is not walked for an empty nodemap.
         """
 
-        # first, go through the standard API for the nested call, i.e.
-        # depth first.
-        for child in tree.children():
-            if child is None:
-                # a missing value might be an upstream bug?
-                continue
-            self.replace(child, nodemap)
-
-        # second, go through the individual vars within the object and
-        # verify.
-        for attr, value in vars(tree).items():
-            for t, m in self.methods:
-                if isinstance(value, t):
-                    m(tree, attr, nodemap)
-                    continue
+        if not nodemap:
+            return
+        idmap = {id(node): value for node, value in nodemap.items()}
+        replace_slots([
+            (container, key, idmap[id(node)])
+            for container, key, node in filter_slots(
+                tree, lambda n: id(n) in idmap)
+        ])